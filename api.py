@@ -0,0 +1,177 @@
+"""
+api.py — MediGraph HTTP JSON API (Flask)
+=========================================
+Lightweight service for EHR integrations, backed by the same engines as the
+Streamlit UI. The knowledge graph is loaded once per process by a background
+warm-up started when the app is created, and shared by every request (requests
+that arrive earlier wait for it). When the bundle or artifact files are
+rebuilt, a new graph snapshot is loaded in the background and swapped in
+without a restart (MEDIGRAPH_WATCH_INTERVAL seconds between checks, 0 = off).
+The drugs.json rules are compiled into a RuleIndex that is reloaded
+automatically when the file changes.
+
+Run with:  flask --app api run            (or: python api.py)
+
+Endpoints:
+  POST /check        {"drugs": [...], "patient": {"age": 70, "gender": "Female"}}
+                     -> {"conflicts", "age_warnings", "gender_warnings",
+                         "risk_score", "risk_level", "shared_partners"}
+                        shared_partners: pairs that share unusually many
+                        interaction partners (neighbor_engine.check_shared_partners)
+  POST /check/batch  {"regimens": [{"drugs": [...], "patient": {...}}, ...]}
+                     -> {"results": [<same shape as /check, without shared_partners>, ...]}
+  GET  /ready        -> 200 {"started", "ready": true, "error": null, "graph"} once
+                        every index is loaded, 503 while warming up or if it
+                        failed; "graph" is data_loader.reload_status()
+  GET  /drugs        -> {"drugs": [...]}
+  GET  /drugs/search?q=warfrin&k=10
+                     -> {"matches": [{"name", "node_id", "drugbank_id", "match", "score"}, ...]}
+
+Drug names in /check requests may be in any case, brand names from
+data/drug_aliases.csv or DrugBank IDs; they are resolved to canonical names
+first, and inputs that resolve to nothing are listed in "unknown_drugs".
+"""
+
+import os
+import sys
+
+from flask import Flask, jsonify, request
+
+# Ensure the medigraph directory is in the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from engines.data_loader import (
+    get_drug_names, get_knowledge_graph, get_name_index, reload_status, start_watcher,
+)
+from engines.interaction_engine import (
+    check_interactions, check_interactions_batch, conflicts_from_batch, start_warmup,
+    warmup_status,
+)
+from engines.neighbor_engine import check_shared_partners
+from engines.risk_engine import calculate_risk
+from engines.validation_engine import get_rule_index
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DRUGS_JSON_PATH = os.path.join(BASE_DIR, "data", "drugs.json")
+# Seconds between checks for a rebuilt bundle / artifacts (0 = never reload)
+WATCH_INTERVAL = float(os.environ.get("MEDIGRAPH_WATCH_INTERVAL", 30))
+
+MAX_BATCH_SIZE = 10_000
+MAX_SEARCH_RESULTS = 50
+
+
+def _bad_request(message: str):
+    return jsonify({"error": message}), 400
+
+
+def _parse_regimen(payload):
+    """Return (drugs, patient) from one request object, or raise ValueError."""
+    if not isinstance(payload, dict):
+        raise ValueError("each regimen must be a JSON object")
+    drugs = payload.get("drugs")
+    if not isinstance(drugs, list) or not all(isinstance(d, str) for d in drugs):
+        raise ValueError("'drugs' must be a list of drug name strings")
+    patient = payload.get("patient") or {}
+    if not isinstance(patient, dict):
+        raise ValueError("'patient' must be a JSON object")
+    age = patient.get("age")
+    if age is not None and (isinstance(age, bool) or not isinstance(age, (int, float))):
+        raise ValueError("'patient.age' must be a number")
+    if patient.get("gender") is not None and not isinstance(patient["gender"], str):
+        raise ValueError("'patient.gender' must be a string")
+    return _canonical_names(drugs), patient
+
+
+def _canonical_names(drugs: list) -> list:
+    """Resolve case variants, aliases and DrugBank IDs; unknown inputs are kept as sent."""
+    index, names = get_name_index(), get_drug_names()
+    resolved = []
+    for drug in drugs:
+        node_id = index.resolve(drug)
+        resolved.append(names[node_id] if node_id >= 0 else drug)
+    return resolved
+
+
+def _assess(drugs, patient, conflicts, warnings) -> dict:
+    age_warnings, gender_warnings = warnings
+    risk_score, risk_level = calculate_risk(conflicts, age_warnings, gender_warnings)
+    index = get_name_index()
+    return {
+        "conflicts":       conflicts,
+        "age_warnings":    age_warnings,
+        "gender_warnings": gender_warnings,
+        "risk_score":      risk_score,
+        "risk_level":      risk_level,
+        "unknown_drugs":   [drug for drug in drugs if index.resolve(drug) < 0],
+    }
+
+
+def create_app(drugs_json_path: str = DRUGS_JSON_PATH) -> Flask:
+    app = Flask(__name__)
+
+    # Load the knowledge graph in the background (once per process) and the
+    # restriction rules now, so a bad rules path fails at startup
+    start_warmup()
+    get_rule_index(drugs_json_path)
+    # Rebuilt graph files are loaded in the background and swapped in live
+    if WATCH_INTERVAL > 0:
+        start_watcher(WATCH_INTERVAL)
+
+    @app.get("/ready")
+    def ready():
+        status = warmup_status()
+        if status["ready"]:
+            status["graph"] = reload_status()
+        return jsonify(status), 200 if status["ready"] else 503
+
+    @app.get("/drugs")
+    def drugs():
+        return jsonify({"drugs": get_drug_names()})
+
+    @app.get("/drugs/search")
+    def search_drugs():
+        try:
+            k = min(int(request.args.get("k", 10)), MAX_SEARCH_RESULTS)
+        except ValueError:
+            return _bad_request("'k' must be an integer")
+        return jsonify({"matches": get_name_index().search(request.args.get("q", ""), k)})
+
+    @app.post("/check")
+    def check():
+        try:
+            drugs, patient = _parse_regimen(request.get_json(silent=True))
+        except ValueError as exc:
+            return _bad_request(str(exc))
+        warnings = get_rule_index(drugs_json_path).validate(patient, drugs)
+        result = _assess(drugs, patient, check_interactions(drugs), warnings)
+        result["shared_partners"] = check_shared_partners(drugs)
+        return jsonify(result)
+
+    @app.post("/check/batch")
+    def check_batch():
+        body = request.get_json(silent=True)
+        regimens = body.get("regimens") if isinstance(body, dict) else None
+        if not isinstance(regimens, list):
+            return _bad_request("'regimens' must be a list")
+        if len(regimens) > MAX_BATCH_SIZE:
+            return _bad_request(f"at most {MAX_BATCH_SIZE} regimens per request")
+        try:
+            parsed = [_parse_regimen(r) for r in regimens]
+        except ValueError as exc:
+            return _bad_request(str(exc))
+
+        drug_lists = [drugs for drugs, _ in parsed]
+        graph = get_knowledge_graph()
+        batch = check_interactions_batch(drug_lists, graph=graph)
+        per_regimen = conflicts_from_batch(batch, len(parsed), graph=graph)
+        warnings = get_rule_index(drugs_json_path).validate_batch(
+            [patient for _, patient in parsed], drug_lists)
+        results = [_assess(drugs, patient, conflicts, w)
+                   for (drugs, patient), conflicts, w in zip(parsed, per_regimen, warnings)]
+        return jsonify({"results": results})
+
+    return app
+
+
+if __name__ == "__main__":
+    create_app().run(host="0.0.0.0", port=int(os.environ.get("PORT", 5000)))
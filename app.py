@@ -12,10 +12,21 @@ import os
 # Ensure the medigraph directory is in the Python path for Streamlit Cloud
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from engines.data_loader import get_drug_names, get_num_drugs
-from engines.interaction_engine import check_interactions
-from engines.risk_engine import calculate_risk
-from engines.graph_engine import build_graph
+from engines.alternative_engine import suggest_alternatives
+from engines.data_loader import get_name_index, get_num_drugs, start_watcher
+from engines.interaction_engine import RegimenSession, start_warmup, warmup_status
+from engines.graph_engine import render_graph
+from engines.neighbor_engine import check_shared_partners
+from engines.validation_engine import RuleIndex, get_rule_index
+
+# Load every index on a background thread as soon as the server runs this
+# script (idempotent across reruns and sessions); concurrent sessions wait on
+# the same builds instead of each starting their own
+start_warmup()
+# Rebuilt graph files are loaded in the background and swapped in live
+_watch_interval = float(os.environ.get("MEDIGRAPH_WATCH_INTERVAL", 30))
+if _watch_interval > 0:
+    start_watcher(_watch_interval)
 
 # ── Page config ────────────────────────────────────────────────────────────── #
 st.set_page_config(
@@ -290,23 +301,42 @@ with st.sidebar:
 
 
 # ── Load OGB Data (cached) ───────────────────────────────────────────────────── #
-@st.cache_resource(show_spinner="Connecting to OGB knowledge graph...")
-def load_drug_list():
-    return get_drug_names()
+def load_name_index():
+    # data_loader keeps one index per graph snapshot, so a live reload is picked up
+    if not warmup_status()["ready"]:
+        with st.spinner("Connecting to OGB knowledge graph..."):
+            return get_name_index()
+    return get_name_index()
 
-drug_names = load_drug_list()
+name_index = load_name_index()
+
+
+def load_drug_rules():
+    # Age/gender restriction rules from the local drugs.json; get_rule_index()
+    # caches the compiled index itself and rebuilds it when the file changes
+    try:
+        return get_rule_index()
+    except Exception:
+        return RuleIndex([])
 
 # ── Main Section ─────────────────────────────────────────────────────────────── #
 st.markdown("<div class='animated-item delay-1'>", unsafe_allow_html=True)
 col1, col2 = st.columns([3, 1])
 with col1:
     st.markdown("<h3 style='color:#e2e8f0; font-weight:500; font-size:1.3rem;'>Select Medications</h3>", unsafe_allow_html=True)
+    # Search runs server-side; the widget only receives the current selection plus the top matches
+    drug_query = st.text_input(
+        "Search by name, brand name or DrugBank ID",
+        placeholder="Type to search (typos are fine)"
+    )
+    matches = [m["name"] for m in name_index.search(drug_query, k=25)] if drug_query else []
+    current = st.session_state.get("selected_drugs", [])
     selected_drugs = st.multiselect(
         "Search and select patient's current or prescribed drugs",
-        options=drug_names,
-        default=None,
-        max_selections=15,
-        placeholder="Type to search"
+        options=list(dict.fromkeys(current + matches)),
+        key="selected_drugs",
+        max_selections=100,
+        placeholder="Pick from the search results"
     )
 
 with col2:
@@ -314,30 +344,26 @@ with col2:
     check_btn = st.button("Check Interactions", type="primary", use_container_width=True)
 st.markdown("</div>", unsafe_allow_html=True)
 
+# ── Regimen session: each rerun only applies the drugs added/removed since the last one ── #
+if "regimen" not in st.session_state:
+    st.session_state.regimen = RegimenSession(load_drug_rules())
+regimen = st.session_state.regimen
+regimen.set_rules(load_drug_rules())
+regimen.sync(selected_drugs)
+regimen.set_patient({"name": patient_name or "Unknown", "age": patient_age, "gender": patient_gender})
+
 # ── Results ───────────────────────────────────────────────────────────────────── #
 if check_btn and selected_drugs:
     if len(selected_drugs) < 2:
         st.warning("Please select at least 2 drugs to analyze potential interactions.")
     else:
         with st.spinner("Analyzing graph interactions..."):
-            # Run engines
-            conflicts = check_interactions(selected_drugs)
-            patient_data = {"name": patient_name or "Unknown", "age": patient_age, "gender": patient_gender}
-
-            # Validation (age/gender) against local drugs.json
-            try:
-                from engines.validation_engine import validate_patient
-                import json, os
-                BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-                drugs_json_path = os.path.join(BASE_DIR, "data", "drugs.json")
-                with open(drugs_json_path) as f:
-                    drugs_db = json.load(f)
-                age_warnings, gender_warnings = validate_patient(patient_data, selected_drugs, drugs_db)
-            except Exception:
-                age_warnings, gender_warnings = [], []
-
-            risk_score, risk_level = calculate_risk(conflicts, age_warnings, gender_warnings)
-            graph_html = build_graph(selected_drugs, conflicts)
+            # Conflicts, warnings and risk are kept current by the session
+            conflicts = regimen.conflicts
+            age_warnings, gender_warnings = regimen.age_warnings, regimen.gender_warnings
+            risk_score, risk_level = regimen.risk()
+            shared_partners = check_shared_partners(selected_drugs)
+            graph_html = render_graph(selected_drugs, conflicts)
 
         # ── Layout: Risk Gauge | Summary ─────────────────────────────── #
         st.markdown("<div class='animated-item delay-2'>", unsafe_allow_html=True)
@@ -413,6 +439,18 @@ if check_btn and selected_drugs:
             for w in gender_warnings:
                 st.markdown(f'<div class="glass-card metric-card error">{w}</div>', unsafe_allow_html=True)
 
+        # ── Shared Interaction Partners (indirect risk) ───────────────── #
+        if shared_partners:
+            st.markdown('<div class="section-title">Shared Interaction Partners</div>', unsafe_allow_html=True)
+            for p in shared_partners:
+                st.markdown(f"""
+                <div class="glass-card metric-card warn">
+                    <span class="conflict-drug-highlight">{p['drug1']}</span> and <span class="conflict-drug-highlight">{p['drug2']}</span>
+                    share {p['common_partners']} interaction partners (Adamic-Adar {p['adamic_adar']},
+                    higher than {p['percentile']:g}% of drug pairs) — watch for indirect, compounding interactions.
+                </div>
+                """, unsafe_allow_html=True)
+
         # ── Interactive Graph ─────────────────────────────────────────── #
         st.markdown('<div class="section-title">Interaction Network</div>', unsafe_allow_html=True)
         st.markdown("""
@@ -430,6 +468,42 @@ if check_btn and selected_drugs:
 elif check_btn:
     st.info("Please select medications before checking interactions.")
 
+# ── Safer Alternatives ─────────────────────────────────────────────────────── #
+# Outside the results block: its own widgets rerun the script without the button
+if len(selected_drugs) >= 2 and regimen.conflicts:
+    st.markdown('<div class="section-title">Safer Alternatives</div>', unsafe_allow_html=True)
+    conflicting = list(dict.fromkeys(name for c in regimen.conflicts for name in (c["drug1"], c["drug2"])))
+    rules = load_drug_rules()
+    a1, a2, a3 = st.columns([2, 2, 1])
+    with a1:
+        replace = st.selectbox("Drug to replace", conflicting)
+    with a2:
+        category = st.selectbox("Category", ["Any category"] + rules.categories)
+    with a3:
+        respect_rules = st.checkbox("Patient restrictions", value=True)
+
+    suggestions = suggest_alternatives(
+        selected_drugs, replace, top_k=5,
+        category=None if category == "Any category" else category,
+        patient={"age": patient_age, "gender": patient_gender} if respect_rules else None,
+        rules=rules,
+    )
+    if not suggestions:
+        st.info("No candidate drugs match these filters.")
+    for s in suggestions:
+        if s["interactions"]:
+            found = ", ".join(f"{p['drug']} ({p['severity']})" for p in s["interacts_with"])
+            detail, card_cls = f"interacts with {found}", "warn"
+        else:
+            detail, card_cls = "no known interactions with the rest of the regimen", "safe"
+        category_text = f" · {s['category']}" if s["category"] else ""
+        st.markdown(f"""
+        <div class="glass-card metric-card {card_cls}">
+            <span class="conflict-drug-highlight">{s['drug']}</span>{category_text}
+            — weighted score {s['score']}: {detail}.
+        </div>
+        """, unsafe_allow_html=True)
+
 # ── Footer ─────────────────────────────────────────────────────────────────── #
 st.markdown("<br><br><hr style='border-color: rgba(255,255,255,0.05);'>", unsafe_allow_html=True)
 st.markdown("""
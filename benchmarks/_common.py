@@ -0,0 +1,57 @@
+"""
+_common.py
+----------
+Shared helpers for the benchmark scripts in this directory.
+Run any benchmark from the repository root, e.g.:
+
+    python benchmarks/bench_node_degrees.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+RAW_EDGE_PATH = os.path.join(ROOT_DIR, "dataset", "ogbl_ddi", "raw", "edge.csv.gz")
+
+
+def load_raw_edge_index() -> np.ndarray:
+    """
+    Read ogbl-ddi's raw edge list and return it the way OGB serves it:
+    a (2, 2E) int64 array holding every edge in both directions.
+    """
+    edges = pd.read_csv(RAW_EDGE_PATH, header=None).to_numpy(dtype=np.int64).T
+    return np.concatenate([edges, edges[::-1]], axis=1)
+
+
+def timeit(fn, repeat: int = 5, number: int = 1) -> float:
+    """Best-of-`repeat` wall time of `number` calls to fn(), in seconds per call."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def fmt_seconds(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:8.1f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:8.1f} ms"
+    return f"{seconds:8.2f} s "
+
+
+def random_regimens(names: list, count: int, min_size: int = 3, max_size: int = 15,
+                    seed: int = 0) -> list:
+    """`count` random regimens of distinct drug names, sizes uniform in [min_size, max_size]."""
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(min_size, max_size + 1, size=count)
+    return [[names[i] for i in rng.choice(len(names), size=s, replace=False)] for s in sizes]
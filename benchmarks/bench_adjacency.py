@@ -0,0 +1,62 @@
+"""
+bench_adjacency.py
+------------------
+Memory, build time and pair-lookup throughput of the legacy Python tuple set
+versus the CSR adjacency index.
+"""
+
+import time
+import tracemalloc
+
+import numpy as np
+
+from _common import fmt_seconds, load_raw_edge_index, timeit
+from engines.adjacency import CSRAdjacency
+
+
+def legacy_edge_set(edge_index) -> set:
+    edge_set = set()
+    for s, t in zip(edge_index[0].tolist(), edge_index[1].tolist()):
+        edge_set.add((min(s, t), max(s, t)))
+    return edge_set
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    obj = build()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, elapsed, size, peak
+
+
+def main():
+    edge_index = load_raw_edge_index()
+    num_nodes = int(edge_index.max()) + 1
+
+    edge_set, set_time, set_size, set_peak = measure(lambda: legacy_edge_set(edge_index))
+    csr, csr_time, csr_size, csr_peak = measure(
+        lambda: CSRAdjacency.from_edge_index(edge_index, num_nodes))
+    assert csr.num_edges == len(edge_set)
+
+    rng = np.random.default_rng(0)
+    pairs = rng.integers(0, num_nodes, size=(20_000, 2)).tolist()
+    assert all(((min(a, b), max(a, b)) in edge_set) == csr.has_interaction(a, b)
+               for a, b in pairs)
+
+    set_lookup = timeit(lambda: [(min(a, b), max(a, b)) in edge_set for a, b in pairs], repeat=3)
+    csr_lookup = timeit(lambda: [csr.has_interaction(a, b) for a, b in pairs], repeat=3)
+
+    mb = 1024 * 1024
+    print(f"undirected edges        : {csr.num_edges:,}")
+    print(f"{'':24}{'tuple set':>14}{'CSR':>14}")
+    print(f"{'resident size':24}{set_size / mb:>11.1f} MB{csr.nbytes / mb:>11.1f} MB")
+    print(f"{'peak while building':24}{set_peak / mb:>11.1f} MB{csr_peak / mb:>11.1f} MB")
+    print(f"{'build time':24}{fmt_seconds(set_time):>14}{fmt_seconds(csr_time):>14}")
+    print(f"{'lookups / s':24}{len(pairs) / set_lookup:>14,.0f}{len(pairs) / csr_lookup:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
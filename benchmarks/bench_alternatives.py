@@ -0,0 +1,125 @@
+"""
+bench_alternatives.py
+---------------------
+Safer-alternative scoring (engines/alternative_engine.py) per regimen size:
+one check_interactions() call per candidate drug (the regimen with the
+replaced drug swapped for it) vs AlternativeIndex.scores() over the CSR
+rows of the drugs that stay, and suggest_alternatives() end to end with and
+without the category / patient filters.
+
+Every candidate's score, interaction count and worst severity are checked
+against the per-candidate calls, and against find_many() lookups on a
+snapshot with a random local overlay (so re-slotted severities are covered).
+
+    python benchmarks/bench_alternatives.py --sizes 5 15 50
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from _common import fmt_seconds, random_regimens, timeit
+from bench_overlay import random_overlay
+import engines.data_loader as dl
+from engines.alternative_engine import AlternativeIndex, alternative_scores, suggest_alternatives
+from engines.interaction_engine import check_interactions
+from engines.overlay import InteractionOverlay
+from engines.risk_engine import SEVERITY_WEIGHTS
+from engines.severity import SEVERITY_LEVELS
+
+
+def per_candidate(regimen, replace, names):
+    """Score, interactions and worst severity of every node, one check_interactions() each."""
+    keep = [name for name in regimen if name != replace]
+    score = np.zeros(len(names), dtype=np.int32)
+    interactions = np.zeros(len(names), dtype=np.int32)
+    worst = np.full(len(names), -1, dtype=np.int8)
+    for node_id, name in enumerate(names):
+        if name in keep:
+            continue
+        for conflict in check_interactions(keep + [name]):
+            if name in (conflict["drug1"], conflict["drug2"]):
+                score[node_id] += SEVERITY_WEIGHTS[conflict["severity"]]
+                interactions[node_id] += 1
+                worst[node_id] = max(worst[node_id], SEVERITY_LEVELS.index(conflict["severity"]))
+    return score, interactions, worst
+
+
+def lookup_scores(graph, keep):
+    """The same arrays from find_many() on every (candidate, kept drug) pair."""
+    n = graph.num_drugs()
+    a, b = np.repeat(np.arange(n), len(keep)), np.tile(keep, n)
+    slots = graph.adjacency().find_many(a, b)
+    hit = slots >= 0
+    codes = graph.edge_severity()[slots[hit]]
+    weights = np.array([SEVERITY_WEIGHTS[level] for level in SEVERITY_LEVELS])
+    score = np.bincount(a[hit], weights[codes], minlength=n).astype(np.int32)
+    interactions = np.bincount(a[hit], minlength=n).astype(np.int32)
+    worst = np.full(n, -1, dtype=np.int8)
+    np.maximum.at(worst, a[hit], codes.astype(np.int8))
+    return score, interactions, worst
+
+
+def assert_same(got, want, skip=()):
+    for g, w in zip(got, want):
+        g = g.copy()
+        g[list(skip)] = w[list(skip)]
+        assert np.array_equal(g, w)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 15, 50])
+    parser.add_argument("--regimens", type=int, default=200)
+    args = parser.parse_args()
+
+    graph = dl.get_knowledge_graph().warm()
+    names, name_to_id = graph.drug_names(), graph.name_to_id()
+    start = time.perf_counter()
+    index = AlternativeIndex(graph)
+    print(f"AlternativeIndex over {graph.adjacency().num_edges:,} edges built in "
+          f"{fmt_seconds(time.perf_counter() - start).strip()}")
+
+    # The same scores on a snapshot with an overlay, where slots are re-mapped
+    overlay_frame, _, _, _ = random_overlay(graph, 2000, 1000, 1000)
+    overlaid = graph.with_overlay(graph.version + 1000, InteractionOverlay.from_frame(overlay_frame))
+    overlay_index = AlternativeIndex(overlaid)
+    for regimen in random_regimens(names, 20, 3, 30, seed=7):
+        keep = np.array([name_to_id[n] for n in regimen[1:]], dtype=np.int64)
+        assert_same(overlay_index.scores(keep), lookup_scores(overlaid, keep))
+        assert_same(index.scores(keep), lookup_scores(graph, keep))
+    print("overlay snapshot: scores match find_many() on every candidate pair")
+
+    patient = {"age": 30, "gender": "Female"}
+    print()
+    print(f"{'drugs':>6} {'per candidate':>14} {'index scores':>13} {'suggest top-10':>15} "
+          f"{'+ filters':>11}")
+    for size in args.sizes:
+        regimens = random_regimens(names, args.regimens, size, size, seed=size)
+        regimen = regimens[0]
+        start = time.perf_counter()
+        want = per_candidate(regimen, regimen[0], names)
+        naive = time.perf_counter() - start
+        got = alternative_scores(regimen, regimen[0])
+        # The kept drugs are not candidates (the per-candidate loop skips them)
+        assert_same((got["score"], got["interactions"], got["worst"]), want, skip=got["keep"])
+        # Ranking: score, then fewer partners overall, then node id
+        ids = np.setdiff1d(np.arange(len(names)), [name_to_id[n] for n in regimen])
+        ranked = ids[np.lexsort((ids, index.degrees[ids], want[0][ids]))][:10]
+        assert [s["drug"] for s in suggest_alternatives(regimen, regimen[0])] == \
+            [names[i] for i in ranked]
+
+        ids = [np.array([name_to_id[n] for n in r[1:]], dtype=np.int64) for r in regimens]
+        scores = timeit(lambda: [index.scores(keep) for keep in ids], repeat=3) / len(ids)
+        suggest = timeit(lambda: [suggest_alternatives(r, r[0]) for r in regimens],
+                         repeat=3) / len(regimens)
+        filtered = timeit(lambda: [suggest_alternatives(r, r[0], patient=patient)
+                                   for r in regimens], repeat=3) / len(regimens)
+        print(f"{size:6d} {fmt_seconds(naive):>14} {fmt_seconds(scores):>13} "
+              f"{fmt_seconds(suggest):>15} {fmt_seconds(filtered):>11}")
+    print("scores and top-10 order match one check_interactions() call per candidate")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+bench_async.py
+--------------
+Throughput of the asyncio InteractionService (micro-batching + in-flight
+deduplication) against one check_interactions() call per request on the
+default executor. Requests arrive in concurrent bursts drawn from a pool of
+popular regimens, so bursts overlap. Results are checked against
+check_interactions().
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import numpy as np
+
+from _common import ROOT_DIR, random_regimens
+from engines.async_service import InteractionService
+from engines.data_loader import get_drug_names
+from engines.interaction_engine import check_interactions, warm_index
+from engines.validation_engine import validate_patient
+
+
+async def per_request(requests, burst, drugs_db):
+    loop = asyncio.get_running_loop()
+
+    async def one(drugs, patient):
+        conflicts = await loop.run_in_executor(None, check_interactions, drugs)
+        age_warnings, gender_warnings = validate_patient(patient, drugs, drugs_db)
+        return {"conflicts": conflicts, "age_warnings": age_warnings,
+                "gender_warnings": gender_warnings}
+
+    results = []
+    for i in range(0, len(requests), burst):
+        results += await asyncio.gather(*(one(d, p) for d, p in requests[i:i + burst]))
+    return results
+
+
+async def coalesced(requests, burst, service):
+    await service.start()
+    results = []
+    for i in range(0, len(requests), burst):
+        results += await asyncio.gather(*(service.check(d, p) for d, p in requests[i:i + burst]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--pool", type=int, default=5_000, help="distinct regimens to draw from")
+    parser.add_argument("--burst", type=int, default=500, help="concurrent requests per burst")
+    args = parser.parse_args()
+
+    with open(os.path.join(ROOT_DIR, "data", "drugs.json")) as f:
+        drugs_db = json.load(f)
+    pool = random_regimens(get_drug_names(), args.pool, min_size=2, max_size=10)
+    rng = np.random.default_rng(1)
+    patient = {"age": 67, "gender": "Female"}
+    requests = [(pool[i], patient) for i in rng.integers(0, len(pool), args.requests)]
+    warm_index()
+
+    print(f"requests: {len(requests):,} in bursts of {args.burst}, pool {len(pool):,}")
+    start = time.perf_counter()
+    expected = asyncio.run(per_request(requests, args.burst, drugs_db))
+    base = time.perf_counter() - start
+    print(f"  one call per request : {len(requests) / base:>9,.0f} req/s")
+
+    service = InteractionService()
+    start = time.perf_counter()
+    got = asyncio.run(coalesced(requests, args.burst, service))
+    elapsed = time.perf_counter() - start
+    service.close()
+    assert got == expected
+    stats = service.stats
+    print(f"  InteractionService   : {len(requests) / elapsed:>9,.0f} req/s   "
+          f"x{base / elapsed:.1f}  ({stats['batches']} batches, "
+          f"{stats['deduplicated']:,} deduplicated)")
+
+
+if __name__ == "__main__":
+    main()
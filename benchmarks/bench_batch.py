@@ -0,0 +1,48 @@
+"""
+bench_batch.py
+--------------
+Throughput of check_interactions() in a Python loop versus one
+check_interactions_batch() call over the same regimens, plus a check that
+both report the same conflicts.
+"""
+
+import argparse
+import time
+
+from _common import random_regimens
+from engines.data_loader import get_drug_names
+from engines.interaction_engine import (
+    check_interactions, check_interactions_batch, conflicts_from_batch,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--regimens", type=int, default=100_000)
+    parser.add_argument("--max-size", type=int, default=15)
+    args = parser.parse_args()
+
+    names = get_drug_names()
+    regimens = random_regimens(names, args.regimens, max_size=args.max_size)
+    check_interactions_batch(regimens[:10])            # warm the indexes
+
+    sample = regimens[:2_000]
+    start = time.perf_counter()
+    scalar = [check_interactions(r) for r in sample]
+    loop_rate = len(sample) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    result = check_interactions_batch(regimens)
+    batch_rate = len(regimens) / (time.perf_counter() - start)
+
+    assert scalar == conflicts_from_batch(check_interactions_batch(sample), len(sample))
+
+    print(f"regimens                : {len(regimens):,} (3-{args.max_size} drugs)")
+    print(f"conflicts found         : {len(result['regimen_id']):,}")
+    print(f"loop of check_interactions : {loop_rate:>12,.0f} regimens/s")
+    print(f"check_interactions_batch   : {batch_rate:>12,.0f} regimens/s")
+    print(f"speed-up                   : {batch_rate / loop_rate:>12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+bench_bitmatrix.py
+------------------
+Microbenchmark of the bit-packed PackedAdjacency against the legacy tuple
+set from get_interaction_edge_set() (and the CSR index): build time, memory,
+single-pair tests, bulk tests, regimen submatrix extraction and per-drug
+interaction counts. Every backend is checked to give the same answers.
+"""
+
+import time
+
+import numpy as np
+
+from _common import fmt_seconds, load_raw_edge_index, random_regimens
+from bench_adjacency import legacy_edge_set, measure
+from engines.bit_adjacency import PackedAdjacency
+from engines.data_loader import get_adjacency, get_drug_names, get_name_to_id, get_num_drugs
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main():
+    num_nodes = get_num_drugs()
+    edge_index = load_raw_edge_index()
+    adjacency = get_adjacency()
+    adjacency.find_many([0], [0])
+
+    edge_set, set_build, set_size, set_peak = measure(lambda: legacy_edge_set(edge_index))
+    packed, packed_build, _, packed_peak = measure(
+        lambda: PackedAdjacency.from_edge_index(edge_index, num_nodes))
+    assert np.array_equal(packed.bits, PackedAdjacency.from_csr(adjacency).bits)
+
+    mb = 1024 * 1024
+    print(f"{'backend':8}{'build':>12}{'resident':>12}{'peak':>12}")
+    print(f"{'set':8}{fmt_seconds(set_build):>12}{set_size / mb:>9.1f} MB{set_peak / mb:>9.1f} MB")
+    print(f"{'CSR':8}{'':>12}{adjacency.nbytes / mb:>9.1f} MB")
+    print(f"{'packed':8}{fmt_seconds(packed_build):>12}{packed.nbytes / mb:>9.1f} MB"
+          f"{packed_peak / mb:>9.1f} MB")
+
+    rng = np.random.default_rng(0)
+    a = rng.integers(0, num_nodes, 200_000)
+    b = rng.integers(0, num_nodes, 200_000)
+    a_list, b_list = a.tolist(), b.tolist()
+
+    # Single-pair tests from Python, one call per pair
+    in_set, t_set = timed(lambda: [(min(x, y), max(x, y)) in edge_set for x, y in zip(a_list, b_list)])
+    in_csr, t_csr = timed(lambda: [adjacency.has_interaction(x, y) for x, y in zip(a_list, b_list)])
+    in_bits, t_bits = timed(lambda: [packed.has_interaction(x, y) for x, y in zip(a_list, b_list)])
+    assert in_set == in_csr == in_bits
+    print(f"\nsingle-pair tests ({len(a):,} pairs, per lookup)")
+    for name, t in (("set", t_set), ("CSR", t_csr), ("packed", t_bits)):
+        print(f"  {name:7} {fmt_seconds(t / len(a))}")
+
+    bulk_csr, t_csr = timed(lambda: adjacency.find_many(a, b) >= 0)
+    bulk_bits, t_bits = timed(lambda: packed.has_many(a, b))
+    assert np.array_equal(bulk_csr, bulk_bits) and bulk_bits.tolist() == in_set
+    print(f"\nbulk tests ({len(a):,} pairs)")
+    print(f"  CSR find_many   {fmt_seconds(t_csr)}")
+    print(f"  packed has_many {fmt_seconds(t_bits)}")
+
+    name_to_id = get_name_to_id()
+    print("\nregimen submatrix + per-drug counts (per regimen)")
+    for size in (15, 80):
+        regimens = [np.array([name_to_id[n] for n in r]) for r in
+                    random_regimens(get_drug_names(), 500, min_size=size, max_size=size, seed=size)]
+
+        def via_set():
+            return [np.array([[(min(x, y), max(x, y)) in edge_set for y in ids.tolist()]
+                              for x in ids.tolist()]) for ids in regimens]
+
+        sub_set, t_set = timed(via_set)
+        sub_bits, t_bits = timed(lambda: [packed.submatrix(ids) for ids in regimens])
+        counts, t_counts = timed(lambda: [packed.counts_within(ids) for ids in regimens])
+        assert all(np.array_equal(x, y) for x, y in zip(sub_set, sub_bits))
+        assert all(np.array_equal(m.sum(axis=1), c) for m, c in zip(sub_bits, counts))
+        print(f"  {size:>3} drugs: set {fmt_seconds(t_set / len(regimens))}   "
+              f"packed submatrix {fmt_seconds(t_bits / len(regimens))}   "
+              f"popcount counts {fmt_seconds(t_counts / len(regimens))}")
+
+    degrees, t_deg = timed(packed.degrees)
+    assert np.array_equal(degrees, np.diff(adjacency.indptr))
+    print(f"\npopcount degrees of all {num_nodes:,} drugs: {fmt_seconds(t_deg)}")
+
+
+if __name__ == "__main__":
+    main()
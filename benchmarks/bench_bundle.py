@@ -0,0 +1,63 @@
+"""
+bench_bundle.py
+---------------
+Load cost of the memory-mapped knowledge-graph bundle versus the parquet/CSV
+artifacts, each in a fresh interpreter. RssAnon is private heap each worker
+pays for; RssFile is page cache that every process mapping the bundle shares.
+
+Builds data/knowledge_graph.bundle first if it does not exist.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from _common import ROOT_DIR
+
+CHILD = r"""
+import json, time
+import engines.data_loader as dl
+
+def rss():
+    fields = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("RssAnon", "RssFile")):
+                key, value = line.split(":")
+                fields[key] = int(value.split()[0]) / 1024
+    return fields
+
+before = rss()
+t0 = time.perf_counter()
+dl.get_adjacency(); dl.get_node_degrees(); dl.get_name_to_id(); dl.get_ddi_descriptions()
+elapsed = time.perf_counter() - t0
+after = rss()
+print(json.dumps({"source": dl.get_knowledge_graph().source, "load": elapsed,
+                  "anon": after.get("RssAnon", 0) - before.get("RssAnon", 0),
+                  "file": after.get("RssFile", 0) - before.get("RssFile", 0)}))
+"""
+
+
+def run(mode: str) -> dict:
+    env = dict(os.environ, MEDIGRAPH_LOADER=mode)
+    proc = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT_DIR, env=env,
+                          capture_output=True, text=True, check=True)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    sys.path.insert(0, ROOT_DIR)
+    from engines.kg_bundle import DEFAULT_BUNDLE_PATH, compile_bundle
+    if not os.path.exists(DEFAULT_BUNDLE_PATH):
+        print(f"building {DEFAULT_BUNDLE_PATH} ...")
+        compile_bundle(DEFAULT_BUNDLE_PATH)
+
+    print(f"{'source':12}{'load':>12}{'RssAnon Δ':>14}{'RssFile Δ':>14}")
+    for mode in ("bundle", "artifacts"):
+        r = run(mode)
+        print(f"{r['source']:12}{r['load'] * 1e3:>9.1f} ms{r['anon']:>11.1f} MB{r['file']:>11.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
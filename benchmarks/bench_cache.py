@@ -0,0 +1,69 @@
+"""
+bench_cache.py
+--------------
+check_interactions() with the regimen/pair LRU caches disabled vs enabled,
+on a workload of repeated regimens, reordered repeats and one-drug variants.
+Every result is checked against the uncached output.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from _common import random_regimens
+from engines.data_loader import get_drug_names
+from engines.interaction_engine import (
+    cache_stats, check_interactions, clear_cache, configure_cache, warm_index,
+)
+
+
+def make_workload(names, count, pool_size, seed=0):
+    rng = np.random.default_rng(seed)
+    pool = random_regimens(names, pool_size, min_size=3, max_size=15, seed=seed)
+    workload = []
+    for _ in range(count):
+        regimen = list(pool[rng.integers(len(pool))])
+        kind = rng.integers(3)
+        if kind == 1:                                   # same drugs, different order
+            rng.shuffle(regimen)
+        elif kind == 2:                                 # swap one drug
+            regimen[rng.integers(len(regimen))] = names[rng.integers(len(names))]
+        workload.append(regimen)
+    return workload
+
+
+def run(workload):
+    start = time.perf_counter()
+    results = [check_interactions(drugs) for drugs in workload]
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--pool", type=int, default=2_000)
+    args = parser.parse_args()
+
+    workload = make_workload(get_drug_names(), args.requests, args.pool)
+    warm_index()
+    print(f"requests: {len(workload):,} drawn from {args.pool:,} regimens")
+
+    default = cache_stats()
+    configure_cache(regimens=0, pairs=0)
+    expected, base = run(workload)
+    print(f"  uncached : {len(workload) / base:>9,.0f} checks/s")
+
+    configure_cache(regimens=default["regimens"]["maxsize"], pairs=default["pairs"]["maxsize"])
+    clear_cache()
+    got, elapsed = run(workload)
+    assert got == expected
+    print(f"  cached   : {len(workload) / elapsed:>9,.0f} checks/s   x{base / elapsed:.1f}")
+    for name, stats in cache_stats().items():
+        total = stats["hits"] + stats["misses"]
+        print(f"    {name:9}: {stats['size']:,}/{stats['maxsize']:,} entries, "
+              f"hit rate {stats['hits'] / max(total, 1):.1%}, {stats['evictions']:,} evictions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+bench_cold_start.py
+-------------------
+Latency of the first requests after a restart. Each trial runs in a fresh
+interpreter: `--concurrency` threads each send one first request (name
+search + check_interactions) at the same moment, optionally after the
+background warm-up has been running for `--delay` seconds. Reports p50/p99/
+max over all requests of all trials, and how many times each index builder
+ran per process (1 = single-flight).
+
+    python benchmarks/bench_cold_start.py --loader artifacts
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from _common import ROOT_DIR
+
+CHILD = r"""
+import json, sys, threading, time
+from collections import Counter
+
+import engines.data_loader as dl
+from engines.adjacency import CSRAdjacency
+from engines.descriptions import DescriptionIndex
+from engines.name_index import NameIndex
+
+# Count index builds
+builds = Counter()
+def counted(name, fn):
+    def wrapper(*args, **kwargs):
+        builds[name] += 1
+        return fn(*args, **kwargs)
+    return wrapper
+CSRAdjacency.from_edge_index = classmethod(counted("adjacency", CSRAdjacency.from_edge_index.__func__))
+DescriptionIndex.empty = classmethod(counted("descriptions", DescriptionIndex.empty.__func__))
+NameIndex.__init__ = counted("name_index", NameIndex.__init__)
+dl._open_fresh_bundle = counted("bundle_open", dl._open_fresh_bundle)
+dl.KnowledgeGraph._load_name_maps = counted("name_maps", dl.KnowledgeGraph._load_name_maps)
+
+from engines import interaction_engine
+concurrency, delay, warmup = int(sys.argv[1]), float(sys.argv[2]), sys.argv[3] == "1"
+
+start = time.perf_counter()
+if warmup:
+    interaction_engine.start_warmup()
+time.sleep(delay)
+
+names = ["Warfarin", "Ibuprofen", "Metformin", "Lisinopril", "Aspirin"]
+barrier = threading.Barrier(concurrency)
+latencies = [None] * concurrency
+
+def first_request(i):
+    barrier.wait()
+    t0 = time.perf_counter()
+    dl.get_name_index().search(names[i % len(names)][:4], 10)
+    interaction_engine.check_interactions(names)
+    latencies[i] = time.perf_counter() - t0
+
+threads = [threading.Thread(target=first_request, args=(i,)) for i in range(concurrency)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+print(json.dumps({"latencies": latencies, "builds": dict(builds),
+                  "total": time.perf_counter() - start}))
+"""
+
+
+def trial(loader: str, concurrency: int, delay: float, warmup: bool) -> dict:
+    env = dict(os.environ, MEDIGRAPH_LOADER=loader)
+    proc = subprocess.run([sys.executable, "-c", CHILD, str(concurrency), str(delay),
+                           "1" if warmup else "0"],
+                          cwd=ROOT_DIR, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--loader", default="auto", help="MEDIGRAPH_LOADER for the child processes")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--trials", type=int, default=5)
+    parser.add_argument("--delay", type=float, default=1.0,
+                        help="seconds between process start and the first requests")
+    args = parser.parse_args()
+
+    print(f"loader={args.loader}, {args.concurrency} concurrent first requests, "
+          f"{args.trials} fresh processes per row")
+    for label, delay, warmup in (("requests at start, no warm-up", 0.0, False),
+                                 ("requests at start, warm-up", 0.0, True),
+                                 (f"requests after {args.delay:g} s, warm-up", args.delay, True)):
+        runs = [trial(args.loader, args.concurrency, delay, warmup) for _ in range(args.trials)]
+        latencies = np.concatenate([run["latencies"] for run in runs]) * 1e3
+        p50, p99 = np.percentile(latencies, [50, 99])
+        builds = {name: max(run["builds"].get(name, 0) for run in runs)
+                  for name in sorted({n for run in runs for n in run["builds"]})}
+        print(f"  {label:32} p50 {p50:8.1f} ms   p99 {p99:8.1f} ms   max {latencies.max():8.1f} ms")
+        print(f"  {'':32} builds per process: {builds}")
+
+
+if __name__ == "__main__":
+    main()
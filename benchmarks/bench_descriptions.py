@@ -0,0 +1,113 @@
+"""
+bench_descriptions.py
+---------------------
+Build time and resident memory of the name maps and the description store:
+the old iterrows()/dict builders versus the vectorized name maps in
+data_loader and the template-compressed descriptions.DescriptionIndex.
+Results are checked for equality on interaction edges.
+
+Needs dataset/ogbl_ddi/mapping/ddi_description.csv.gz (downloaded by OGB);
+pass --desc PATH to use another copy and --rows N to time a prefix.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from _common import ROOT_DIR, fmt_seconds, load_raw_edge_index
+from engines.adjacency import CSRAdjacency
+from engines.data_loader import _names_from_frames
+from engines.descriptions import DescriptionIndex
+
+MAPPING_DIR = os.path.join(ROOT_DIR, "dataset", "ogbl_ddi", "mapping")
+
+
+def legacy_names(node2drug, desc):
+    id2name = {}
+    for _, row in desc[["first drug id", "first drug name"]].drop_duplicates().iterrows():
+        id2name[row["first drug id"]] = row["first drug name"]
+    for _, row in desc[["second drug id", "second drug name"]].drop_duplicates().iterrows():
+        id2name[row["second drug id"]] = row["second drug name"]
+    names, idx_to_db = [], {}
+    for _, row in node2drug.sort_values("node_idx").iterrows():
+        names.append(id2name.get(row["drug_id"], row["drug_id"]))
+        idx_to_db[int(row["node_idx"])] = row["drug_id"]
+    seen, unique_names = set(), []
+    for name in names:
+        unique_names.append(f"{name} ({idx_to_db[len(unique_names)]})" if name in seen else name)
+        seen.add(name)
+    return unique_names, idx_to_db
+
+
+def legacy_descriptions(desc):
+    ddi_desc = {}
+    for _, row in desc.iterrows():
+        a, b, d = row["first drug id"], row["second drug id"], row["description"]
+        ddi_desc[(min(a, b), max(a, b))] = str(d)
+    return ddi_desc
+
+
+def measure(build):
+    start = time.perf_counter()
+    result = build()
+    return result, time.perf_counter() - start
+
+
+def dict_resident_bytes(ddi_desc: dict) -> int:
+    """Dict table + key tuples + their id strings + description strings (shared objects once)."""
+    seen, total = set(), sys.getsizeof(ddi_desc)
+    for key, value in ddi_desc.items():
+        for obj in (key, key[0], key[1], value):
+            if id(obj) not in seen:
+                seen.add(id(obj))
+                total += sys.getsizeof(obj)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--desc", default=os.path.join(MAPPING_DIR, "ddi_description.csv.gz"))
+    parser.add_argument("--rows", type=int, default=None)
+    args = parser.parse_args()
+    if not os.path.exists(args.desc):
+        raise SystemExit(f"{args.desc} not found; it ships with the OGB ogbl-ddi download.")
+
+    node2drug = pd.read_csv(os.path.join(MAPPING_DIR, "nodeidx2drugid.csv.gz"))
+    node2drug.columns = ["node_idx", "drug_id"]
+    desc = pd.read_csv(args.desc, nrows=args.rows)
+    db_to_idx = dict(zip(node2drug["drug_id"], node2drug["node_idx"]))
+    num_nodes = len(node2drug)
+    adjacency = CSRAdjacency.from_edge_index(load_raw_edge_index(), num_nodes)
+
+    (old_names, _), old_names_t = measure(lambda: legacy_names(node2drug, desc))
+    (new_names, _), new_names_t = measure(lambda: _names_from_frames(node2drug, desc))
+    assert old_names == new_names
+
+    old_desc, old_desc_t = measure(lambda: legacy_descriptions(desc))
+    new_desc, new_desc_t = measure(
+        lambda: DescriptionIndex.from_frame(desc, db_to_idx, adjacency))
+    old_desc_mem, new_desc_mem = dict_resident_bytes(old_desc), new_desc.nbytes
+
+    rng = np.random.default_rng(0)
+    db_ids = node2drug.sort_values("node_idx")["drug_id"].tolist()
+    for slot in rng.integers(0, len(adjacency.indices), size=5_000).tolist():
+        a = int(np.searchsorted(adjacency.indptr, slot, side="right")) - 1
+        b = int(adjacency.indices[slot])
+        key = (min(db_ids[a], db_ids[b]), max(db_ids[a], db_ids[b]))
+        assert old_desc.get(key) == new_desc.render(slot, new_names[a], new_names[b])
+
+    mb = 1024 * 1024
+    print(f"description rows        : {len(desc):,}  ({len(new_desc) // 2:,} described edges, "
+          f"{len(new_desc.templates):,} templates)")
+    print(f"{'':24}{'iterrows/dict':>16}{'templates':>16}")
+    print(f"{'name maps build':24}{fmt_seconds(old_names_t):>16}{fmt_seconds(new_names_t):>16}")
+    print(f"{'descriptions build':24}{fmt_seconds(old_desc_t):>16}{fmt_seconds(new_desc_t):>16}")
+    print(f"{'descriptions resident':24}{old_desc_mem / mb:>13.1f} MB{new_desc_mem / mb:>13.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+bench_graph.py
+--------------
+Render time and page size of the interaction graph: build_graph() (NetworkX
++ Pyvis, full page per call) vs render_graph() (static template + compact
+JSON payload) on first render and on a repeat of the same (drugs, conflicts).
+Checks that both pages carry the same nodes, edges, colors and tooltips.
+"""
+
+import argparse
+import json
+import re
+import time
+
+import numpy as np
+
+from _common import fmt_seconds, random_regimens
+from engines import graph_engine
+from engines.data_loader import get_drug_names
+from engines.graph_engine import build_graph, graph_payload, render_graph
+from engines.interaction_engine import check_interactions
+
+
+def pyvis_graph(html: str):
+    """Nodes and edges as Pyvis wrote them into its page."""
+    nodes = json.loads(re.search(r"nodes = new vis\.DataSet\((\[.*?\])\);", html, re.S).group(1))
+    edges = json.loads(re.search(r"edges = new vis\.DataSet\((\[.*?\])\);", html, re.S).group(1))
+    return ({n["id"]: (n["color"], n["title"]) for n in nodes},
+            sorted((e["from"], e["to"], e["color"], e["title"]) for e in edges))
+
+
+def compact_graph(drugs, conflicts):
+    """The same view rebuilt from graph_payload(), as the template's script does."""
+    data = graph_payload(drugs, conflicts)
+    nodes = {}
+    for name, flag in zip(data["drugs"], data["conflict"]):
+        nodes[name] = (data["node_colors"][flag],
+                       f"{name}\n{'⚠ Has interactions' if flag else '✓ No detected interactions'}")
+    edges = []
+    for i, j, level, text in data["edges"]:
+        text = data["texts"][text].replace("\x01", data["drugs"][i]).replace("\x02", data["drugs"][j])
+        edges.append((data["drugs"][i], data["drugs"][j], data["colors"].get(data["levels"][level], "#FF9800"),
+                      f"Severity: {data['levels'][level]}\n{text}"))
+    edges.sort()
+    return nodes, edges
+
+
+def mean_time(fn, cases):
+    start = time.perf_counter()
+    pages = [fn(drugs, conflicts) for drugs, conflicts in cases]
+    return (time.perf_counter() - start) / len(cases), pages
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--regimens", type=int, default=200)
+    args = parser.parse_args()
+
+    names = get_drug_names()
+    print(f"{'drugs':>6} {'edges':>6}   {'pyvis':>11} {'size':>9}   {'compact':>11} {'size':>9}"
+          f"   {'memoized':>11}")
+    for size in (5, 15, 50):
+        regimens = random_regimens(names, args.regimens, size, size, seed=size)
+        cases = [(drugs, check_interactions(drugs)) for drugs in regimens]
+
+        for drugs, conflicts in cases[:20]:
+            assert pyvis_graph(build_graph(drugs, conflicts)) == compact_graph(drugs, conflicts)
+
+        graph_engine._render_cache.clear()
+        pyvis, pyvis_pages = mean_time(build_graph, cases)
+        compact, compact_pages = mean_time(render_graph, cases)
+        memoized, _ = mean_time(render_graph, cases)
+        edges = np.mean([len(conflicts) for _, conflicts in cases])
+        pyvis_kb = np.mean([len(p.encode()) for p in pyvis_pages]) / 1024
+        compact_kb = np.mean([len(p.encode()) for p in compact_pages]) / 1024
+        print(f"{size:6d} {edges:6.0f}   {fmt_seconds(pyvis)} {pyvis_kb:6.1f} KB   "
+              f"{fmt_seconds(compact)} {compact_kb:6.1f} KB   {fmt_seconds(memoized)}")
+    print("pyvis and compact pages show identical nodes, edges, colors and tooltips")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+bench_name_search.py
+--------------------
+Latency of NameIndex.search() for prefix, typo and DrugBank-ID queries, and
+how often a name with one random edit (insert, delete or substitute) comes
+back as the top match.
+"""
+
+import argparse
+import random
+import string
+import time
+
+import numpy as np
+
+from _common import fmt_seconds
+from engines.data_loader import get_drug_names, get_idx_to_db, get_name_index
+
+
+def one_edit(name: str, rng: random.Random) -> str:
+    chars = list(name)
+    i = rng.randrange(len(chars))
+    op = rng.randrange(3)
+    if op == 0:
+        chars.insert(i, rng.choice(string.ascii_lowercase))
+    elif op == 1 and len(chars) > 1:
+        del chars[i]
+    else:
+        chars[i] = rng.choice(string.ascii_lowercase)
+    return "".join(chars)
+
+
+def latencies(index, queries, k):
+    out = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, k)
+        out.append(time.perf_counter() - start)
+    return np.array(out)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = get_name_index()
+    print(f"index build: {fmt_seconds(time.perf_counter() - start)} ({len(index):,} keys)")
+
+    rng = random.Random(0)
+    names = rng.sample(get_drug_names(), args.queries)
+    typos = [one_edit(name, rng) for name in names]
+    idx_to_db = get_idx_to_db()
+    db_ids = [idx_to_db[i] for i in rng.sample(sorted(idx_to_db), args.queries)]
+    workloads = {
+        "prefix (3 chars)": [name[:3] for name in names],
+        "one-edit typo":    typos,
+        "DrugBank ID":      db_ids,
+    }
+    for label, queries in workloads.items():
+        p50, p99 = np.percentile(latencies(index, queries, args.k), [50, 99])
+        print(f"  {label:17} p50 {fmt_seconds(p50)}   p99 {fmt_seconds(p99)}")
+
+    top1 = sum(index.search(q, 1)[0]["name"] == name for q, name in zip(typos, names))
+    print(f"one-edit typos resolved to the intended drug at rank 1: {top1 / len(names):.1%}")
+
+
+if __name__ == "__main__":
+    main()
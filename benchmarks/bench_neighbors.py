@@ -0,0 +1,122 @@
+"""
+bench_neighbors.py
+------------------
+Shared-partner (two-hop) scores for every pair of a regimen, per regimen
+size: a per-pair Python reference over CSR neighbour arrays, a SciPy sparse
+submatrix product (when SciPy is installed), NeighborIndex.scores() (dense
+row products from the bit matrix) and the same with the memory-mapped
+common-neighbour cache. Every variant is checked against the reference.
+Also reports building and opening the uint16 cache, and
+check_shared_partners() end to end.
+
+    python benchmarks/bench_neighbors.py --sizes 5 15 50
+"""
+
+import argparse
+import math
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from _common import fmt_seconds, random_regimens
+from engines.data_loader import get_adjacency, get_drug_names, get_name_to_id, get_packed_adjacency
+from engines.neighbor_engine import NeighborIndex, check_shared_partners, get_neighbor_index
+
+try:
+    import scipy.sparse
+except ImportError:
+    scipy = None
+
+
+def reference_scores(adjacency, ids):
+    """Common-neighbour counts and Adamic-Adar, pair by pair from neighbour sets."""
+    k = len(ids)
+    partners = [set(adjacency.neighbors(i).tolist()) for i in ids]
+    degree = np.diff(adjacency.indptr)
+    common = np.zeros((k, k), dtype=np.int32)
+    adamic_adar = np.zeros((k, k), dtype=np.float64)
+    for i in range(k):
+        for j in range(i + 1, k):
+            shared = partners[i] & partners[j]
+            common[i, j] = common[j, i] = len(shared)
+            adamic_adar[i, j] = adamic_adar[j, i] = sum(1 / math.log(degree[w]) for w in shared)
+    return common, adamic_adar
+
+
+def per_call(fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) / len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 15, 50])
+    parser.add_argument("--regimens", type=int, default=200)
+    args = parser.parse_args()
+
+    adjacency, packed = get_adjacency(), get_packed_adjacency()
+    names, name_to_id = get_drug_names(), get_name_to_id()
+    index = NeighborIndex(packed, cache_dir=None)
+
+    cache_dir = tempfile.mkdtemp()
+    start = time.perf_counter()
+    cached = NeighborIndex(packed, cache_dir)
+    cached.common_matrix()
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    reopened = NeighborIndex(packed, cache_dir)
+    reopened.common_matrix()
+    reopen = time.perf_counter() - start
+    size_mb = sum(os.path.getsize(os.path.join(cache_dir, f)) for f in os.listdir(cache_dir)) / 2**20
+    print(f"uint16 common-neighbour cache: built in {fmt_seconds(build).strip()}, "
+          f"{size_mb:.1f} MB, reopened (mmap) in {fmt_seconds(reopen).strip()}")
+
+    if scipy is not None:
+        matrix = scipy.sparse.csr_matrix(
+            (np.ones(len(adjacency.indices), dtype=np.float32), adjacency.indices, adjacency.indptr),
+            shape=(adjacency.num_nodes, adjacency.num_nodes))
+        weights = scipy.sparse.diags(index.weights)
+
+        def sparse_scores(ids):
+            rows = matrix[ids]
+            return rows @ rows.T, rows @ weights @ rows.T
+
+    get_neighbor_index()        # thresholds and index outside the timings
+    check_shared_partners(names[:2])
+    header = f"{'drugs':>6} {'python sets':>13} {'scipy sparse':>13} {'row product':>13} {'+ cn cache':>13} {'check_shared':>13}"
+    print(header)
+    for size in args.sizes:
+        regimens = random_regimens(names, args.regimens, size, size, seed=size)
+        id_lists = [np.array([name_to_id[n] for n in r], dtype=np.int64) for r in regimens]
+
+        for ids in id_lists[:10]:
+            want_common, want_aa = reference_scores(adjacency, ids)
+            for variant in (index, cached):
+                common, adamic_adar = variant.scores(ids)
+                assert np.array_equal(common, want_common)
+                assert np.allclose(adamic_adar, want_aa, rtol=1e-5)
+            if scipy is not None:
+                common, adamic_adar = sparse_scores(ids)
+                common, adamic_adar = common.toarray(), adamic_adar.toarray()
+                np.fill_diagonal(common, 0)
+                np.fill_diagonal(adamic_adar, 0)
+                assert np.array_equal(common, want_common)
+                assert np.allclose(adamic_adar, want_aa, rtol=1e-5)
+
+        reference = per_call(lambda ids: reference_scores(adjacency, ids), id_lists[:20])
+        sparse = per_call(sparse_scores, id_lists) if scipy is not None else float("nan")
+        dense = per_call(index.scores, id_lists)
+        with_cache = per_call(cached.scores, id_lists)
+        end_to_end = per_call(check_shared_partners, regimens)
+        sparse_text = fmt_seconds(sparse) if scipy is not None else f"{'n/a':>11}"
+        print(f"{size:6d} {fmt_seconds(reference):>13} {sparse_text:>13} {fmt_seconds(dense):>13} "
+              f"{fmt_seconds(with_cache):>13} {fmt_seconds(end_to_end):>13}")
+    print("all variants match the per-pair reference")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+bench_node_degrees.py
+---------------------
+Per-check cost of node degree lookups: the old dict recount that ran on every
+check_interactions() call versus the cached int32 bincount array.
+"""
+
+import numpy as np
+
+from _common import fmt_seconds, load_raw_edge_index, timeit
+
+
+def legacy_node_degrees(edge_index) -> dict:
+    degrees: dict = {}
+    for node_id in edge_index[0].tolist() + edge_index[1].tolist():
+        degrees[node_id] = degrees.get(node_id, 0) + 1
+    return degrees
+
+
+def main():
+    edge_index = load_raw_edge_index()
+    num_nodes = int(edge_index.max()) + 1
+    pairs = [(0, 4), (225, 4039), (1, 2), (3000, 4266)]
+
+    legacy = legacy_node_degrees(edge_index)
+    cached = np.bincount(edge_index.ravel(), minlength=num_nodes).astype(np.int32)
+    assert all(legacy.get(n, 0) == cached[n] for n in range(num_nodes))
+
+    def legacy_check():
+        degrees = legacy_node_degrees(edge_index)
+        return [(degrees.get(a, 0), degrees.get(b, 0)) for a, b in pairs]
+
+    def cached_check():
+        return [(cached[a], cached[b]) for a, b in pairs]
+
+    build = timeit(lambda: np.bincount(edge_index.ravel(), minlength=num_nodes), repeat=3)
+    before = timeit(legacy_check, repeat=3)
+    after = timeit(cached_check, repeat=5, number=1000)
+
+    print(f"edge endpoints          : {edge_index.size:,}")
+    print(f"one-off bincount build  : {fmt_seconds(build)}")
+    print(f"per check, dict recount : {fmt_seconds(before)}")
+    print(f"per check, cached array : {fmt_seconds(after)}")
+    print(f"speed-up                : {before / after:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
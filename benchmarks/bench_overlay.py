@@ -0,0 +1,172 @@
+"""
+bench_overlay.py
+----------------
+Local interaction overlay (engines/overlay.py) over the base graph: a random
+overlay of added, removed and re-graded pairs is applied to the current
+base snapshot and compared with rebuilding the CSR and severities from the
+merged edge list, and with the bundle `kg_bundle compact` writes.
+
+Checks that the overlaid graph, the compacted bundle and a CSR rebuilt from
+the expected edge set hold the same edges, and that the overlaid and
+compacted graphs return the same conflicts (severity and description) for
+every regimen. Reports apply and compaction time and the lookup cost the
+overlay adds to batch screening and find_many().
+
+    python benchmarks/bench_overlay.py --adds 2000 --removes 1000 --overrides 1000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from _common import fmt_seconds, random_regimens, timeit
+import engines.data_loader as dl
+from engines.adjacency import CSRAdjacency
+from engines.interaction_engine import _screen_regimens, conflicts_from_batch
+from engines.kg_bundle import compact_bundle, open_bundle
+from engines.overlay import InteractionOverlay
+from engines.severity import SEVERITY_LEVELS
+
+
+def random_overlay(base, adds: int, removes: int, overrides: int, seed: int = 0):
+    """
+    Overlay frame, the expected lo * n + hi edge keys afterwards, the
+    explicitly set severities by key, and the keys of every pair it touches.
+    """
+    rng = np.random.default_rng(seed)
+    adjacency, names, idx_to_db = base.adjacency(), base.drug_names(), base.idx_to_db()
+    n = adjacency.num_nodes
+    rows = np.repeat(np.arange(n, dtype=np.int64), np.diff(adjacency.indptr))
+    upper = rows < adjacency.indices
+    base_keys = rows[upper] * n + adjacency.indices[upper]
+
+    picked = rng.choice(len(base_keys), size=removes + overrides, replace=False)
+    removed, regraded = base_keys[picked[:removes]], base_keys[picked[removes:]]
+    candidates = np.unique(np.sort(rng.integers(0, n, size=(adds * 3, 2)), axis=1) @ [n, 1])
+    candidates = candidates[(candidates // n != candidates % n)
+                            & ~np.isin(candidates, base_keys)]
+    added = rng.permutation(candidates)[:adds]
+
+    def drug(node_id):
+        # Mix names, DrugBank IDs and casing, as a hand-kept file would
+        choice = rng.random()
+        if choice < 0.2:
+            return idx_to_db[node_id]
+        return names[node_id].upper() if choice < 0.3 else names[node_id]
+
+    table, severities = [], {}
+    for key in added.tolist():
+        a, b = divmod(key, n)
+        level = SEVERITY_LEVELS[rng.integers(4)] if rng.random() < 0.7 else ""
+        text = f"{names[b]} may increase the toxicity of {names[a]}." if rng.random() < 0.5 else ""
+        table.append(("add", drug(a), drug(b), level, text))
+        if level:
+            severities[key] = level
+    for key in removed.tolist():
+        a, b = divmod(key, n)
+        table.append(("remove", drug(b), drug(a), "", ""))
+    for key in regraded.tolist():
+        a, b = divmod(key, n)
+        level = SEVERITY_LEVELS[rng.integers(4)]
+        table.append(("severity", drug(a), drug(b), level, ""))
+        severities[key] = level
+    order = rng.permutation(len(table))
+    frame = pd.DataFrame([table[i] for i in order],
+                         columns=["action", "drug1", "drug2", "severity", "description"])
+    expected = np.union1d(np.setdiff1d(base_keys, removed), added)
+    return frame, expected, severities, np.concatenate([added, removed, regraded])
+
+
+def screen(graph, regimens):
+    return conflicts_from_batch(_screen_regimens(regimens, graph), len(regimens), graph=graph)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--adds", type=int, default=2000)
+    parser.add_argument("--removes", type=int, default=1000)
+    parser.add_argument("--overrides", type=int, default=1000)
+    parser.add_argument("--regimens", type=int, default=2000)
+    args = parser.parse_args()
+
+    base = dl.KnowledgeGraph.open(1, overlay_path=None).warm()
+    names, n = base.drug_names(), base.num_drugs()
+    frame, expected, severities, touched = random_overlay(base, args.adds, args.removes,
+                                                          args.overrides)
+    workdir = tempfile.mkdtemp()
+    overlay_path = os.path.join(workdir, "interaction_overlay.csv")
+    frame.to_csv(overlay_path, index=False)
+    print(f"base: {base.source}, {base.adjacency().num_edges:,} edges; overlay: "
+          f"{args.adds:,} adds, {args.removes:,} removes, {args.overrides:,} overrides")
+
+    # Apply the overlay to a warm base vs rebuild the CSR + severities from the merged edges
+    start = time.perf_counter()
+    overlay = InteractionOverlay.from_file(overlay_path)
+    overlaid = base.with_overlay(2, overlay).warm()
+    apply_time = time.perf_counter() - start
+    edge_index = np.stack(np.divmod(expected, n))
+    start = time.perf_counter()
+    rebuilt = CSRAdjacency.from_edge_index(edge_index, n)
+    base.severity_rule().classify(rebuilt, base.degrees())
+    rebuild_time = time.perf_counter() - start
+
+    # Same edges as the expected set, and the explicit severities as written
+    csr = overlaid.csr()
+    assert np.array_equal(csr.indptr, rebuilt.indptr) and np.array_equal(csr.indices, rebuilt.indices)
+    keys = np.fromiter(severities, dtype=np.int64)
+    lo, hi = np.divmod(keys, n)
+    got = overlaid.edge_severity()[overlaid.adjacency().find_many(hi, lo)]
+    assert [SEVERITY_LEVELS[code] for code in got.tolist()] == list(severities.values())
+    print(f"overlay stats: {overlaid.overlay_stats()}")
+
+    # Offline compaction into a new bundle, then the same answers from it
+    compacted = compact_time = None
+    if base.source == "bundle":
+        bundle_path = os.path.join(workdir, "compacted.bundle")
+        start = time.perf_counter()
+        compact_bundle(bundle_path, dl._BUNDLE_PATH, overlay_path)
+        compact_time = time.perf_counter() - start
+        compacted = dl.KnowledgeGraph(3, "bundle", open_bundle(bundle_path)).warm()
+        assert np.array_equal(compacted.adjacency().indices, rebuilt.indices)
+        # Re-applying the overlay to the compacted base changes nothing
+        again = compacted.with_overlay(4, overlay).warm()
+        assert np.array_equal(again.csr().indices, rebuilt.indices)
+        assert again.overlay_stats()["added"] == again.overlay_stats()["removed"] == 0
+
+    # Regimens around the overlay's drugs, so most of them touch changed pairs
+    rng = np.random.default_rng(1)
+    touched = np.unique(np.concatenate(np.divmod(touched, n)))
+    regimens = [list(dict.fromkeys(r + [names[i] for i in rng.choice(touched, 4)]))
+                for r in random_regimens(names, args.regimens, 3, 12)]
+    result = screen(overlaid, regimens)
+    if compacted is not None:
+        assert result == screen(compacted, regimens)
+        assert result == screen(again, regimens)
+    changed = sum(a != b for a, b in zip(result, screen(base, regimens)))
+    print(f"{changed:,} of {len(regimens):,} regimens differ from the base; overlay"
+          + (", compacted and re-applied agree" if compacted is not None else " checked"))
+
+    print()
+    print(f"  {'apply overlay to a warm base':34} {fmt_seconds(apply_time)}")
+    print(f"  {'rebuild CSR + severities':34} {fmt_seconds(rebuild_time)}")
+    if compact_time is not None:
+        print(f"  {'compact into a new bundle':34} {fmt_seconds(compact_time)}")
+    print()
+    pairs = rng.integers(0, n, size=(2, 1_000_000))
+    graphs = [("base", base), ("base + overlay", overlaid)]
+    if compacted is not None:
+        graphs.append(("compacted", compacted))
+    print(f"  {'':16} {'find_many (1M pairs)':>21} {'screen ' + str(len(regimens)) + ' regimens':>22}")
+    for label, graph in graphs:
+        adjacency = graph.adjacency()
+        find = timeit(lambda: adjacency.find_many(pairs[0], pairs[1]), repeat=3)
+        batch = timeit(lambda: _screen_regimens(regimens, graph), repeat=3)
+        print(f"  {label:16} {fmt_seconds(find):>21} {fmt_seconds(batch):>22}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+bench_parallel.py
+-----------------
+Scaling of check_interactions_batch() across 1/2/4/8 worker processes.
+Results are checked against the single-process output. Speed-up is bounded
+by the number of cores available (printed first).
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from _common import random_regimens
+from engines.data_loader import get_drug_names
+from engines.interaction_engine import check_interactions_batch
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--regimens", type=int, default=400_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    regimens = random_regimens(get_drug_names(), args.regimens)
+    reference = check_interactions_batch(regimens)          # also warms the index
+
+    print(f"cores available : {os.cpu_count()}")
+    print(f"regimens        : {len(regimens):,}")
+    baseline = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        result = check_interactions_batch(regimens, workers=workers)
+        elapsed = time.perf_counter() - start
+        assert all(np.array_equal(result[col], reference[col]) for col in reference)
+        baseline = baseline or elapsed
+        print(f"  {workers} worker(s): {len(regimens) / elapsed:>10,.0f} regimens/s"
+              f"   x{baseline / elapsed:.2f}")
+
+
+if __name__ == "__main__":
+    main()
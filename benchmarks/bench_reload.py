@@ -0,0 +1,124 @@
+"""
+bench_reload.py
+---------------
+Live swap of the knowledge graph with data_loader.reload(), per source, each
+in a fresh interpreter: time to build and swap in the new snapshot while a
+thread keeps calling check_interactions(), peak RSS during the swap (sampled
+every millisecond) and RSS once the old snapshot is gone. Also checks that a
+caller holding the old snapshot keeps it alive and consistent, that it is
+freed once dropped, and that every check during the swap returned the same
+conflicts as before it.
+
+glibc keeps freed heap pages mapped for reuse, so RSS does not fall right
+after a swap. "after 3" (two more reloads) shows the next snapshots reuse
+that memory rather than adding one snapshot each, and "trimmed" is RSS once
+malloc_trim(0) hands the free pages back.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from _common import ROOT_DIR
+
+CHILD = r"""
+import gc, json, sys, threading, time, weakref
+sys.path.insert(0, "benchmarks")
+from _common import random_regimens
+import engines.data_loader as dl
+from engines.interaction_engine import RegimenSession, cache_stats, check_interactions
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS"):
+                return int(line.split()[1]) / 1024
+
+t0 = time.perf_counter()
+old = dl.get_knowledge_graph().warm()
+first_load = time.perf_counter() - t0
+regimens = random_regimens(old.drug_names(), 300, 3, 15)
+expected = [check_interactions(r) for r in regimens]
+session = RegimenSession().sync(regimens[0])
+gc.collect()
+rss_before = rss_mb()
+
+# Traffic during the swap: every result must match the pre-swap one
+stop, mismatches, calls = threading.Event(), [0], [0]
+def traffic():
+    while not stop.is_set():
+        for regimen, want in zip(regimens, expected):
+            mismatches[0] += check_interactions(regimen) != want
+            calls[0] += 1
+peak = [rss_before]
+def sample():
+    while not stop.is_set():
+        peak[0] = max(peak[0], rss_mb())
+        time.sleep(0.001)
+threads = [threading.Thread(target=traffic), threading.Thread(target=sample)]
+for t in threads:
+    t.start()
+
+held = dl.get_knowledge_graph()          # an "in-flight" caller's snapshot
+t0 = time.perf_counter()
+new = dl.reload()
+reload_time = time.perf_counter() - t0
+time.sleep(0.05)
+stop.set()
+for t in threads:
+    t.join()
+
+assert new is dl.get_knowledge_graph() and new.version == old.version + 1
+assert held is old and held.adjacency().num_edges == new.adjacency().num_edges
+assert cache_stats()["pairs"]["size"] < 65536
+session.sync(regimens[0])
+assert session.conflicts == expected[0]
+
+alive = weakref.ref(old)
+del old, held
+gc.collect()
+rss_after = rss_mb()
+released = alive() is None
+
+del new
+for _ in range(2):
+    dl.reload()
+gc.collect()
+rss_steady = rss_mb()
+import ctypes
+ctypes.CDLL("libc.so.6").malloc_trim(0)
+print(json.dumps({
+    "source": dl.get_knowledge_graph().source, "first_load": first_load, "reload": reload_time,
+    "rss_before": rss_before, "rss_peak": peak[0], "rss_after": rss_after,
+    "rss_steady": rss_steady, "rss_trimmed": rss_mb(),
+    "old_released": released, "calls": calls[0], "mismatches": mismatches[0],
+}))
+"""
+
+
+def run(mode: str) -> dict:
+    env = dict(os.environ, MEDIGRAPH_LOADER=mode)
+    proc = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT_DIR, env=env,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"source": mode, "error": proc.stderr.strip().splitlines()[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    print(f"{'source':10} {'first load':>11} {'reload':>10}   {'RSS before':>10} {'peak':>9} "
+          f"{'after':>9} {'after 3':>9} {'trimmed':>9}   {'old freed':>9}  checks during swap")
+    for mode in ("bundle", "artifacts"):
+        r = run(mode)
+        if "error" in r:
+            print(f"{mode:10} error: {r['error']}")
+            continue
+        print(f"{r['source']:10} {r['first_load'] * 1e3:8.1f} ms {r['reload'] * 1e3:7.1f} ms   "
+              f"{r['rss_before']:7.1f} MB {r['rss_peak']:6.1f} MB {r['rss_after']:6.1f} MB "
+              f"{r['rss_steady']:6.1f} MB {r['rss_trimmed']:6.1f} MB   "
+              f"{str(r['old_released']):>9}  {r['calls']:,} ({r['mismatches']} mismatched)")
+
+
+if __name__ == "__main__":
+    main()
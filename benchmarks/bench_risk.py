@@ -0,0 +1,47 @@
+"""
+bench_risk.py
+-------------
+Throughput of calculate_risk() called once per regimen vs one
+calculate_risk_batch() call over per-tier counts. Equivalence of the two is
+covered by tests/test_risk_engine.py.
+"""
+
+import argparse
+
+import numpy as np
+
+from _common import timeit
+from engines.data_loader import SEVERITY_LEVELS
+from engines.risk_engine import calculate_risk, calculate_risk_batch
+
+
+def as_lists(counts, ages, genders):
+    """The list-of-dicts / list-of-strings inputs calculate_risk() takes."""
+    conflicts = [{"severity": level} for level, n in zip(SEVERITY_LEVELS, counts) for _ in range(n)]
+    return conflicts, ["age"] * ages, ["gender"] * genders
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--regimens", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    n = args.regimens
+    counts  = rng.poisson(0.6, size=(n, len(SEVERITY_LEVELS)))
+    ages    = rng.poisson(0.3, size=n)
+    genders = rng.poisson(0.2, size=n)
+
+    sample = 100_000
+    inputs = [as_lists(c, a, g) for c, a, g in
+              zip(counts[:sample].tolist(), ages[:sample].tolist(), genders[:sample].tolist())]
+    scalar = timeit(lambda: [calculate_risk(*args) for args in inputs], repeat=3) / sample
+    batched = timeit(lambda: calculate_risk_batch(counts, ages, genders), repeat=3) / n
+    print(f"{n:,} regimens")
+    print(f"  calculate_risk per regimen   {scalar * 1e9:8.1f} ns   {1 / scalar:14,.0f} regimens/s")
+    print(f"  calculate_risk_batch         {batched * 1e9:8.1f} ns   {1 / batched:14,.0f} regimens/s"
+          f"   x{scalar / batched:.0f}")
+
+
+if __name__ == "__main__":
+    main()
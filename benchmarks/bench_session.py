@@ -0,0 +1,85 @@
+"""
+bench_session.py
+----------------
+Cost of one edit (add or remove a drug) with RegimenSession versus re-running
+check_interactions() + validate_patient() + calculate_risk() over the whole
+regimen, at several regimen sizes. The session state is checked against the
+full recomputation after every edit.
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from _common import ROOT_DIR, fmt_seconds
+from engines.data_loader import get_drug_names, get_name_index
+from engines.interaction_engine import (
+    RegimenSession, check_interactions, configure_cache, warm_index,
+)
+from engines.risk_engine import calculate_risk
+from engines.validation_engine import validate_patient
+
+
+def rule_spellings(drugs_db) -> dict:
+    """Graph name -> drugs.json name for rules that reach their drug through an alias."""
+    index, names = get_name_index(), get_drug_names()
+    return {names[index.resolve(rule["name"])]: rule["name"] for rule in drugs_db
+            if index.resolve(rule["name"]) >= 0}
+
+
+def full(drugs, patient, drugs_db):
+    conflicts = check_interactions(drugs)
+    # validate_patient() matches rules by name only; RuleIndex also follows aliases
+    spelled = rule_spellings(drugs_db)
+    age_warnings, gender_warnings = validate_patient(patient, [spelled.get(d, d) for d in drugs],
+                                                     drugs_db)
+    return conflicts, age_warnings, gender_warnings, calculate_risk(conflicts, age_warnings,
+                                                                    gender_warnings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[15, 50, 200])
+    parser.add_argument("--edits", type=int, default=200)
+    args = parser.parse_args()
+
+    with open(os.path.join(ROOT_DIR, "data", "drugs.json")) as f:
+        drugs_db = json.load(f)
+    names = get_drug_names()
+    patient = {"age": 67, "gender": "Female"}
+    warm_index()
+    configure_cache(regimens=0, pairs=0)        # measure the work, not cache hits
+    rng = np.random.default_rng(0)
+
+    print(f"{'drugs':>6}  {'full recompute':>15}  {'session edit':>13}  speed-up")
+    for size in args.sizes:
+        picks = [names[i] for i in rng.choice(len(names), size + args.edits, replace=False)]
+        session = RegimenSession(drugs_db, patient)
+        session.sync(picks[:size])
+        spare = picks[size:]
+
+        full_time = session_time = 0.0
+        for edit in range(args.edits):
+            start = time.perf_counter()
+            if edit % 2 == 0:
+                session.add(spare[edit])
+            else:
+                session.remove(session.drugs[0])
+            state = (session.conflicts, session.age_warnings, session.gender_warnings,
+                     session.risk())
+            session_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            expected = full(session.drugs, patient, drugs_db)
+            full_time += time.perf_counter() - start
+            assert state == expected
+
+        print(f"{size:>6}  {fmt_seconds(full_time / args.edits):>15}  "
+              f"{fmt_seconds(session_time / args.edits):>13}  x{full_time / session_time:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+bench_startup.py
+----------------
+Cold-start cost of the data_loader sources, each measured in a fresh
+interpreter: time to import the engines package, time to load the graph
+index, time to the first completed check_interactions() call, and whether
+torch ended up imported. The eager torch/ogb import that data_loader used to
+do at module level is timed separately for reference.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from _common import ROOT_DIR
+
+CHILD = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import engines.data_loader
+t1 = time.perf_counter()
+from engines.interaction_engine import check_interactions
+result = {"import": t1 - t0, "torch": None, "index": None, "first_check": None, "error": None}
+try:
+    engines.data_loader.get_adjacency()
+    engines.data_loader.get_node_degrees()
+    result["index"] = time.perf_counter() - t1
+    check_interactions(["Warfarin", "Ibuprofen", "Metformin", "Lisinopril"])
+    result["first_check"] = time.perf_counter() - t1
+except Exception as exc:
+    result["error"] = f"{type(exc).__name__}: {exc}"
+result["torch"] = "torch" in sys.modules
+print(json.dumps(result))
+"""
+
+LEGACY_IMPORT = r"""
+import json, time
+t0 = time.perf_counter()
+import torch
+from ogb.linkproppred import LinkPropPredDataset
+print(json.dumps({"import": time.perf_counter() - t0}))
+"""
+
+
+def run(mode: str, code: str = CHILD) -> dict:
+    env = dict(os.environ, MEDIGRAPH_LOADER=mode)
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, env=env,
+                          capture_output=True, text=True)
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode != 0 or not lines:
+        return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr else "failed"}
+    return json.loads(lines[-1])
+
+
+def main():
+    legacy = run("ogb", LEGACY_IMPORT)
+    if legacy.get("import") is not None:
+        print(f"[legacy] eager torch + ogb import : {legacy['import'] * 1e3:9.1f} ms")
+    for mode in ("bundle", "artifacts", "ogb"):
+        r = run(mode)
+        print(f"[{mode}]")
+        if r.get("import") is not None:
+            print(f"  import engines.data_loader : {r['import'] * 1e3:9.1f} ms")
+        if r.get("index") is not None:
+            print(f"  adjacency + degrees ready  : {r['index'] * 1e3:9.1f} ms")
+        if r.get("first_check") is not None:
+            print(f"  time to first check        : {r['first_check'] * 1e3:9.1f} ms")
+        if r.get("torch") is not None:
+            print(f"  torch imported             : {r['torch']}")
+        if r.get("error"):
+            print(f"  error                      : {r['error']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+bench_strategies.py
+-------------------
+Per-pair find(), vectorized pair lookups and neighbour-array intersection in CSRAdjacency.edges_within()
+across regimen sizes, plus "auto" (the strategy check_interactions() uses)
+and check_interactions() end to end with its caches disabled. All strategies
+are checked to return the same edges.
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from _common import fmt_seconds, random_regimens
+from engines.data_loader import get_adjacency, get_drug_names, get_name_to_id
+from engines.interaction_engine import check_interactions, configure_cache, warm_index
+
+STRATEGIES = ("loop", "pairs", "intersect", "auto")
+
+
+def per_call(fn, items):
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) / len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 15, 40, 80, 150, 300])
+    parser.add_argument("--regimens", type=int, default=200)
+    args = parser.parse_args()
+
+    adjacency, names, name_to_id = get_adjacency(), get_drug_names(), get_name_to_id()
+    warm_index()
+    configure_cache(regimens=0, pairs=0)
+
+    print(f"{'drugs':>6}" + "".join(f"{s:>13}" for s in STRATEGIES) + f"{'check_interactions':>21}")
+    for size in args.sizes:
+        regimens = random_regimens(names, args.regimens, min_size=size, max_size=size, seed=size)
+        id_sets = [np.array([name_to_id[n] for n in r]) for r in regimens]
+        for ids in id_sets[:20]:
+            results = [adjacency.edges_within(ids, s) for s in STRATEGIES]
+            assert all(np.array_equal(x, y) for other in results[1:]
+                       for x, y in zip(results[0], other))
+
+        timings = [per_call(lambda ids: adjacency.edges_within(ids, s), id_sets) for s in STRATEGIES]
+        end_to_end = per_call(check_interactions, regimens)
+        print(f"{size:>6}" + "".join(f"{fmt_seconds(t):>13}" for t in timings)
+              + f"{fmt_seconds(end_to_end):>21}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+bench_validation.py
+-------------------
+Patient validation against a formulary-sized rule set: the per-call
+validate_patient() (rebuilds its name lookup every call) vs a cached
+RuleIndex, one regimen at a time and as one validate_batch() call. Every
+result is checked against validate_patient(). Also times get_rule_index()
+on a cache hit and after the rules file changes.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from _common import fmt_seconds, random_regimens, timeit
+from engines.data_loader import get_drug_names
+from engines.validation_engine import RuleIndex, get_rule_index, validate_patient
+
+
+def synthetic_rules(names: list, seed: int = 0) -> list:
+    """One rule per graph drug plus unmatched filler rows, mixed-case restrictions."""
+    rng = np.random.default_rng(seed)
+    names = names + [f"Formulary Drug {i}" for i in range(16_000)]
+    restrictions = ["None", "None", "None", "Male", "Female", "female"]
+    rules = []
+    for i, name in enumerate(names):
+        low = int(rng.integers(0, 30))
+        rules.append({
+            "drug_id":            f"S{i:05d}",
+            "name":               name,
+            "min_age":            low,
+            "max_age":            low + int(rng.integers(30, 100)),
+            "gender_restriction": restrictions[rng.integers(len(restrictions))],
+        })
+    return rules
+
+
+def random_patients(count: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    genders = [None, "Male", "Female", "male", "Other"]
+    return [{"age":    None if rng.random() < 0.1 else int(rng.integers(0, 100)),
+             "gender": genders[rng.integers(len(genders))]}
+            for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--regimens", type=int, default=2_000)
+    args = parser.parse_args()
+
+    names = get_drug_names()
+    drugs_db = synthetic_rules(list(names))
+    regimens = random_regimens(names, args.regimens, 3, 15)
+    # Mix in case variants and names that have no rule
+    regimens = [[d.upper() if i % 4 == 0 else d for i, d in enumerate(r)] + ["Unlisted"]
+                for r in regimens]
+    patients = random_patients(len(regimens))
+
+    start = time.perf_counter()
+    rules = RuleIndex(drugs_db)
+    print(f"RuleIndex build: {fmt_seconds(time.perf_counter() - start)} "
+          f"({len(rules):,} rules, {args.regimens:,} regimens)")
+
+    expected = [validate_patient(p, r, drugs_db) for p, r in zip(patients, regimens)]
+    assert [rules.validate(p, r) for p, r in zip(patients, regimens)] == expected
+    assert rules.validate_batch(patients, regimens) == expected
+    print(f"warnings: {sum(len(a) + len(g) for a, g in expected):,}, identical on all paths")
+
+    pairs = list(zip(patients, regimens))
+    per_call = timeit(lambda: [validate_patient(p, r, drugs_db) for p, r in pairs], repeat=1)
+    indexed  = timeit(lambda: [rules.validate(p, r) for p, r in pairs], repeat=3)
+    batch    = timeit(lambda: rules.validate_batch(patients, regimens), repeat=3)
+    n = len(pairs)
+    print(f"  validate_patient per regimen  {fmt_seconds(per_call / n)}")
+    print(f"  RuleIndex.validate            {fmt_seconds(indexed / n)}   ({per_call / indexed:5.0f}x)")
+    print(f"  RuleIndex.validate_batch      {fmt_seconds(batch / n)}   ({per_call / batch:5.0f}x)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "drugs.json")
+        with open(path, "w") as f:
+            json.dump(drugs_db, f)
+        first = get_rule_index(path)
+        print(f"get_rule_index cache hit: {fmt_seconds(timeit(lambda: get_rule_index(path), number=1000))}")
+
+        drugs_db[0] = dict(drugs_db[0], min_age=99, max_age=120)
+        with open(path, "w") as f:
+            json.dump(drugs_db, f)
+        os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))
+        start = time.perf_counter()
+        reloaded = get_rule_index(path)
+        print(f"get_rule_index after edit: {fmt_seconds(time.perf_counter() - start)} (reload)")
+        assert reloaded is not first and reloaded.min_age[reloaded.row(names[0])] == 99
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+load_test_api.py
+----------------
+Load test for the Flask API in api.py. By default it drives the app
+in-process through Flask's test client (a local stand-in for real HTTP
+clients); pass --url http://host:port to hit a running server instead.
+Reports p50/p99 latency and requests/sec per endpoint.
+"""
+
+import argparse
+import json
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from _common import random_regimens
+from engines.data_loader import get_drug_names
+
+
+def make_poster(url):
+    if url is None:
+        from api import create_app
+        client = create_app().test_client()
+
+        def post(path, body):
+            response = client.post(path, json=body)
+            assert response.status_code == 200, response.get_data(as_text=True)
+        return post
+
+    def post(path, body):
+        req = urllib.request.Request(url.rstrip("/") + path, data=json.dumps(body).encode(),
+                                     headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req) as response:
+            assert response.status == 200
+            response.read()
+    return post
+
+
+def run(post, path, bodies, concurrency):
+    def timed(body):
+        start = time.perf_counter()
+        post(path, body)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = np.array(list(pool.map(timed, bodies)))
+    wall = time.perf_counter() - start
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1e3
+    print(f"{path:14} n={len(bodies):>6,}  p50={p50:7.2f} ms  p99={p99:7.2f} ms  "
+          f"{len(bodies) / wall:8,.0f} req/s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default=None, help="running server; default: in-process test client")
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    post = make_poster(args.url)
+    patient = {"age": 67, "gender": "Female"}
+    regimens = random_regimens(get_drug_names(), args.requests, min_size=2, max_size=10)
+    singles = [{"drugs": r, "patient": patient} for r in regimens]
+    batches = [{"regimens": singles[i:i + args.batch_size]}
+               for i in range(0, len(singles), args.batch_size)]
+
+    post("/check", singles[0])                          # warm-up
+    print(f"concurrency={args.concurrency}  ({'in-process test client' if args.url is None else args.url})")
+    run(post, "/check", singles, args.concurrency)
+    run(post, "/check/batch", batches, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
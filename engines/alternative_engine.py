@@ -0,0 +1,183 @@
+"""
+alternative_engine.py
+---------------------
+Safer alternatives for one drug of a regimen: every drug in the graph is
+scored as a replacement by the interactions it would have with the rest of
+the regimen, weighted by severity (risk_engine.SEVERITY_WEIGHTS).
+
+Scoring is one pass over the adjacency rows of the drugs that stay: their
+CSR slot ranges are gathered together, and np.bincount over the partner
+columns, with each slot's severity weight, gives every candidate's score at
+once instead of one check_interactions() call per candidate.
+
+  - suggest_alternatives(drugs, replace, ...) -> top-k candidate dicts, safest first
+  - alternative_scores(drugs, replace)        -> per-node score / interactions / worst arrays
+  - get_alternative_index(graph=None)         -> AlternativeIndex for a snapshot, built once per version
+"""
+
+import threading
+
+import numpy as np
+
+from .data_loader import SEVERITY_LEVELS, get_knowledge_graph
+from .risk_engine import SEVERITY_WEIGHTS
+from .validation_engine import get_rule_index
+
+_LEVEL_WEIGHTS = np.array([SEVERITY_WEIGHTS[level] for level in SEVERITY_LEVELS], dtype=np.int32)
+
+
+class AlternativeIndex:
+    """
+    Plain CSR of one snapshot's effective edges with the severity code of
+    every slot alongside, so a row's partners and severities are contiguous.
+    """
+
+    def __init__(self, graph):
+        adjacency = graph.adjacency()
+        severity = graph.edge_severity()
+        if graph.overlay is None:
+            csr, slot_severity = adjacency, severity
+        else:
+            # Overlay slots are split across the base and delta CSRs; re-slot
+            # the severities onto the merged CSR
+            csr, slot_map = adjacency.to_csr()
+            slot_severity = severity[slot_map]
+        self.num_nodes = csr.num_nodes
+        self.indptr    = csr.indptr
+        self.indices   = csr.indices
+        self.severity  = np.ascontiguousarray(slot_severity, dtype=np.uint8)
+        self.weights   = _LEVEL_WEIGHTS[self.severity]
+        self.degrees   = np.diff(csr.indptr).astype(np.int32)
+
+    def _slots(self, node_ids) -> np.ndarray:
+        """Every CSR slot of the rows of `node_ids`, concatenated."""
+        ids = np.asarray(node_ids, dtype=np.int64)
+        starts, ends = self.indptr[ids], self.indptr[ids + 1]
+        lengths = ends - starts
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return offsets + np.arange(int(lengths.sum()), dtype=np.int64)
+
+    def scores(self, node_ids) -> tuple:
+        """
+        For every node, against the distinct `node_ids`: (score int32 —
+        summed severity weights, interactions int32, worst int8 — highest
+        severity code, -1 for none).
+        """
+        slots = self._slots(np.unique(np.asarray(node_ids, dtype=np.int64)))
+        partners = self.indices[slots]
+        score = np.bincount(partners, self.weights[slots], minlength=self.num_nodes)
+        interactions = np.bincount(partners, minlength=self.num_nodes).astype(np.int32)
+        worst = np.full(self.num_nodes, -1, dtype=np.int8)
+        np.maximum.at(worst, partners, self.severity[slots].astype(np.int8))
+        return score.astype(np.int32), interactions, worst
+
+
+_alternative_index = None       # (graph version, AlternativeIndex) of the last snapshot asked for
+_alternative_lock = threading.Lock()
+
+
+def get_alternative_index(graph=None) -> AlternativeIndex:
+    """AlternativeIndex for `graph` (default: the current snapshot), built once per version."""
+    global _alternative_index
+    graph = graph or get_knowledge_graph()
+    cached = _alternative_index
+    if cached is None or cached[0] != graph.version:
+        with _alternative_lock:
+            cached = _alternative_index
+            if cached is None or cached[0] != graph.version:
+                cached = _alternative_index = (graph.version, AlternativeIndex(graph))
+    return cached[1]
+
+
+def alternative_scores(drugs: list, replace: str, graph=None) -> dict:
+    """
+    Scores of every node as a replacement for `replace` in `drugs`:
+    {"keep": ids of the known drugs that stay (input order), "score", "interactions",
+     "worst"} with the arrays indexed by node id (see AlternativeIndex.scores).
+    """
+    graph = graph or get_knowledge_graph()
+    name_to_id = graph.name_to_id()
+    keep = np.array(list(dict.fromkeys(name_to_id[name] for name in drugs
+                                       if name != replace and name in name_to_id)),
+                    dtype=np.int64)
+    score, interactions, worst = get_alternative_index(graph).scores(keep)
+    return {"keep": keep, "score": score, "interactions": interactions, "worst": worst}
+
+
+def suggest_alternatives(drugs: list, replace: str, top_k: int = 10, category: str = None,
+                         patient: dict = None, rules=None) -> list:
+    """
+    Drugs that could replace `replace` in `drugs`, lowest severity-weighted
+    interaction score with the rest of the regimen first; ties go to the
+    drug with fewer interaction partners overall. Drugs already in the
+    regimen are never suggested.
+
+    Args:
+        drugs:    the regimen, real drug names.
+        replace:  the drug to swap out.
+        top_k:    number of suggestions.
+        category: only drugs of this drugs.json category (case-insensitive).
+        patient:  {"age", "gender"}; drugs whose drugs.json rules would warn
+                  for this patient are left out.
+        rules:    validation_engine.RuleIndex (default: get_rule_index()).
+
+    Returns:
+        List of dicts: {drug, category, score, interactions, worst_severity,
+        interacts_with: [{drug, severity}]}, worst_severity None when the
+        candidate interacts with nothing in the regimen.
+    """
+    graph = get_knowledge_graph()
+    names = graph.drug_names()
+    index = get_alternative_index(graph)
+    scores = alternative_scores(drugs, replace, graph)
+    name_to_id = graph.name_to_id()
+    rules = rules if rules is not None else get_rule_index()
+
+    candidate = np.ones(index.num_nodes, dtype=bool)
+    candidate[[name_to_id[name] for name in drugs if name in name_to_id]] = False
+    rows = rules.node_rows(graph)
+    if category is not None or patient is not None:
+        has_rule = rows >= 0
+        if category is not None:
+            wanted = [code for code, value in enumerate(rules.categories)
+                      if value.lower() == category.lower()]
+            in_category = np.zeros(index.num_nodes, dtype=bool)
+            in_category[has_rule] = np.isin(rules.category[rows[has_rule]], wanted)
+            candidate &= in_category
+        if patient is not None:
+            # Drugs without a rule are never restricted
+            allowed = np.ones(index.num_nodes, dtype=bool)
+            allowed[has_rule] = rules.permitted(patient)[rows[has_rule]]
+            candidate &= allowed
+
+    # One int64 key orders by (score, degree, node id); argpartition avoids a full sort
+    ids = np.flatnonzero(candidate)
+    n = np.int64(index.num_nodes)
+    key = (scores["score"][ids].astype(np.int64) * (n + 1) + index.degrees[ids]) * n + ids
+    if len(key) > top_k:
+        part = np.argpartition(key, top_k)[:top_k]
+        ids, key = ids[part], key[part]
+    top = ids[np.argsort(key)]
+
+    # Which regimen drugs each suggestion interacts with, for display
+    keep = scores["keep"]
+    a, b = np.repeat(top, len(keep)), np.tile(keep, len(top))
+    slots = graph.adjacency().find_many(a, b)
+    partners = {}
+    for cand, other, slot in zip(a.tolist(), b.tolist(), slots.tolist()):
+        if slot >= 0:
+            level = SEVERITY_LEVELS[graph.edge_severity()[slot]]
+            partners.setdefault(cand, []).append({"drug": names[other], "severity": level})
+
+    results = []
+    for node_id in top.tolist():
+        worst = int(scores["worst"][node_id])
+        results.append({
+            "drug":           names[node_id],
+            "category":       rules.row_category(int(rows[node_id])),
+            "score":          int(scores["score"][node_id]),
+            "interactions":   int(scores["interactions"][node_id]),
+            "worst_severity": SEVERITY_LEVELS[worst] if worst >= 0 else None,
+            "interacts_with": partners.get(node_id, []),
+        })
+    return results
@@ -0,0 +1,145 @@
+"""
+async_service.py
+----------------
+Asyncio front end over interaction_engine and validation_engine.
+
+Concurrent check() calls that arrive within `window` seconds of each other
+are coalesced into one check_interactions_batch() call, so a burst of N
+requests costs one vectorized membership test instead of N Python loops.
+Identical regimens that are queued or already being screened share a single
+result. Patient validation is batched the same way (one validate_batch()
+per batch, one result per request). All blocking work (the initial index
+load, every batch and the rules lookup, which stats and may re-read the
+rules file) runs on a dedicated worker thread, so the event loop itself
+never blocks.
+
+    service = InteractionService()
+    await service.start()                   # optional; check() starts lazily
+    result = await service.check(["Warfarin", "Ibuprofen"], {"age": 70})
+    # -> {"conflicts": [...], "age_warnings": [...], "gender_warnings": [...]}
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from .data_loader import get_knowledge_graph
+from .interaction_engine import check_interactions_batch, conflicts_from_batch, warm_index
+from .validation_engine import DEFAULT_RULES_PATH, get_rule_index
+
+
+class InteractionService:
+    """
+    Micro-batching interaction checker for one event loop.
+
+    Args:
+        rules_path: drugs.json with the age/gender restriction rules.
+        window:     Seconds to wait for more requests before screening a batch.
+        max_batch:  Screen immediately once this many distinct regimens are queued.
+    """
+
+    def __init__(self, rules_path: str = DEFAULT_RULES_PATH, window: float = 0.002,
+                 max_batch: int = 2048):
+        self.rules_path = rules_path
+        self.window     = window
+        self.max_batch  = max_batch
+        self.stats      = {"requests": 0, "deduplicated": 0, "batches": 0, "regimens": 0}
+
+        # One thread: batches run one at a time, the next one fills up meanwhile
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="medigraph")
+        self._started  = None   # Future of the initial load
+        self._queue    = []     # regimen keys waiting for the next batch
+        self._inflight = {}     # regimen key -> Future shared by identical requests
+        self._patients = []     # (drugs, patient, Future of its warnings) per request
+        self._timer    = None
+
+    async def start(self):
+        """Load the knowledge graph and the rules off the event loop (idempotent)."""
+        if self._started is None:
+            loop = asyncio.get_running_loop()
+            self._started = loop.run_in_executor(self._executor, self._load)
+        await asyncio.shield(self._started)
+
+    def _load(self):
+        warm_index()
+        get_rule_index(self.rules_path)
+
+    async def check(self, drugs: list, patient: dict = None) -> dict:
+        """Check one regimen; same conflicts as interaction_engine.check_interactions()."""
+        await self.start()
+        self.stats["requests"] += 1
+        loop = asyncio.get_running_loop()
+
+        key = tuple(drugs)
+        future = self._inflight.get(key)
+        if future is None:
+            future = loop.create_future()
+            self._inflight[key] = future
+            self._queue.append(key)
+        else:
+            self.stats["deduplicated"] += 1
+        warnings = loop.create_future()
+        self._patients.append((list(drugs), patient or {}, warnings))
+        self._schedule()
+
+        # shield: one cancelled caller must not cancel the result others share
+        conflicts = await asyncio.shield(future)
+        age_warnings, gender_warnings = await warnings
+        return {
+            "conflicts":       [dict(c) for c in conflicts],
+            "age_warnings":    age_warnings,
+            "gender_warnings": gender_warnings,
+        }
+
+    def _schedule(self):
+        if len(self._queue) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        keys, self._queue = self._queue, []
+        requests, self._patients = self._patients, []
+        if not keys and not requests:
+            return
+        if keys:
+            self.stats["batches"]  += 1
+            self.stats["regimens"] += len(keys)
+
+        loop = asyncio.get_running_loop()
+        patients = [(drugs, patient) for drugs, patient, _ in requests]
+        batch = loop.run_in_executor(self._executor, _screen, keys, patients, self.rules_path)
+        warnings = [future for _, _, future in requests]
+        batch.add_done_callback(lambda done: self._deliver(keys, warnings, done))
+
+    def _deliver(self, keys: list, warnings: list, done):
+        futures = [self._inflight.pop(key) for key in keys] + warnings
+        error = done.exception() if not done.cancelled() else asyncio.CancelledError()
+        if error is not None:
+            for future in futures:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        conflicts, validated = done.result()
+        for future, result in zip(futures, conflicts + validated):
+            if not future.done():
+                future.set_result(result)
+
+    def close(self):
+        """Stop the worker thread once queued batches have finished."""
+        self._executor.shutdown(wait=True)
+
+
+def _screen(keys: list, patients: list, rules_path: str) -> tuple:
+    """(conflicts per regimen key, (age, gender) warnings per (drugs, patient) request)."""
+    conflicts = []
+    if keys:
+        graph = get_knowledge_graph()
+        batch = check_interactions_batch([list(key) for key in keys], graph=graph)
+        conflicts = conflicts_from_batch(batch, len(keys), graph=graph)
+    rules = get_rule_index(rules_path)
+    validated = rules.validate_batch([patient for _, patient in patients],
+                                     [drugs for drugs, _ in patients])
+    return conflicts, validated
@@ -0,0 +1,88 @@
+"""
+bit_adjacency.py
+----------------
+Dense bit-packed adjacency matrix for the ogbl-ddi graph.
+
+With ~4.3k nodes the full n x n matrix packs into n * ceil(n/8) bytes
+(about 2.3 MB), bit (a, b) set when a and b interact. Row a is built with
+np.packbits, so bit b of row a lives in byte b >> 3 under mask 0x80 >> (b & 7).
+  - PackedAdjacency.from_edge_index(edge_index, num_nodes)
+  - PackedAdjacency.from_csr(adjacency)
+  - PackedAdjacency.has_interaction(a, b)   -> bool, O(1)
+  - PackedAdjacency.has_many(a, b)          -> np.ndarray[bool]
+  - PackedAdjacency.submatrix(ids)          -> (k, k) bool regimen matrix
+  - PackedAdjacency.degrees()               -> np.ndarray[int32] popcount per row
+  - PackedAdjacency.counts_within(ids)      -> partners of each id inside the set
+Edge slots (for descriptions) are only available from CSRAdjacency.
+"""
+
+import numpy as np
+
+if hasattr(np, "bitwise_count"):            # NumPy >= 2.0
+    _popcount = np.bitwise_count
+else:
+    _POPCOUNT_TABLE = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+    def _popcount(bits):
+        return _POPCOUNT_TABLE[bits]
+
+
+class PackedAdjacency:
+    """`bits` (uint8, n x ceil(n/8)): row a is np.packbits of a's neighbour mask."""
+
+    def __init__(self, bits: np.ndarray, num_nodes: int):
+        self.bits      = bits
+        self.num_nodes = num_nodes
+
+    @classmethod
+    def from_edge_index(cls, edge_index, num_nodes: int) -> "PackedAdjacency":
+        """Build from a (2, E) edge array; edges are symmetrised."""
+        edge_index = np.asarray(edge_index, dtype=np.int64)
+        return cls._from_pairs(edge_index[0], edge_index[1], num_nodes)
+
+    @classmethod
+    def from_csr(cls, adjacency) -> "PackedAdjacency":
+        """Build from a CSRAdjacency (which already lists both directions)."""
+        rows = np.repeat(np.arange(adjacency.num_nodes, dtype=np.int64), np.diff(adjacency.indptr))
+        return cls._from_pairs(rows, adjacency.indices, adjacency.num_nodes)
+
+    @classmethod
+    def _from_pairs(cls, rows, cols, num_nodes: int) -> "PackedAdjacency":
+        dense = np.zeros((num_nodes, num_nodes), dtype=bool)    # transient, n^2 bytes
+        dense[rows, cols] = True
+        dense[cols, rows] = True
+        return cls(np.packbits(dense, axis=1), num_nodes)
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+    def has_interaction(self, node_id_a: int, node_id_b: int) -> bool:
+        if not (0 <= node_id_a < self.num_nodes and 0 <= node_id_b < self.num_nodes):
+            return False
+        return bool(self.bits[node_id_a, node_id_b >> 3] & (0x80 >> (node_id_b & 7)))
+
+    def has_many(self, node_ids_a, node_ids_b) -> np.ndarray:
+        """Vectorized has_interaction() for every (a[i], b[i]) pair."""
+        a = np.asarray(node_ids_a, dtype=np.int64)
+        b = np.asarray(node_ids_b, dtype=np.int64)
+        valid = (a >= 0) & (a < self.num_nodes) & (b >= 0) & (b < self.num_nodes)
+        a, b = np.where(valid, a, 0), np.where(valid, b, 0)
+        return valid & (self.bits[a, b >> 3] & (0x80 >> (b & 7)) != 0)
+
+    def submatrix(self, node_ids) -> np.ndarray:
+        """(k, k) bool matrix M[i, j] = ids[i] interacts with ids[j]."""
+        ids = np.asarray(node_ids, dtype=np.int64)
+        return (self.bits[ids[:, None], ids[None, :] >> 3] & (0x80 >> (ids[None, :] & 7))) != 0
+
+    def degrees(self) -> np.ndarray:
+        """Number of interaction partners of every node (popcount of each row)."""
+        return _popcount(self.bits).sum(axis=1, dtype=np.int64).astype(np.int32)
+
+    def counts_within(self, node_ids) -> np.ndarray:
+        """For each id, how many of the distinct `node_ids` it interacts with (row AND set mask)."""
+        ids = np.asarray(node_ids, dtype=np.int64)
+        member = np.zeros(self.num_nodes, dtype=bool)
+        member[ids] = True
+        mask = np.packbits(member)
+        return _popcount(self.bits[ids] & mask).sum(axis=1, dtype=np.int64).astype(np.int32)
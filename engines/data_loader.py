@@ -1,43 +1,268 @@
 """
 data_loader.py
 --------------
-Downloads and caches the OGB ogbl-ddi dataset.
+Loads and caches the OGB ogbl-ddi knowledge graph.
+
+Three sources are supported, tried in this order:
+  - the compiled bundle data/knowledge_graph.bundle (see kg_bundle.py) —
+    memory-mapped, shared between processes, loads in milliseconds
+  - prebuilt artifacts in data/ (drug_names.csv, interactions.parquet,
+    node_degrees.csv) — no torch/ogb import at all
+  - the OGB dataset itself via ogb.linkproppred — imported lazily, only when
+    neither of the above is present and fresh
+
+MEDIGRAPH_LOADER selects the source: "auto" (default), "bundle", "artifacts"
+or "ogb". MEDIGRAPH_BUNDLE overrides the bundle path.
+
+The bundle (meta "sources") and the artifacts (data/artifact_sources.json)
+record the size, mtime and hash of the OGB files they were built from; they
+count as stale when any of those files present now differs, so an edited
+edge.csv.gz is noticed even when its edge count is unchanged.
+
+The local interaction overlay (MEDIGRAPH_OVERLAY, default
+data/interaction_overlay.csv; see overlay.py) is layered over whichever
+source is used: get_adjacency(), get_edge_severity() and
+get_ddi_descriptions() then cover the base edges plus the overlay's. An
+overlay that is malformed or does not fit the base is logged and left out
+of the first snapshot (reload_status()["overlay_error"]); reload() refuses
+it and keeps the current snapshot serving.
+
 Provides:
   - get_drug_names()             -> list of real drug name strings (e.g. "Lepirudin")
   - get_name_to_id()             -> dict {drug_name: node_idx}
-  - get_interaction_edge_set()   -> set of (int, int) tuples for O(1) pair lookup
-  - get_ddi_descriptions()       -> dict {(db_id_a, db_id_b): description_str}
+  - get_name_index()             -> NameIndex (prefix / typo / alias / DrugBank-ID search)
+  - get_adjacency()              -> CSRAdjacency (has_interaction / neighbors), or an
+                                    OverlayAdjacency with the same lookups
+  - get_packed_adjacency()       -> PackedAdjacency (bit matrix: O(1) pair tests,
+                                    regimen submatrices, popcount counts)
+  - get_interaction_edge_set()   -> set of (int, int) tuples (legacy; prefer get_adjacency)
+  - get_ddi_descriptions()       -> DescriptionIndex (per-edge-slot templates, .render())
   - get_num_drugs()              -> int total number of drug nodes
+  - get_node_degrees()           -> np.ndarray[int32] degree per node index
+  - get_edge_severity()          -> np.ndarray[uint8] per edge slot, into SEVERITY_LEVELS
+  - get_severity_rule()          -> SeverityRule the edge severities are built with
+                                    (MEDIGRAPH_SEVERITY_RULES = path to a JSON rule file)
+  - get_severity(a, b) / get_severity_codes(a, b) -> per-pair lookups
+  - get_knowledge_graph()        -> the current KnowledgeGraph snapshot
+  - reload(bundle_path=None)     -> build a new snapshot and swap it in atomically
+  - start_watcher(interval)      -> reload() whenever the graph files change on disk
+  - reload_status()              -> current version/source/overlay and the last reload error
+  - on_swap(callback)            -> call callback(old, new) after every swap
+
+Everything above lives on one versioned KnowledgeGraph snapshot; the get_*()
+functions read the current one. reload() builds the next snapshot from the
+files on disk off to the side, then swaps it in with a single assignment.
+When only the overlay file changed, the new snapshot shares the current
+one's base structures and just re-applies the overlay.
+Calls holding the old snapshot finish against it, and its memory is released
+when the last of them drops it. Code that makes several lookups per request
+should take one snapshot up front (as interaction_engine does), so a swap
+cannot mix versions.
+
+Every lazy structure is built single-flight: the first caller builds it under
+the snapshot's re-entrant lock while concurrent callers wait and then reuse
+the result, so N sessions starting at once cost one build, not N.
 """
 
-# ── PyTorch 2.6+ compatibility fix ──────────────────────────────────────────── #
-import torch as _torch
-_original_torch_load = _torch.load
-def _patched_torch_load(f, *args, **kwargs):
-    kwargs.setdefault("weights_only", False)
-    return _original_torch_load(f, *args, **kwargs)
-_torch.load = _patched_torch_load
-# ────────────────────────────────────────────────────────────────────────────── #
-
-from ogb.linkproppred import LinkPropPredDataset
+import numpy as np
 import pandas as pd
+import hashlib
+import json
+import logging
 import os
-
-# ── Module-level caches ──────────────────────────────────────────────────────── #
-_dataset     = None
-_edge_set    = None
-_drug_names  = None          # list[str] in node-index order
-_name_to_id  = None          # dict {name: node_idx}
-_idx_to_db   = None          # dict {node_idx: DrugBank-ID (e.g. "DB00001")}
-_ddi_desc    = None          # dict {(db_id_a, db_id_b): description}
-_HIGH_DEGREE_THRESHOLD = 500
-
-
-def _load_dataset():
-    global _dataset
-    if _dataset is None:
-        _dataset = LinkPropPredDataset(name="ogbl-ddi")
-    return _dataset
+import threading
+import time
+
+from .adjacency import CSRAdjacency
+from .bit_adjacency import PackedAdjacency
+from .descriptions import DescriptionIndex
+from .name_index import NameIndex
+from .overlay import InteractionOverlay, OverlayError
+from .severity import SEVERITY_LEVELS, SeverityRule
+
+_log = logging.getLogger(__name__)
+
+_LOADER_MODE = os.environ.get("MEDIGRAPH_LOADER", "auto").lower()
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DATA_DIR = os.path.join(_BASE_DIR, "data")
+_NAMES_PATH   = os.path.join(_DATA_DIR, "drug_names.csv")
+_EDGES_PATH   = os.path.join(_DATA_DIR, "interactions.parquet")
+_DEGREES_PATH = os.path.join(_DATA_DIR, "node_degrees.csv")
+_ALIASES_PATH = os.path.join(_DATA_DIR, "drug_aliases.csv")     # alias,drug_name (brand names)
+_BUNDLE_PATH  = os.environ.get("MEDIGRAPH_BUNDLE",
+                               os.path.join(_DATA_DIR, "knowledge_graph.bundle"))
+_SEVERITY_RULES_PATH = os.environ.get("MEDIGRAPH_SEVERITY_RULES")
+_OVERLAY_PATH = os.environ.get("MEDIGRAPH_OVERLAY",
+                               os.path.join(_DATA_DIR, "interaction_overlay.csv"))
+_ARTIFACT_SOURCES_PATH = os.path.join(_DATA_DIR, "artifact_sources.json")
+
+# OGB files the bundle and the artifacts are built from, relative to dataset/ogbl_ddi
+_DATASET_DIR  = os.path.join(_BASE_DIR, "dataset", "ogbl_ddi")
+_SOURCE_FILES = ("raw/edge.csv.gz", "raw/num-node-list.csv.gz", "raw/num-edge-list.csv.gz",
+                 "mapping/nodeidx2drugid.csv.gz", "mapping/ddi_description.csv.gz")
+
+# ── Current snapshot ─────────────────────────────────────────────────────────── #
+_current   = None                  # KnowledgeGraph every get_*() reads
+_version   = 0                     # last version handed out
+_listeners = []                    # on_swap() callbacks
+_watcher   = None                  # start_watcher() thread
+_reload_error = None               # last failed reload from the watcher, as text
+_init_lock   = threading.Lock()    # guards the first snapshot
+_reload_lock = threading.Lock()    # one reload() at a time
+
+
+def _import_ogb_dataset_class():
+    """Import ogb (and torch) on demand; never at module import time."""
+    # ── PyTorch 2.6+ compatibility fix ──────────────────────────────────────── #
+    import torch as _torch
+    if not getattr(_torch.load, "_medigraph_patched", False):
+        _original_torch_load = _torch.load
+        def _patched_torch_load(f, *args, **kwargs):
+            kwargs.setdefault("weights_only", False)
+            return _original_torch_load(f, *args, **kwargs)
+        _patched_torch_load._medigraph_patched = True
+        _torch.load = _patched_torch_load
+    # ────────────────────────────────────────────────────────────────────────── #
+    from ogb.linkproppred import LinkPropPredDataset
+    return LinkPropPredDataset
+
+
+def _read_raw_count(filename: str):
+    """Read a single count from dataset/ogbl_ddi/raw/num-*-list.csv.gz, if present."""
+    path = os.path.join(_BASE_DIR, "dataset", "ogbl_ddi", "raw", filename)
+    if not os.path.exists(path):
+        return None
+    return int(pd.read_csv(path, header=None).iloc[0, 0])
+
+
+def _file_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+def _source_stamp() -> dict:
+    """{relative path: {"size", "mtime_ns", "blake2b"}} of the OGB source files present now."""
+    stamp = {}
+    for rel in _SOURCE_FILES:
+        path = os.path.join(_DATASET_DIR, rel)
+        if os.path.exists(path):
+            st = os.stat(path)
+            stamp[rel] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                          "blake2b": _file_hash(path)}
+    return stamp
+
+
+def _sources_match(recorded) -> bool:
+    """
+    True when every OGB source file present now is the one `recorded` (a
+    _source_stamp()). Files that are absent now are not checked, so a
+    deployment shipping only data/ stays valid. The hash is only computed
+    when the mtime differs (e.g. after a fresh checkout).
+    """
+    for rel in _SOURCE_FILES:
+        path = os.path.join(_DATASET_DIR, rel)
+        if not os.path.exists(path):
+            continue
+        want = (recorded or {}).get(rel)
+        if want is None:
+            return False
+        st = os.stat(path)
+        if st.st_size != want["size"]:
+            return False
+        if st.st_mtime_ns != want["mtime_ns"] and _file_hash(path) != want["blake2b"]:
+            return False
+    return True
+
+
+def _artifacts_fresh() -> bool:
+    """
+    True when every prebuilt artifact exists, matches the raw OGB counts and
+    was stamped (python -m engines.kg_bundle stamp) from the OGB files on disk.
+    Artifacts whose drug_names.csv lacks the drug_id column need the OGB node
+    mapping as well.
+    """
+    if not all(os.path.exists(p) for p in (_NAMES_PATH, _EDGES_PATH, _DEGREES_PATH)):
+        return False
+    if ("drug_id" not in pd.read_csv(_NAMES_PATH, nrows=0).columns
+            and not os.path.exists(os.path.join(_get_mapping_dir(), "nodeidx2drugid.csv.gz"))):
+        return False
+    recorded = None
+    if os.path.exists(_ARTIFACT_SOURCES_PATH):
+        with open(_ARTIFACT_SOURCES_PATH) as f:
+            recorded = json.load(f)
+    if not _sources_match(recorded):
+        return False
+
+    import pyarrow.parquet as pq
+    num_nodes = _read_raw_count("num-node-list.csv.gz")
+    num_edges = _read_raw_count("num-edge-list.csv.gz")
+    if num_edges is not None and pq.read_metadata(_EDGES_PATH).num_rows != num_edges:
+        return False
+    if num_nodes is not None:
+        for path in (_NAMES_PATH, _DEGREES_PATH):
+            if len(pd.read_csv(path, usecols=["node_idx"])) != num_nodes:
+                return False
+    return True
+
+
+def _open_fresh_bundle(path: str = _BUNDLE_PATH):
+    """
+    Open the bundle if it exists, has a readable version, matches the raw
+    counts and was compiled from the OGB source files on disk now.
+    """
+    # Imported here so `python -m engines.kg_bundle` does not import itself twice.
+    from .kg_bundle import BundleError, open_bundle
+
+    if not os.path.exists(path):
+        return None
+    try:
+        bundle = open_bundle(path)
+    except BundleError:
+        return None
+    num_nodes = _read_raw_count("num-node-list.csv.gz")
+    num_edges = _read_raw_count("num-edge-list.csv.gz")
+    if num_nodes is not None and bundle.meta["num_nodes"] != num_nodes:
+        return None
+    # A compacted bundle (base + overlay) records the edge count of its base
+    base_edges = bundle.meta.get("base_num_edges", bundle.meta["num_edges"])
+    if num_edges is not None and base_edges != num_edges:
+        return None
+    if not _sources_match(bundle.meta.get("sources")):
+        return None
+    return bundle
+
+
+def _resolve_source(bundle_path: str = _BUNDLE_PATH) -> tuple:
+    """(source, bundle or None) for MEDIGRAPH_LOADER, from the files on disk now."""
+    if _LOADER_MODE in ("auto", "bundle"):
+        bundle = _open_fresh_bundle(bundle_path)
+        if bundle is not None:
+            return "bundle", bundle
+        if _LOADER_MODE == "bundle":
+            raise FileNotFoundError(
+                f"MEDIGRAPH_LOADER=bundle but {bundle_path} is missing or stale; "
+                "run `python -m engines.kg_bundle build`."
+            )
+
+    if _LOADER_MODE == "ogb":
+        return "ogb", None
+    if _LOADER_MODE == "artifacts":
+        if not _artifacts_fresh():
+            raise FileNotFoundError(
+                f"MEDIGRAPH_LOADER=artifacts but the prebuilt files in {_DATA_DIR} "
+                "are missing or stale."
+            )
+        return "artifacts", None
+    return ("artifacts" if _artifacts_fresh() else "ogb"), None
+
+
+def _read_overlay(path: str = _OVERLAY_PATH):
+    """The overlay file parsed, or None when there is none (or it is empty)."""
+    if not path or not os.path.exists(path):
+        return None
+    overlay = InteractionOverlay.from_file(path)
+    return overlay if len(overlay) else None
 
 
 def _get_mapping_dir() -> str:
@@ -47,123 +272,586 @@ def _get_mapping_dir() -> str:
     return os.path.join(medigraph_dir, "dataset", "ogbl_ddi", "mapping")
 
 
-def _build_name_maps():
-    """Build idx→real-name and name→idx maps using OGB mapping CSVs."""
-    global _drug_names, _name_to_id, _idx_to_db
-    if _drug_names is not None:
-        return
-
-    mapping_dir = _get_mapping_dir()
-
-    # 1. node_idx → DrugBank ID
-    node2drug = pd.read_csv(os.path.join(mapping_dir, "nodeidx2drugid.csv.gz"))
-    node2drug.columns = ["node_idx", "drug_id"]
-
-    # 2. DrugBank ID → real name (from description file)
-    desc = pd.read_csv(os.path.join(mapping_dir, "ddi_description.csv.gz"),
-                        usecols=["first drug id", "first drug name",
-                                  "second drug id", "second drug name"])
-    id2name: dict[str, str] = {}
-    for _, row in desc[["first drug id", "first drug name"]].drop_duplicates().iterrows():
-        id2name[row["first drug id"]] = row["first drug name"]
-    for _, row in desc[["second drug id", "second drug name"]].drop_duplicates().iterrows():
-        id2name[row["second drug id"]] = row["second drug name"]
-
-    # 3. Build idx → real name list (fallback to DB-ID if somehow missing)
-    names = []
-    idx_to_db = {}
-    for _, row in node2drug.sort_values("node_idx").iterrows():
-        idx  = int(row["node_idx"])
-        dbid = row["drug_id"]
-        real = id2name.get(dbid, dbid)        # fallback to DrugBank ID
-        names.append(real)
-        idx_to_db[idx] = dbid
+def _names_from_frames(node2drug: pd.DataFrame, desc: pd.DataFrame):
+    """
+    Real drug names in node order plus {node_idx: DrugBank-ID}, from the OGB
+    node mapping and description frames. Shared with the bundle compiler.
+    """
+    # DrugBank ID → real name; a name seen in the second-drug columns wins,
+    # and within each column pair the last distinct name wins.
+    first  = desc[["first drug id", "first drug name"]].drop_duplicates()
+    second = desc[["second drug id", "second drug name"]].drop_duplicates()
+    first.columns = second.columns = ["drug_id", "name"]
+    id2name = (pd.concat([first, second])
+                 .drop_duplicates("drug_id", keep="last")
+                 .set_index("drug_id")["name"])
+
+    # idx → real name (fallback to DB-ID if somehow missing)
+    node2drug = node2drug.sort_values("node_idx")
+    drug_ids  = node2drug["drug_id"]
+    names     = drug_ids.map(id2name).fillna(drug_ids).astype(str)
 
     # Deduplicate names (some drugs may share a common name, append DrugBank ID)
-    seen: dict[str, int] = {}
-    unique_names = []
-    for name in names:
-        if name in seen:
-            seen[name] += 1
-            unique_names.append(f"{name} ({idx_to_db[len(unique_names)]})")
+    dup = names.duplicated(keep="first")
+    names[dup] = names[dup] + " (" + drug_ids[dup].astype(str) + ")"
+
+    idx_to_db = dict(zip(node2drug["node_idx"].tolist(), drug_ids.tolist()))
+    return names.tolist(), idx_to_db
+
+
+class KnowledgeGraph:
+    """
+    One immutable, versioned snapshot of the graph: edges, degrees, name maps,
+    descriptions and severities from a single source, plus the overlay
+    layered on top. Members load lazily and single-flight on first use;
+    warm() loads all of them. The base_*() members are the source's own,
+    without the overlay.
+    """
+
+    def __init__(self, version: int, source: str, bundle=None,
+                 severity_rules_path: str = _SEVERITY_RULES_PATH, overlay=None,
+                 base_signature: tuple = None):
+        self.version = version
+        self.source  = source        # "bundle" | "artifacts" | "ogb"
+        self.overlay = overlay       # InteractionOverlay, or None
+        self.base_signature = base_signature    # _base_signature() of the files it was opened from
+        self.overlay_error = None    # why the overlay was dropped, if it was
+        self._bundle = bundle        # KnowledgeGraphBundle when the bundle source is used
+        self._severity_rules_path = severity_rules_path
+
+        # Held while any member below is being built. Re-entrant because
+        # builders call other members. Each member checks its field once
+        # without the lock (the fast path once loaded) and again under it.
+        self._lock = threading.RLock()
+
+        self._dataset     = None
+        self._edge_set    = None
+        self._base_adjacency = None  # CSRAdjacency over node indices
+        self._base_severity  = None  # np.ndarray[uint8] per base edge slot
+        self._base_desc      = None  # DescriptionIndex over the base edge slots
+        self._adjacency   = None     # OverlayAdjacency, once the overlay is applied
+        self._overlay_stats = None   # {"rows", "added", "removed", "overridden"}
+        self._packed      = None     # PackedAdjacency, built on first use
+        self._drug_names  = None     # list[str] in node-index order
+        self._name_to_id  = None     # dict {name: node_idx}
+        self._idx_to_db   = None     # dict {node_idx: DrugBank-ID (e.g. "DB00001")}
+        self._name_index  = None     # NameIndex over names, aliases and DrugBank-IDs
+        self._ddi_desc    = None     # DescriptionIndex over the overlay's slots
+        self._degrees     = None     # np.ndarray[int32] indexed by node_idx
+        self._severity_rule = None   # SeverityRule, from MEDIGRAPH_SEVERITY_RULES or the default
+        self._edge_severity = None   # np.ndarray[uint8] per overlay slot, into SEVERITY_LEVELS
+
+    @classmethod
+    def open(cls, version: int, bundle_path: str = _BUNDLE_PATH,
+             overlay_path: str = _OVERLAY_PATH, strict: bool = False) -> "KnowledgeGraph":
+        """
+        Snapshot over the source MEDIGRAPH_LOADER picks from the files on disk
+        now. A malformed overlay file raises OverlayError with strict=True;
+        otherwise it is logged and the snapshot serves the base graph alone.
+        """
+        signature = _base_signature(bundle_path)
+        overlay_error = None
+        try:
+            overlay = _read_overlay(overlay_path)
+        except OverlayError as exc:
+            if strict:
+                raise
+            _log.error("ignoring the interaction overlay: %s", exc)
+            overlay, overlay_error = None, str(exc)
+        source, bundle = _resolve_source(bundle_path)
+        graph = cls(version, source, bundle, overlay=overlay, base_signature=signature)
+        graph.overlay_error = overlay_error
+        return graph
+
+    def with_overlay(self, version: int, overlay) -> "KnowledgeGraph":
+        """
+        New snapshot over the same base with a different overlay (or None).
+        Base members this snapshot already loaded are shared, not rebuilt.
+        """
+        graph = KnowledgeGraph(version, self.source, self._bundle, self._severity_rules_path,
+                               overlay, self.base_signature)
+        with self._lock:
+            for field in ("_dataset", "_base_adjacency", "_base_severity", "_base_desc",
+                          "_name_to_id", "_idx_to_db", "_drug_names", "_name_index",
+                          "_degrees", "_severity_rule"):
+                setattr(graph, field, getattr(self, field))
+        return graph
+
+    @property
+    def meta(self) -> dict:
+        """The bundle header's meta (num_nodes, num_edges, built_at, ...), {} otherwise."""
+        return dict(self._bundle.meta) if self._bundle is not None else {}
+
+    def warm(self) -> "KnowledgeGraph":
+        """Load every member the checks and the search touch."""
+        self.adjacency().find_many([0], [0])
+        self.edge_severity()
+        self.name_to_id()
+        self.descriptions()
+        self.name_index()
+        return self
+
+    def overlay_stats(self) -> dict:
+        """{"rows", "added", "removed", "overridden"} once the overlay is applied, else None."""
+        stats = self._overlay_stats
+        return dict(stats) if stats is not None else None
+
+    def __repr__(self) -> str:
+        return f"KnowledgeGraph(version={self.version}, source={self.source!r})"
+
+    # ── Loading ──────────────────────────────────────────────────────────────── #
+
+    def _load_dataset(self):
+        if self._dataset is None:
+            with self._lock:
+                if self._dataset is None:
+                    LinkPropPredDataset = _import_ogb_dataset_class()
+                    self._dataset = LinkPropPredDataset(name="ogbl-ddi")
+        return self._dataset
+
+    def _load_edge_index(self) -> np.ndarray:
+        """(2, E) int64 edge array from the artifacts (one direction) or OGB (both)."""
+        if self.source == "artifacts":
+            edges = pd.read_parquet(_EDGES_PATH, columns=["src", "tgt"])
+            return edges.to_numpy(dtype=np.int64).T
+        if self.source == "bundle":
+            adjacency = self.base_adjacency()
+            rows = np.repeat(np.arange(adjacency.num_nodes), np.diff(adjacency.indptr))
+            return np.stack([rows, adjacency.indices.astype(np.int64)])
+        return np.asarray(self._load_dataset()[0]["edge_index"], dtype=np.int64)
+
+    def _build_name_maps(self):
+        """Build idx→real-name and name→idx maps using OGB mapping CSVs."""
+        if self._drug_names is not None:
+            return
+        with self._lock:
+            if self._drug_names is None:
+                self._load_name_maps()
+
+    def _load_name_maps(self):
+        if self.source == "bundle":
+            names = self._bundle.names().tolist()
+            idx_to_db = dict(enumerate(self._bundle.db_ids().tolist()))
+        elif self.source == "artifacts":
+            # Names come pre-deduplicated from data/drug_names.csv, DB-IDs from its
+            # drug_id column (older artifacts: from the OGB mapping instead)
+            table = pd.read_csv(_NAMES_PATH).sort_values("node_idx")
+            if "drug_id" not in table.columns:
+                node2drug = pd.read_csv(os.path.join(_get_mapping_dir(), "nodeidx2drugid.csv.gz"))
+                node2drug.columns = ["node_idx", "drug_id"]
+                table = table.merge(node2drug, on="node_idx", how="left")
+            names = table["drug_name"].astype(str).tolist()
+            idx_to_db = dict(zip(table["node_idx"].tolist(), table["drug_id"].tolist()))
         else:
-            seen[name] = 1
-            unique_names.append(name)
-
-    _drug_names = unique_names
-    _name_to_id = {name: idx for idx, name in enumerate(unique_names)}
-    _idx_to_db  = idx_to_db
-
-
-def _build_ddi_descriptions():
-    """Build (db_id_a, db_id_b) → description dict from the OGB description CSV."""
-    global _ddi_desc
-    if _ddi_desc is not None:
-        return
-
-    mapping_dir = _get_mapping_dir()
-    desc = pd.read_csv(os.path.join(mapping_dir, "ddi_description.csv.gz"))
-    _ddi_desc = {}
-    for _, row in desc.iterrows():
-        a, b, d = row["first drug id"], row["second drug id"], row["description"]
-        key = (min(a, b), max(a, b))
-        _ddi_desc[key] = str(d)
+            mapping_dir = _get_mapping_dir()
+            node2drug = pd.read_csv(os.path.join(mapping_dir, "nodeidx2drugid.csv.gz"))
+            node2drug.columns = ["node_idx", "drug_id"]
+            desc = pd.read_csv(os.path.join(mapping_dir, "ddi_description.csv.gz"),
+                               usecols=["first drug id", "first drug name",
+                                        "second drug id", "second drug name"])
+            names, idx_to_db = _names_from_frames(node2drug, desc)
+
+        # _drug_names last: it is the "loaded" flag _build_name_maps() checks
+        self._name_to_id = {name: idx for idx, name in enumerate(names)}
+        self._idx_to_db  = idx_to_db
+        self._drug_names = names
+
+    def _load_ddi_descriptions(self):
+        """Build the per-edge description templates from the bundle or the OGB description CSV."""
+        if self.source == "bundle":
+            self._base_desc = self._bundle.descriptions()
+            return
+
+        desc_path = os.path.join(_get_mapping_dir(), "ddi_description.csv.gz")
+        if not os.path.exists(desc_path):
+            # Optional file: callers fall back to a generic description.
+            self._base_desc = DescriptionIndex.empty(len(self.base_adjacency().indices))
+            return
+
+        desc = pd.read_csv(desc_path)
+        db_to_idx = {db: idx for idx, db in self.idx_to_db().items()}
+        self._base_desc = DescriptionIndex.from_frame(desc, db_to_idx, self.base_adjacency())
+
+    def validate_overlay(self) -> "KnowledgeGraph":
+        """Apply the overlay now; raises OverlayError if it does not fit this base."""
+        if self.overlay is not None:
+            self._apply_overlay(strict=True)
+        return self
+
+    def _apply_overlay(self, strict: bool = False):
+        """
+        Layer the overlay over the base adjacency, severities and descriptions.
+        An overlay that does not fit the base (unknown drug, pair that does
+        not interact, ...) raises with strict=True; otherwise it is logged and
+        the base is served as is, so one bad row cannot break every check.
+        """
+        if self._adjacency is not None:
+            return
+        with self._lock:
+            if self._adjacency is not None:
+                return
+            try:
+                adjacency, severity, descriptions, stats = self.overlay.apply(
+                    self.base_adjacency(), self.base_edge_severity(), self.base_descriptions(),
+                    self.name_index().resolve, self.drug_names(), self.degrees(),
+                    self.severity_rule(),
+                )
+            except OverlayError as exc:
+                if strict:
+                    raise
+                _log.error("ignoring the interaction overlay: %s", exc)
+                self.overlay, self.overlay_error = None, str(exc)
+                adjacency, severity = self.base_adjacency(), self.base_edge_severity()
+                descriptions, stats = self.base_descriptions(), None
+            # _adjacency last: it is the "applied" flag checked above
+            self._overlay_stats = stats
+            self._edge_severity = severity
+            self._ddi_desc      = descriptions
+            self._adjacency     = adjacency
+
+    # ── Members ──────────────────────────────────────────────────────────────── #
+
+    def num_drugs(self) -> int:
+        if self.source == "bundle":
+            return self._bundle.num_nodes
+        if self.source == "artifacts":
+            return len(self.drug_names())
+        return self._load_dataset()[0]["num_nodes"]
+
+    def drug_names(self) -> list:
+        self._build_name_maps()
+        return self._drug_names
+
+    def name_to_id(self) -> dict:
+        self._build_name_maps()
+        return self._name_to_id
+
+    def idx_to_db(self) -> dict:
+        self._build_name_maps()
+        return self._idx_to_db
+
+    def name_index(self) -> NameIndex:
+        if self._name_index is None:
+            with self._lock:
+                if self._name_index is None:
+                    aliases = {}
+                    if os.path.exists(_ALIASES_PATH):
+                        table = pd.read_csv(_ALIASES_PATH, dtype=str)
+                        aliases = dict(zip(table["alias"], table["drug_name"]))
+                    self._name_index = NameIndex(self.drug_names(), self.idx_to_db(), aliases)
+        return self._name_index
+
+    def base_adjacency(self) -> CSRAdjacency:
+        if self._base_adjacency is None:
+            with self._lock:
+                if self._base_adjacency is None:
+                    if self.source == "bundle":
+                        self._base_adjacency = self._bundle.adjacency()
+                    else:
+                        self._base_adjacency = CSRAdjacency.from_edge_index(
+                            self._load_edge_index(), self.num_drugs())
+        return self._base_adjacency
+
+    def adjacency(self):
+        """The base CSRAdjacency, or an OverlayAdjacency (same lookups) with an overlay."""
+        if self.overlay is None:
+            return self.base_adjacency()
+        self._apply_overlay()
+        return self._adjacency
+
+    def csr(self) -> CSRAdjacency:
+        """Plain CSR of the effective edges; merged (and so re-slotted) with an overlay."""
+        adjacency = self.adjacency()
+        return adjacency if self.overlay is None else adjacency.to_csr()[0]
+
+    def packed_adjacency(self) -> PackedAdjacency:
+        if self._packed is None:
+            with self._lock:
+                if self._packed is None:
+                    self._packed = PackedAdjacency.from_csr(self.csr())
+        return self._packed
+
+    def interaction_edge_set(self) -> set:
+        if self._edge_set is None:
+            with self._lock:
+                if self._edge_set is None:
+                    if self.overlay is None:
+                        edge_index = self._load_edge_index()
+                    else:
+                        csr = self.csr()
+                        rows = np.repeat(np.arange(csr.num_nodes), np.diff(csr.indptr))
+                        edge_index = np.stack([rows, csr.indices.astype(np.int64)])
+                    sources = edge_index[0].tolist()
+                    targets = edge_index[1].tolist()
+                    edge_set = set()
+                    for s, t in zip(sources, targets):
+                        edge_set.add((min(s, t), max(s, t)))
+                    self._edge_set = edge_set
+        return self._edge_set
+
+    def base_descriptions(self) -> DescriptionIndex:
+        if self._base_desc is None:
+            with self._lock:
+                if self._base_desc is None:
+                    self._load_ddi_descriptions()
+        return self._base_desc
+
+    def descriptions(self) -> DescriptionIndex:
+        if self.overlay is None:
+            return self.base_descriptions()
+        self._apply_overlay()
+        return self._ddi_desc
+
+    def degrees(self) -> np.ndarray:
+        if self._degrees is None:
+            with self._lock:
+                if self._degrees is None:
+                    if self.source == "bundle":
+                        self._degrees = self._bundle.degrees()
+                    elif self.source == "artifacts":
+                        # node_degrees.csv holds the same both-directions counts as below
+                        table = pd.read_csv(_DEGREES_PATH)
+                        degrees = np.zeros(self.num_drugs(), dtype=np.int32)
+                        degrees[table["node_idx"].to_numpy()] = table["degree"].to_numpy()
+                        self._degrees = degrees
+                    else:
+                        graph = self._load_dataset()[0]
+                        edge_index = np.asarray(graph["edge_index"])
+                        self._degrees = np.bincount(
+                            edge_index.ravel(), minlength=graph["num_nodes"]
+                        ).astype(np.int32)
+        return self._degrees
+
+    def severity_rule(self) -> SeverityRule:
+        if self._severity_rule is None:
+            with self._lock:
+                if self._severity_rule is None:
+                    path = self._severity_rules_path
+                    self._severity_rule = SeverityRule.from_file(path) if path else SeverityRule()
+        return self._severity_rule
+
+    def base_edge_severity(self) -> np.ndarray:
+        if self._base_severity is None:
+            with self._lock:
+                if self._base_severity is None:
+                    rule = self.severity_rule()
+                    meta = self._bundle.meta if self._bundle is not None else {}
+                    if ("severity_rule" in meta
+                            and SeverityRule.from_meta(meta["severity_rule"]) == rule):
+                        self._base_severity = self._bundle.edge_severity()
+                    else:
+                        descriptions = self.base_descriptions() if rule.keyword_tiers else None
+                        self._base_severity = rule.classify(self.base_adjacency(),
+                                                            self.degrees(), descriptions)
+        return self._base_severity
+
+    def edge_severity(self) -> np.ndarray:
+        if self.overlay is None:
+            return self.base_edge_severity()
+        self._apply_overlay()
+        return self._edge_severity
+
+
+# ── Snapshot management ──────────────────────────────────────────────────────── #
+
+def get_knowledge_graph() -> KnowledgeGraph:
+    """The current snapshot; opened (not yet loaded) on first call."""
+    global _current, _version
+    if _current is None:
+        with _init_lock:
+            if _current is None:
+                _version += 1
+                _current = KnowledgeGraph.open(_version)
+    return _current
+
+
+def reload(bundle_path: str = None, background: bool = False):
+    """
+    Build a new snapshot from the files on disk now (e.g. after `python -m
+    engines.kg_bundle build` or an overlay edit), load it fully while the
+    current one keeps serving, then swap it in. If the base files are
+    unchanged, only the overlay is re-applied. The overlay is validated
+    before the swap: if it is malformed or does not fit the base, the error
+    is logged and raised (OverlayError) and the current snapshot keeps
+    serving. Returns the new KnowledgeGraph, or with background=True the
+    Thread doing the work.
+    """
+    if background:
+        thread = threading.Thread(target=reload, args=(bundle_path,),
+                                  name="medigraph-reload", daemon=True)
+        thread.start()
+        return thread
+
+    global _current, _version
+    with _reload_lock:
+        with _init_lock:
+            _version += 1
+            version = _version
+        bundle_path = bundle_path or _BUNDLE_PATH
+        current = _current
+        try:
+            if current is not None and current.base_signature == _base_signature(bundle_path):
+                graph = current.with_overlay(version, _read_overlay(_OVERLAY_PATH))
+            else:
+                graph = KnowledgeGraph.open(version, bundle_path, _OVERLAY_PATH, strict=True)
+            graph.validate_overlay()
+        except OverlayError as exc:
+            _log.error("reload rejected, still serving version %s: %s",
+                       current.version if current is not None else None, exc)
+            raise
+        graph.warm()
+        with _init_lock:
+            old, _current = _current, graph
+        for callback in list(_listeners):
+            callback(old, graph)
+    return graph
+
+
+def _base_signature(bundle_path: str) -> tuple:
+    paths = (bundle_path, _NAMES_PATH, _EDGES_PATH, _DEGREES_PATH)
+    return (bundle_path,) + tuple(os.stat(p).st_mtime_ns if os.path.exists(p) else None
+                                  for p in paths)
+
+
+def _files_signature(bundle_path: str) -> tuple:
+    overlay = os.stat(_OVERLAY_PATH).st_mtime_ns if os.path.exists(_OVERLAY_PATH) else None
+    return _base_signature(bundle_path) + (overlay,)
+
+
+def start_watcher(interval: float = 30.0, bundle_path: str = None) -> threading.Thread:
+    """
+    Check the bundle, artifact and overlay files every `interval` seconds and
+    reload() when any of them changed; idempotent. A failed reload keeps the current
+    snapshot and is reported by reload_status().
+    """
+    global _watcher
+    bundle_path = bundle_path or _BUNDLE_PATH
+
+    def watch():
+        global _reload_error
+        seen = _files_signature(bundle_path)
+        while True:
+            time.sleep(interval)
+            signature = _files_signature(bundle_path)
+            if signature == seen:
+                continue
+            seen = signature
+            try:
+                reload(bundle_path)
+                _reload_error = None
+            except Exception as exc:
+                _reload_error = f"{type(exc).__name__}: {exc}"
+                _log.warning("reload failed, keeping the current snapshot: %s", _reload_error)
+
+    with _init_lock:
+        if _watcher is None:
+            _watcher = threading.Thread(target=watch, name="medigraph-watcher", daemon=True)
+            _watcher.start()
+    return _watcher
+
+
+def reload_status() -> dict:
+    """
+    {"version", "source", "built_at", "overlay", "overlay_error", "reload_error"}
+    of the current snapshot; overlay_error says why its overlay was dropped.
+    """
+    graph = get_knowledge_graph()
+    return {
+        "version":       graph.version,
+        "source":        graph.source,
+        "built_at":      graph.meta.get("built_at"),
+        "overlay":       graph.overlay_stats(),
+        "overlay_error": graph.overlay_error,
+        "reload_error":  _reload_error,
+    }
+
+
+def on_swap(callback):
+    """Register callback(old, new), run after every reload() swap (e.g. to drop caches)."""
+    _listeners.append(callback)
+    return callback
 
 
 # ── Public API ───────────────────────────────────────────────────────────────── #
 
 def get_num_drugs() -> int:
-    ds = _load_dataset()
-    return ds[0]["num_nodes"]
+    return get_knowledge_graph().num_drugs()
 
 
 def get_drug_names() -> list:
-    _build_name_maps()
-    return _drug_names
+    return get_knowledge_graph().drug_names()
 
 
 def get_name_to_id() -> dict:
-    _build_name_maps()
-    return _name_to_id
+    return get_knowledge_graph().name_to_id()
 
 
 def get_idx_to_db() -> dict:
-    _build_name_maps()
-    return _idx_to_db
+    return get_knowledge_graph().idx_to_db()
+
+
+def get_name_index() -> NameIndex:
+    return get_knowledge_graph().name_index()
+
+
+def get_adjacency():
+    return get_knowledge_graph().adjacency()
+
+
+def get_packed_adjacency() -> PackedAdjacency:
+    """Bit-packed n x n matrix of the same edges as get_adjacency() (~2.3 MB)."""
+    return get_knowledge_graph().packed_adjacency()
 
 
 def get_interaction_edge_set() -> set:
-    global _edge_set
-    if _edge_set is None:
-        ds = _load_dataset()
-        graph = ds[0]
-        edge_index = graph["edge_index"]
-        sources = edge_index[0].tolist()
-        targets = edge_index[1].tolist()
-        _edge_set = set()
-        for s, t in zip(sources, targets):
-            _edge_set.add((min(s, t), max(s, t)))
-    return _edge_set
-
-
-def get_ddi_descriptions() -> dict:
-    _build_ddi_descriptions()
-    return _ddi_desc
-
-
-def get_node_degrees() -> dict:
-    ds = _load_dataset()
-    graph = ds[0]
-    edge_index = graph["edge_index"]
-    degrees: dict = {}
-    for node_id in edge_index[0].tolist() + edge_index[1].tolist():
-        degrees[node_id] = degrees.get(node_id, 0) + 1
-    return degrees
-
-
-def get_severity(node_id_a: int, node_id_b: int, degrees: dict) -> str:
-    deg_a = degrees.get(node_id_a, 0)
-    deg_b = degrees.get(node_id_b, 0)
-    if deg_a > _HIGH_DEGREE_THRESHOLD or deg_b > _HIGH_DEGREE_THRESHOLD:
-        return "Severe"
-    return "Moderate"
+    return get_knowledge_graph().interaction_edge_set()
+
+
+def get_ddi_descriptions() -> DescriptionIndex:
+    return get_knowledge_graph().descriptions()
+
+
+def get_node_degrees() -> np.ndarray:
+    """
+    Degree of every node, counted over both rows of the (undirected) edge_index.
+    Built once with a single bincount and kept in memory; index by node_idx.
+    """
+    return get_knowledge_graph().degrees()
+
+
+def get_severity_rule() -> SeverityRule:
+    return get_knowledge_graph().severity_rule()
+
+
+def get_edge_severity() -> np.ndarray:
+    """
+    Severity of every edge slot of get_adjacency(), as uint8 indexes into
+    SEVERITY_LEVELS. Taken from the bundle when it was compiled with the
+    current rule; otherwise classified once here.
+    """
+    return get_knowledge_graph().edge_severity()
+
+
+def get_severity(node_id_a: int, node_id_b: int, degrees: np.ndarray = None) -> str:
+    """
+    Severity of one pair: the edge's precomputed severity, or the degree rule
+    for pairs that do not interact. `degrees` is accepted for compatibility.
+    """
+    graph = get_knowledge_graph()
+    slot = graph.adjacency().find(node_id_a, node_id_b)
+    if slot >= 0:
+        return SEVERITY_LEVELS[graph.edge_severity()[slot]]
+    code = graph.severity_rule().degree_codes(node_id_a, node_id_b, graph.degrees())
+    return SEVERITY_LEVELS[int(code)]
+
+
+def get_severity_codes(node_ids_a, node_ids_b, degrees: np.ndarray = None) -> np.ndarray:
+    """Vectorized get_severity(): uint8 indexes into SEVERITY_LEVELS."""
+    graph = get_knowledge_graph()
+    a = np.asarray(node_ids_a, dtype=np.int64)
+    b = np.asarray(node_ids_b, dtype=np.int64)
+    slots = graph.adjacency().find_many(a, b)
+    codes = graph.severity_rule().degree_codes(a, b, graph.degrees())
+    on_edge = slots >= 0
+    codes[on_edge] = graph.edge_severity()[slots[on_edge]]
+    return codes
@@ -0,0 +1,106 @@
+"""
+descriptions.py
+---------------
+Template-compressed store of ogbl-ddi interaction descriptions.
+
+The OGB sentences are highly repetitive ("X may increase the anticoagulant
+activities of Y."), so each one is factored into a template with two drug
+slots. Only the unique templates are kept, in a StringTable. Each edge slot
+of the CSR adjacency gets one int32 code:
+
+    code = template_id * 2 + flipped      (-1 when no description is known)
+
+`flipped` is 0 when the first slot holds the slot's row drug and 1 when it
+holds the column drug. Text is rendered only for the conflicts a caller
+actually returns.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .string_table import StringTable
+
+# Control characters never occur in the OGB text, so they are safe slot markers.
+FIRST_SLOT  = "\x01"
+SECOND_SLOT = "\x02"
+
+
+def _to_template(text: str, first_name: str, second_name: str) -> str:
+    # Replace the longer name first so "Estradiol" cannot eat "Estradiol valerate".
+    if len(first_name) >= len(second_name):
+        return text.replace(first_name, FIRST_SLOT).replace(second_name, SECOND_SLOT)
+    return text.replace(second_name, SECOND_SLOT).replace(first_name, FIRST_SLOT)
+
+
+class DescriptionIndex:
+    """Per-edge-slot template codes (int32) plus the interned template table."""
+
+    def __init__(self, codes: np.ndarray, templates: StringTable):
+        self.codes     = codes
+        self.templates = templates
+
+    @classmethod
+    def empty(cls, num_slots: int) -> "DescriptionIndex":
+        return cls(np.full(num_slots, -1, dtype=np.int32), StringTable.from_strings([]))
+
+    @classmethod
+    def from_frame(cls, desc: pd.DataFrame, db_to_idx: dict, adjacency) -> "DescriptionIndex":
+        """
+        Build from the OGB description frame ("first drug id", "first drug name",
+        "second drug id", "second drug name", "description"). Rows that are not
+        edges of `adjacency` are dropped; when a pair is described more than once,
+        in either direction, the last row wins for both of its slots.
+        """
+        a = desc["first drug id"].map(db_to_idx)
+        b = desc["second drug id"].map(db_to_idx)
+        known = (a.notna() & b.notna()).to_numpy()
+        a = a.to_numpy()[known].astype(np.int64)
+        b = b.to_numpy()[known].astype(np.int64)
+        pos_ab = adjacency.find_many(a, b)
+        on_edge = pos_ab >= 0
+
+        rows = desc.loc[known].loc[on_edge]
+        pos_ab = pos_ab[on_edge]
+        pos_ba = adjacency.find_many(b[on_edge], a[on_edge])
+
+        template_per_row = [
+            _to_template(str(text), str(first), str(second))
+            for text, first, second in zip(rows["description"], rows["first drug name"],
+                                           rows["second drug name"])
+        ]
+        template_ids, templates = pd.factorize(pd.Series(template_per_row, dtype=object))
+
+        # Each row writes its a->b slot unflipped and its b->a slot flipped.
+        # Both passes are ranked together by row position, so (A, B) then
+        # (B, A) ends with (B, A)'s text on both slots.
+        num_rows = len(pos_ab)
+        pos = np.concatenate([pos_ab, pos_ba])
+        row = np.concatenate([np.arange(num_rows), np.arange(num_rows)])
+        flipped = np.repeat([0, 1], num_rows)
+        # Last row first, so np.unique's first occurrence is the winner
+        order = np.lexsort((flipped, row))[::-1]
+        slots, first_seen = np.unique(pos[order], return_index=True)
+        winner = order[first_seen]
+
+        codes = np.full(len(adjacency.indices), -1, dtype=np.int32)
+        codes[slots] = template_ids[row[winner]] * 2 + flipped[winner]
+        return cls(codes, StringTable.from_strings(templates))
+
+    def __len__(self) -> int:
+        """Number of edge slots with a description (each edge has two slots)."""
+        return int(np.count_nonzero(self.codes >= 0))
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.templates.nbytes
+
+    def render(self, slot: int, row_name: str, col_name: str, default=None):
+        """Description for edge slot `slot` whose row/column drugs are the given names."""
+        if slot < 0:
+            return default
+        code = int(self.codes[slot])
+        if code < 0:
+            return default
+        first, second = (col_name, row_name) if code & 1 else (row_name, col_name)
+        template = self.templates[code >> 1]
+        return template.replace(FIRST_SLOT, first).replace(SECOND_SLOT, second)
@@ -1,11 +1,23 @@
 """
 graph_engine.py (NetworkX + Pyvis)
 ------------------------------------
-Builds an interactive drug interaction graph using NetworkX and Pyvis.
+Builds an interactive drug interaction graph.
+
+  - render_graph(drugs, conflicts) -> compact JSON nodes/edges payload in the
+                                      static templates/graph.html page; memoized
+  - build_graph(drugs, conflicts)  -> full Pyvis page via NetworkX (original path)
 """
 
-import networkx as nx
-from pyvis.network import Network
+import json
+import os
+
+from .lru_cache import LRUCache
+
+_TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates", "graph.html")
+_template = None
+
+# (drugs, conflicts) key -> rendered page
+_render_cache = LRUCache(int(os.environ.get("MEDIGRAPH_GRAPH_CACHE", 256)))
 
 
 # Severity → color mapping
@@ -31,6 +43,9 @@ def build_graph(drugs: list[str], conflicts: list[dict]) -> str:
     Returns:
         HTML string (the full Pyvis graph page) to embed in Streamlit.
     """
+    import networkx as nx
+    from pyvis.network import Network
+
     G = nx.Graph()
 
     # Determine which drugs have conflicts
@@ -91,3 +106,56 @@ def build_graph(drugs: list[str], conflicts: list[dict]) -> str:
     # Return HTML string
     html = net.generate_html()
     return html
+
+
+def graph_payload(drugs: list[str], conflicts: list[dict]) -> dict:
+    """
+    The nodes/edges of build_graph() as compact JSON-able lists: drugs by
+    position, edges as [i, j, level index, text index]. Descriptions are
+    stored once per distinct text, with the pair's names swapped for \\x01
+    (drug1) and \\x02 (drug2), so "<a> may increase ... <b>" repeats as one entry.
+    """
+    nodes = {}
+    for drug in drugs:
+        nodes.setdefault(drug, len(nodes))
+    conflict = [0] * len(nodes)
+    levels, texts, edges = {}, {}, []
+    for c in conflicts:
+        i = nodes.setdefault(c["drug1"], len(nodes))
+        j = nodes.setdefault(c["drug2"], len(nodes))
+        conflict.extend([0] * (len(nodes) - len(conflict)))
+        conflict[i] = conflict[j] = 1
+        text = c["description"].replace(c["drug1"], "\x01").replace(c["drug2"], "\x02")
+        edges.append([i, j, levels.setdefault(c["severity"], len(levels)),
+                      texts.setdefault(text, len(texts))])
+    return {
+        "drugs":       list(nodes),
+        "conflict":    conflict,
+        "edges":       edges,
+        "levels":      list(levels),
+        "texts":       list(texts),
+        "colors":      {level: SEVERITY_COLORS[level] for level in levels if level in SEVERITY_COLORS},
+        "node_colors": [NODE_SAFE_COLOR, NODE_CONFLICT_COLOR],
+    }
+
+
+def render_graph(drugs: list[str], conflicts: list[dict]) -> str:
+    """
+    Same graph as build_graph(), rendered as the static templates/graph.html
+    page plus an inline JSON payload (no NetworkX or Pyvis). vis-network is
+    loaded from the CDN, so only the payload changes between renders.
+    Memoized on (drugs, conflicts).
+    """
+    global _template
+    key = (tuple(drugs),
+           tuple((c["drug1"], c["drug2"], c["severity"], c["description"]) for c in conflicts))
+    html = _render_cache.get(key)
+    if html is None:
+        if _template is None:
+            with open(_TEMPLATE_PATH, encoding="utf-8") as f:
+                _template = f.read()
+        payload = json.dumps(graph_payload(drugs, conflicts), separators=(",", ":"))
+        # "</" would end the <script> element early
+        html = _template.replace("__GRAPH_DATA__", payload.replace("</", "<\\/"))
+        _render_cache.put(key, html)
+    return html
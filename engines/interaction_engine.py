@@ -1,70 +1,554 @@
 """
 interaction_engine.py (OGB-powered, real drug names)
 ------------------------------------------------------
-Checks for pairwise drug-drug interactions using the OGB ogbl-ddi edge set.
+Checks for pairwise drug-drug interactions using the OGB ogbl-ddi CSR adjacency.
 Drug names are real names (e.g. "Lepirudin") — mapped via OGB CSVs.
+
+  - check_interactions(drugs)           -> list of conflict dicts for one regimen
+                                           (LRU-cached per regimen and per pair)
+  - check_interactions_batch(regimens)  -> columnar conflicts for many regimens
+                                           (optionally across worker processes)
+  - screening_pool(workers)             -> process pool to reuse across batches
+  - conflicts_from_batch(result, n)     -> per-regimen lists of conflict dicts
+  - severity_counts(result, n)          -> (n, 4) conflicts per regimen and tier
+  - warm_index()                        -> load every index the checks touch
+  - start_warmup() / warmup_status()    -> warm_index() on a background thread,
+                                           and a readiness probe for it
+  - configure_cache() / cache_stats() / clear_cache()
+  - RegimenSession                      -> regimen edited one drug at a time, with
+                                           conflicts, warnings and risk kept current
 """
 
-from .data_loader import (
-    get_interaction_edge_set,
-    get_node_degrees,
-    get_severity,
-    get_name_to_id,
-    get_idx_to_db,
-    get_ddi_descriptions,
+import itertools
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .data_loader import SEVERITY_LEVELS, KnowledgeGraph, get_knowledge_graph, on_swap
+from .lru_cache import LRUCache
+from .neighbor_engine import get_neighbor_index
+from .risk_engine import (
+    AGE_WARNING_POINTS,
+    GENDER_WARNING_POINTS,
+    conflict_points,
+    risk_from_points,
 )
+from .validation_engine import RuleIndex
+
+# check_interactions() result caches. Regimens are keyed by the graph version
+# and the sorted tuple of resolved node ids; the pair cache holds the severity
+# and rendered descriptions of interacting pairs, keyed by (version, lower id,
+# higher id). A size of 0 disables a cache.
+_regimen_cache = LRUCache(int(os.environ.get("MEDIGRAPH_REGIMEN_CACHE", 4096)))
+_pair_cache    = LRUCache(int(os.environ.get("MEDIGRAPH_PAIR_CACHE", 65536)))
 
 
 def check_interactions(drugs: list) -> list:
     """
     Check all pairwise interactions among the provided list of real drug names.
 
+    Results are cached by the set of resolved drugs, so reordering a regimen
+    is a cache hit, and per interacting pair, so a regimen that differs by one
+    drug reuses the severity and description text of the pairs it shares.
+    Interacting pairs are found with CSRAdjacency.edges_within(), which picks
+    pairwise lookups or neighbour-array intersection by regimen size and
+    degree. Output order always follows `drugs`.
+
+    The whole call runs against one knowledge-graph snapshot, even if
+    data_loader.reload() swaps in a new one meanwhile.
+
     Args:
         drugs: List of real drug name strings, e.g. ['Lepirudin', 'Cetuximab']
 
     Returns:
         List of conflict dicts: {drug1, drug2, severity, description}
     """
-    edge_set   = get_interaction_edge_set()
-    degrees    = get_node_degrees()
-    name_to_id = get_name_to_id()
-    idx_to_db  = get_idx_to_db()
-    ddi_desc   = get_ddi_descriptions()
+    graph = get_knowledge_graph()
+    name_to_id = graph.name_to_id()
+    known = [(name, name_to_id[name]) for name in drugs if name in name_to_id]
+
+    key = (graph.version, tuple(sorted(node_id for _, node_id in known)))
+    pairs = _regimen_cache.get(key)
+    if pairs is None:
+        pairs = _regimen_pairs(graph, key[1])
+        _regimen_cache.put(key, pairs)
+
+    # Walk the interacting pairs only (not all n^2 input pairs), emitted in
+    # input order; a drug listed twice pairs with others at each position.
+    positions = {}
+    for i, (_, node_id) in enumerate(known):
+        positions.setdefault(node_id, []).append(i)
+    found = []
+    for (id_lo, id_hi), entry in pairs.items():
+        for p in positions[id_lo]:
+            for q in positions[id_hi]:
+                found.append((p, q, entry) if p < q else (q, p, entry))
+    found.sort()        # (i, j) pairs are unique, so entries are never compared
 
     conflicts = []
+    for i, j, entry in found:
+        name_a, id_a = known[i]
+        name_b, id_b = known[j]
+        conflicts.append({
+            "drug1":       name_a,
+            "drug2":       name_b,
+            "severity":    entry[0],
+            "description": _pair_description(graph, entry, id_a <= id_b, id_a, id_b,
+                                             name_a, name_b),
+        })
+
+    return conflicts
 
-    num_drugs = len(drugs)
-    for i in range(num_drugs):
-        for j in range(i + 1, num_drugs):
-            name_a = drugs[i]
-            name_b = drugs[j]
 
-            id_a = name_to_id.get(name_a, -1)
-            id_b = name_to_id.get(name_b, -1)
+def _regimen_pairs(graph: KnowledgeGraph, ids: tuple) -> dict:
+    """{(lo, hi): pair entry} for every interacting pair among the sorted `ids`."""
+    lo, hi, slots = graph.adjacency().edges_within(ids)
+    return {(id_lo, id_hi): _pair_entry(graph, id_lo, id_hi, slot)
+            for id_lo, id_hi, slot in zip(lo.tolist(), hi.tolist(), slots.tolist())}
 
-            if id_a == -1 or id_b == -1:
-                continue
 
-            pair = (min(id_a, id_b), max(id_a, id_b))
+def _pair_entry(graph: KnowledgeGraph, id_lo: int, id_hi: int, slot: int) -> list:
+    """Cached [severity, lo->hi slot, description lo-first, description hi-first]."""
+    key = (graph.version, id_lo, id_hi)
+    entry = _pair_cache.get(key)
+    if entry is None:
+        entry = [SEVERITY_LEVELS[graph.edge_severity()[slot]], slot, None, None]
+        _pair_cache.put(key, entry)
+    return entry
 
-            if pair in edge_set:
-                severity = get_severity(id_a, id_b, degrees)
 
-                # Try to get the real description from OGB data
-                db_a = idx_to_db.get(id_a, "")
-                db_b = idx_to_db.get(id_b, "")
-                db_key = (min(db_a, db_b), max(db_a, db_b))
-                description = ddi_desc.get(
-                    db_key,
-                    f"A known drug interaction exists between {name_a} and {name_b} "
-                    f"according to the OGB ogbl-ddi FDA interaction graph."
-                )
+def _pair_description(graph: KnowledgeGraph, entry: list, forward: bool, id_a: int, id_b: int,
+                      name_a: str, name_b: str) -> str:
+    # Rendered on first use per direction; the two slots of an edge may hold
+    # descriptions from different OGB rows.
+    index = 2 if forward else 3
+    if entry[index] is None:
+        slot = entry[1] if forward else graph.adjacency().find(id_a, id_b)
+        entry[index] = graph.descriptions().render(
+            slot, name_a, name_b, _fallback_description(name_a, name_b)
+        )
+    return entry[index]
 
-                conflicts.append({
-                    "drug1":       name_a,
-                    "drug2":       name_b,
-                    "severity":    severity,
-                    "description": description,
-                })
 
-    return conflicts
+def configure_cache(regimens: int = None, pairs: int = None):
+    """Resize the regimen and/or pair result caches (0 disables one)."""
+    if regimens is not None:
+        _regimen_cache.resize(regimens)
+    if pairs is not None:
+        _pair_cache.resize(pairs)
+
+
+def cache_stats() -> dict:
+    """Hit/miss/eviction counters and sizes of both result caches."""
+    return {"regimens": _regimen_cache.stats(), "pairs": _pair_cache.stats()}
+
+
+def clear_cache():
+    """Drop all cached results and reset the counters."""
+    _regimen_cache.clear()
+    _pair_cache.clear()
+
+
+# Entries for a replaced snapshot can never be hit again (keys carry the
+# version), so free them as soon as data_loader.reload() swaps.
+on_swap(lambda old, new: clear_cache())
+
+
+class RegimenSession:
+    """
+    A regimen edited one drug at a time, as in the UI.
+
+    The session keeps the current conflicts, per-drug patient warnings and the
+    raw risk points. add() checks only the new drug's pairs against the
+    existing drugs with one find_many() call, and remove() drops only that
+    drug's conflicts. Each edit costs O(n) instead of re-running
+    check_interactions(), validate_patient() and calculate_risk() over the
+    whole regimen.
+
+    Each drug is held once, in the order it was added. For such a list,
+    `conflicts`, `age_warnings`, `gender_warnings` and `risk()` equal
+    check_interactions(), validate_patient() and calculate_risk() run from
+    scratch. After a data_loader.reload() swap, the next add() or sync()
+    rebuilds the session against the new snapshot.
+    """
+
+    def __init__(self, rules=None, patient: dict = None):
+        # `rules` is a validation_engine.RuleIndex or a drugs.json-style list
+        self.rules    = rules if isinstance(rules, RuleIndex) else RuleIndex(rules or [])
+        self.patient  = dict(patient or {})
+        self._graph    = None # KnowledgeGraph the node ids and conflicts came from
+        self._drugs    = {}   # name -> node id (-1 if unknown), in insertion order
+        self._partners = {}   # name -> {other name: shared conflict dict}
+        self._warnings = {}   # name -> (age warnings, gender warnings)
+        self._points   = 0    # conflict points, see risk_engine.conflict_points()
+        self._num_age_warnings    = 0
+        self._num_gender_warnings = 0
+
+    def __len__(self) -> int:
+        return len(self._drugs)
+
+    def __contains__(self, name) -> bool:
+        return name in self._drugs
+
+    @property
+    def drugs(self) -> list:
+        return list(self._drugs)
+
+    def add(self, name: str) -> list:
+        """Add one drug; returns the conflicts it introduced (empty if already present)."""
+        graph = self._current_graph()
+        if name in self._drugs:
+            return []
+
+        new_id = graph.name_to_id().get(name, -1)
+        partners = self._partners[name] = {}
+        others = [(other, other_id) for other, other_id in self._drugs.items() if other_id >= 0]
+        added = []
+        if new_id >= 0 and others:
+            other_ids = np.array([other_id for _, other_id in others], dtype=np.int64)
+            slots = graph.adjacency().find_many(np.minimum(other_ids, new_id),
+                                                np.maximum(other_ids, new_id))
+            for (other, other_id), slot in zip(others, slots.tolist()):
+                if slot < 0:
+                    continue
+                forward = other_id <= new_id
+                entry = _pair_entry(graph, min(other_id, new_id), max(other_id, new_id), slot)
+                conflict = {
+                    "drug1":       other,
+                    "drug2":       name,
+                    "severity":    entry[0],
+                    "description": _pair_description(graph, entry, forward, other_id, new_id,
+                                                     other, name),
+                }
+                partners[other] = self._partners[other][name] = conflict
+                self._points += conflict_points(conflict)
+                added.append(conflict)
+
+        self._drugs[name] = new_id
+        self._validate(name)
+        return added
+
+    def remove(self, name: str) -> list:
+        """Remove one drug; returns the conflicts that went with it."""
+        if name not in self._drugs:
+            return []
+        del self._drugs[name]
+        partners = self._partners.pop(name)
+        for other, conflict in partners.items():
+            del self._partners[other][name]
+            self._points -= conflict_points(conflict)
+        age_warnings, gender_warnings = self._warnings.pop(name)
+        self._num_age_warnings    -= len(age_warnings)
+        self._num_gender_warnings -= len(gender_warnings)
+        return list(partners.values())
+
+    def sync(self, drugs: list) -> "RegimenSession":
+        """Add and remove drugs so the session holds exactly `drugs`."""
+        self._current_graph()
+        wanted = dict.fromkeys(drugs)
+        for name in [name for name in self._drugs if name not in wanted]:
+            self.remove(name)
+        for name in wanted:
+            self.add(name)
+        return self
+
+    def _current_graph(self) -> KnowledgeGraph:
+        # Node ids and conflicts belong to one snapshot; after a swap, re-add
+        # every drug against the new one.
+        graph = get_knowledge_graph()
+        if graph is not self._graph:
+            drugs, self._graph = list(self._drugs), graph
+            self._drugs, self._partners, self._warnings = {}, {}, {}
+            self._points = self._num_age_warnings = self._num_gender_warnings = 0
+            for name in drugs:
+                self.add(name)
+        return graph
+
+    def set_patient(self, patient: dict):
+        """Update the patient; warnings are re-validated only if it changed."""
+        patient = dict(patient or {})
+        if patient != self.patient:
+            self.patient = patient
+            for name in self._drugs:
+                self._validate(name)
+
+    def set_rules(self, rules: RuleIndex):
+        """Swap in a new RuleIndex (e.g. after the rules file changed) and re-validate."""
+        if rules is not self.rules:
+            self.rules = rules
+            for name in self._drugs:
+                self._validate(name)
+
+    def _validate(self, name: str):
+        old_age, old_gender = self._warnings.get(name, ([], []))
+        age_warnings, gender_warnings = self.rules.validate(self.patient, [name])
+        self._warnings[name] = (age_warnings, gender_warnings)
+        self._num_age_warnings    += len(age_warnings) - len(old_age)
+        self._num_gender_warnings += len(gender_warnings) - len(old_gender)
+
+    @property
+    def conflicts(self) -> list:
+        """Current conflicts, in check_interactions() order for self.drugs."""
+        position = {name: i for i, name in enumerate(self._drugs)}
+        conflicts = []
+        for name in self._drugs:
+            later = [(position[other], conflict)
+                     for other, conflict in self._partners[name].items()
+                     if position[other] > position[name]]
+            conflicts.extend(conflict for _, conflict in sorted(later, key=lambda p: p[0]))
+        return conflicts
+
+    @property
+    def age_warnings(self) -> list:
+        return [w for name in self._drugs for w in self._warnings[name][0]]
+
+    @property
+    def gender_warnings(self) -> list:
+        return [w for name in self._drugs for w in self._warnings[name][1]]
+
+    def risk(self) -> tuple:
+        """(risk_score, risk_level) as calculate_risk() would compute it, in O(1)."""
+        return risk_from_points(self._points
+                                + self._num_age_warnings * AGE_WARNING_POINTS
+                                + self._num_gender_warnings * GENDER_WARNING_POINTS)
+
+
+def _fallback_description(name_a: str, name_b: str) -> str:
+    return (f"A known drug interaction exists between {name_a} and {name_b} "
+            f"according to the OGB ogbl-ddi FDA interaction graph.")
+
+
+_BATCH_COLUMNS = ("regimen_id", "drug_a", "drug_b", "severity", "slot", "description_id")
+# Regimens per pool task when the input's length is unknown
+_POOL_CHUNK_SIZE = 10_000
+
+
+def check_interactions_batch(regimens, workers: int = 1, chunk_size: int = None,
+                             graph: KnowledgeGraph = None, pool=None) -> dict:
+    """
+    Screen many regimens in one vectorized pass.
+
+    Names are resolved once for the whole batch, every candidate pair is built
+    as NumPy arrays (grouped by regimen size), and edge membership is tested
+    with a single CSRAdjacency.find_many() call. Unknown names are skipped,
+    exactly as in check_interactions().
+
+    With workers > 1 the regimens are read chunk by chunk and
+    screened in a process pool, with a few chunks in flight per worker, so an
+    iterator is never held in memory whole. Workers are started with
+    forkserver (spawn where that is missing), never forked from this process,
+    whose warm-up and watcher threads may hold the snapshot lock; each loads
+    the index once in its initializer, from the bundle's shared mmap pages
+    when there is one. Chunks are merged in input order.
+
+    Args:
+        regimens:   Iterable of drug-name lists, one per patient.
+        workers:    Number of worker processes (1 = screen in this process).
+        chunk_size: Regimens per task; defaults to about 4 tasks per worker
+                    for a sized input, else _POOL_CHUNK_SIZE.
+        graph:      Snapshot to screen against (default: the current one).
+                    Pass the same one to conflicts_from_batch(). Worker
+                    processes only see the current snapshot, so an older
+                    one is always screened in this process.
+        pool:       An open screening_pool(workers) to reuse across calls
+                    instead of starting workers for this one.
+
+    Returns:
+        Dict of equal-length NumPy columns, ordered like check_interactions()
+        output within each regimen:
+          regimen_id     (int64)  position of the regimen in `regimens`
+          drug_a, drug_b (int32)  node ids, drug_a listed first in the regimen
+          severity       (uint8)  index into data_loader.SEVERITY_LEVELS
+          slot           (int64)  CSR edge slot of (drug_a, drug_b)
+          description_id (int32)  template code at that slot, -1 if none;
+                                  render text with get_ddi_descriptions().render()
+    """
+    graph = graph or get_knowledge_graph()
+    if workers <= 1 or graph is not get_knowledge_graph():
+        return _screen_regimens(list(regimens), graph)
+
+    if pool is None:
+        with screening_pool(workers) as own_pool:
+            return check_interactions_batch(regimens, workers, chunk_size, graph, own_pool)
+
+    if chunk_size is None:
+        chunk_size = (-(-len(regimens) // (workers * 4)) if hasattr(regimens, "__len__")
+                      else _POOL_CHUNK_SIZE)
+    regimens = iter(regimens)
+    parts, pending, offset = [], deque(), 0
+    while True:
+        chunk = list(itertools.islice(regimens, max(chunk_size, 1)))
+        if chunk:
+            pending.append((offset, pool.submit(_screen_regimens, chunk)))
+            offset += len(chunk)
+        # Bound the chunks held in memory; collect in input order
+        while pending and (len(pending) > 2 * workers or not chunk):
+            start, future = pending.popleft()
+            part = future.result()
+            part["regimen_id"] += start
+            parts.append(part)
+        if not chunk:
+            break
+    if not parts:
+        return _screen_regimens([], graph)
+    return {col: np.concatenate([part[col] for part in parts]) for col in _BATCH_COLUMNS}
+
+
+def screening_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool for check_interactions_batch(pool=...), safe to start with threads running."""
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=warm_index)
+
+
+def warm_index():
+    """Load every index check_interactions_batch() touches (pool initializer)."""
+    graph = get_knowledge_graph()
+    graph.adjacency().find_many([0], [0])
+    graph.edge_severity()
+    graph.name_to_id()
+    graph.descriptions()
+
+
+# Background warm-up: started once per process, watched by warmup_status()
+_warmup_lock   = threading.Lock()
+_warmup_thread = None
+_warmup_done   = threading.Event()
+_warmup_error  = None
+
+
+def start_warmup() -> threading.Thread:
+    """
+    Load every index of the current snapshot (KnowledgeGraph.warm()) and the
+    shared-partner thresholds (neighbor_engine) on a daemon thread so they are
+    ready before the first request; idempotent. Requests that
+    arrive earlier wait on the same single-flight builds in data_loader
+    instead of starting their own.
+    """
+    global _warmup_thread
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=_warm_up, name="medigraph-warmup", daemon=True)
+            _warmup_thread.start()
+    return _warmup_thread
+
+
+def _warm_up():
+    global _warmup_error
+    try:
+        graph = get_knowledge_graph().warm()
+        get_neighbor_index(graph).thresholds()
+    except Exception as exc:
+        _warmup_error = exc
+    finally:
+        _warmup_done.set()
+
+
+def warmup_status(timeout: float = None) -> dict:
+    """
+    Readiness probe: {"started", "ready", "error"}. ready is True once the
+    background warm-up finished without error; with a timeout, wait up to
+    that many seconds for it first.
+    """
+    if timeout is not None and _warmup_thread is not None:
+        _warmup_done.wait(timeout)
+    done = _warmup_done.is_set()
+    return {
+        "started": _warmup_thread is not None,
+        "ready":   done and _warmup_error is None,
+        "error":   f"{type(_warmup_error).__name__}: {_warmup_error}" if _warmup_error else None,
+    }
+
+
+def _screen_regimens(regimens: list, graph: KnowledgeGraph = None) -> dict:
+    graph      = graph or get_knowledge_graph()
+    adjacency  = graph.adjacency()
+    severity   = graph.edge_severity()
+    name_to_id = graph.name_to_id()
+    ddi_desc   = graph.descriptions()
+
+    lengths = np.fromiter((len(r) for r in regimens), dtype=np.int64, count=len(regimens))
+    flat = [name for regimen in regimens for name in regimen]
+
+    # Resolve each distinct name once
+    codes, uniques = pd.factorize(pd.Series(flat, dtype=object))
+    unique_ids = np.array([name_to_id.get(name, -1) for name in uniques], dtype=np.int64)
+    ids = unique_ids[codes] if len(flat) else np.zeros(0, dtype=np.int64)
+
+    owner = np.repeat(np.arange(len(regimens), dtype=np.int64), lengths)
+    known = ids >= 0
+    ids, owner = ids[known], owner[known]
+    sizes = np.bincount(owner, minlength=len(regimens))
+    starts = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+    a_parts, b_parts, reg_parts, rank_parts = [], [], [], []
+    for size in np.unique(sizes[sizes >= 2]).tolist():
+        regs = np.flatnonzero(sizes == size)
+        members = ids[starts[regs][:, None] + np.arange(size)]        # (k, size)
+        iu, ju = np.triu_indices(size, 1)                             # pair order i < j
+        a_parts.append(members[:, iu].ravel())
+        b_parts.append(members[:, ju].ravel())
+        reg_parts.append(np.repeat(regs, len(iu)))
+        rank_parts.append(np.tile(np.arange(len(iu)), len(regs)))
+
+    empty = np.zeros(0, dtype=np.int64)
+    a    = np.concatenate(a_parts) if a_parts else empty
+    b    = np.concatenate(b_parts) if b_parts else empty
+    reg  = np.concatenate(reg_parts) if reg_parts else empty
+    rank = np.concatenate(rank_parts) if rank_parts else empty
+
+    slots = adjacency.find_many(a, b)
+    hit = slots >= 0
+    a, b, reg, rank, slots = a[hit], b[hit], reg[hit], rank[hit], slots[hit]
+    order = np.lexsort((rank, reg))
+    a, b, reg, slots = a[order], b[order], reg[order], slots[order]
+
+    return {
+        "regimen_id":     reg,
+        "drug_a":         a.astype(np.int32),
+        "drug_b":         b.astype(np.int32),
+        "severity":       severity[slots],
+        "slot":           slots,
+        "description_id": ddi_desc.codes[slots].astype(np.int32),
+    }
+
+
+def severity_counts(result: dict, num_regimens: int) -> np.ndarray:
+    """
+    (num_regimens, len(SEVERITY_LEVELS)) int64 conflict counts per regimen and
+    severity tier, from a check_interactions_batch() result. Feeds
+    risk_engine.calculate_risk_batch() without building conflict dicts.
+    """
+    num_levels = len(SEVERITY_LEVELS)
+    flat = result["regimen_id"] * num_levels + result["severity"]
+    return np.bincount(flat, minlength=num_regimens * num_levels).reshape(num_regimens, num_levels)
+
+
+def conflicts_from_batch(result: dict, num_regimens: int, descriptions: bool = True,
+                         graph: KnowledgeGraph = None) -> list:
+    """
+    Expand check_interactions_batch() columns into check_interactions()-style
+    conflict dicts, one list per regimen. Description text is rendered only
+    when `descriptions` is true. `graph` must be the snapshot the batch was
+    screened against (default: the current one).
+    """
+    graph    = graph or get_knowledge_graph()
+    names    = graph.drug_names()
+    ddi_desc = graph.descriptions()
+
+    per_regimen = [[] for _ in range(num_regimens)]
+    for reg, a, b, sev, slot in zip(result["regimen_id"].tolist(), result["drug_a"].tolist(),
+                                    result["drug_b"].tolist(), result["severity"].tolist(),
+                                    result["slot"].tolist()):
+        conflict = {"drug1": names[a], "drug2": names[b], "severity": SEVERITY_LEVELS[sev]}
+        if descriptions:
+            conflict["description"] = ddi_desc.render(
+                slot, names[a], names[b], _fallback_description(names[a], names[b])
+            )
+        per_regimen[reg].append(conflict)
+    return per_regimen
@@ -0,0 +1,334 @@
+"""
+kg_bundle.py
+------------
+Offline compiler and memory-mapped reader for the knowledge-graph bundle.
+
+The bundle is one versioned binary file holding everything data_loader
+needs: CSR edges, node degrees, per-edge severities (with the SeverityRule
+that produced them in the header), the drug-name and DrugBank-ID string
+tables and the template-compressed description store. Worker processes open it with mmap,
+so they share one page-cache copy and load it in milliseconds.
+
+Layout:
+  magic b"MGKG" | uint32 version | uint64 header length | JSON header
+  followed by 64-byte aligned little-endian arrays described in the header.
+
+Build it once (reads dataset/ogbl_ddi/raw + mapping, never imports torch):
+    python -m engines.kg_bundle build [--out PATH] [--severity-rules JSON]
+    python -m engines.kg_bundle info  [PATH]
+
+The header records the size, mtime and hash of those OGB files ("sources");
+data_loader treats the bundle as stale once any of them changes. After
+regenerating the data/ artifacts, record their sources the same way (this
+also writes the DrugBank IDs into drug_names.csv, so data/ alone is servable):
+    python -m engines.kg_bundle stamp
+
+Fold the local interaction overlay (see overlay.py) into a new base bundle,
+offline, so the overlay can be emptied again:
+    python -m engines.kg_bundle compact [--base PATH] [--overlay CSV] [--out PATH]
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+
+import numpy as np
+import pandas as pd
+
+from .adjacency import CSRAdjacency
+from .descriptions import DescriptionIndex
+from .severity import SeverityRule
+from .string_table import StringTable
+
+BUNDLE_MAGIC   = b"MGKG"
+BUNDLE_VERSION = 3
+_ALIGN = 64
+_PREAMBLE = struct.Struct("<4sIQ")      # magic, version, header length
+
+_BASE_DIR    = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DATASET_DIR = os.path.join(_BASE_DIR, "dataset", "ogbl_ddi")
+DEFAULT_BUNDLE_PATH = os.path.join(_BASE_DIR, "data", "knowledge_graph.bundle")
+DEFAULT_OVERLAY_PATH = os.environ.get("MEDIGRAPH_OVERLAY",
+                                      os.path.join(_BASE_DIR, "data", "interaction_overlay.csv"))
+
+
+class BundleError(ValueError):
+    """The file is not a bundle this code can read (bad magic or version)."""
+
+
+# ── Writing ──────────────────────────────────────────────────────────────────── #
+
+def write_bundle(path: str, arrays: dict, meta: dict):
+    """Write named NumPy arrays plus a JSON-able meta dict; replaces `path` atomically."""
+    sections = {}
+    offset = 0
+    for name, arr in arrays.items():
+        arr = np.ascontiguousarray(arr)
+        sections[name] = {"dtype": arr.dtype.str, "count": int(arr.size), "offset": offset}
+        offset += -(-arr.nbytes // _ALIGN) * _ALIGN
+
+    header = {"version": BUNDLE_VERSION, "meta": meta, "sections": sections}
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = -(-(_PREAMBLE.size + len(header_bytes)) // _ALIGN) * _ALIGN
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(BUNDLE_MAGIC, BUNDLE_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for name, arr in arrays.items():
+            f.seek(data_start + sections[name]["offset"])
+            f.write(np.ascontiguousarray(arr).tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+def _read_num_nodes(edges: np.ndarray) -> int:
+    path = os.path.join(_DATASET_DIR, "raw", "num-node-list.csv.gz")
+    if os.path.exists(path):
+        return int(pd.read_csv(path, header=None).iloc[0, 0])
+    return int(edges.max()) + 1
+
+
+def _compile_names(node2drug: pd.DataFrame, desc) -> list:
+    """Drug names in node order, deduplicated exactly like data_loader does."""
+    from . import data_loader
+
+    if desc is not None:
+        names, _ = data_loader._names_from_frames(node2drug, desc)
+        return names
+    # No description file: reuse the prebuilt name artifact when it is there.
+    names_path = os.path.join(_BASE_DIR, "data", "drug_names.csv")
+    if os.path.exists(names_path):
+        names = pd.read_csv(names_path).sort_values("node_idx")
+        if len(names) == len(node2drug):
+            return names["drug_name"].astype(str).tolist()
+    return node2drug["drug_id"].astype(str).tolist()
+
+
+def compile_bundle(out_path: str = DEFAULT_BUNDLE_PATH, severity_rule: SeverityRule = None) -> dict:
+    """Compile dataset/ogbl_ddi raw + mapping files into one bundle. Returns its meta."""
+    from .data_loader import _source_stamp
+
+    severity_rule = severity_rule or SeverityRule()
+    raw_dir, mapping_dir = os.path.join(_DATASET_DIR, "raw"), os.path.join(_DATASET_DIR, "mapping")
+
+    edges = pd.read_csv(os.path.join(raw_dir, "edge.csv.gz"), header=None)
+    edges = edges.to_numpy(dtype=np.int64).T
+    num_nodes = _read_num_nodes(edges)
+    adjacency = CSRAdjacency.from_edge_index(edges, num_nodes)
+    # OGB serves every edge in both directions; keep get_node_degrees() semantics.
+    degrees = (2 * np.bincount(edges.ravel(), minlength=num_nodes)).astype(np.int32)
+
+    node2drug = pd.read_csv(os.path.join(mapping_dir, "nodeidx2drugid.csv.gz"))
+    node2drug.columns = ["node_idx", "drug_id"]
+    node2drug = node2drug.sort_values("node_idx")
+
+    desc_path = os.path.join(mapping_dir, "ddi_description.csv.gz")
+    desc = pd.read_csv(desc_path) if os.path.exists(desc_path) else None
+
+    names = StringTable.from_strings(_compile_names(node2drug, desc))
+    db_ids = StringTable.from_strings(node2drug["drug_id"].astype(str))
+    if desc is not None:
+        db_to_idx = dict(zip(node2drug["drug_id"], node2drug["node_idx"]))
+        descriptions = DescriptionIndex.from_frame(desc, db_to_idx, adjacency)
+    else:
+        descriptions = DescriptionIndex.empty(len(adjacency.indices))
+    edge_severity = severity_rule.classify(adjacency, degrees, descriptions)
+
+    meta = {
+        "num_nodes":    int(num_nodes),
+        "num_edges":    int(adjacency.num_edges),
+        "described_edges": int(len(descriptions)) // 2,
+        "description_templates": int(len(descriptions.templates)),
+        "severity_rule": severity_rule.to_meta(),
+        "sources":      _source_stamp(),
+        "built_at":     time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    write_bundle(out_path, _bundle_arrays(adjacency, degrees, edge_severity, names, db_ids,
+                                          descriptions), meta)
+    return meta
+
+
+def compact_bundle(out_path: str = DEFAULT_BUNDLE_PATH, base_path: str = DEFAULT_BUNDLE_PATH,
+                   overlay_path: str = DEFAULT_OVERLAY_PATH) -> dict:
+    """
+    Fold an overlay file into a new bundle: the base bundle's edges with the
+    overlay's additions, removals and overrides, as one plain CSR. Severities
+    are kept as served (base rule plus overrides); degrees stay the base's.
+    `out_path` may be the base itself. Returns the new meta.
+    """
+    from .data_loader import KnowledgeGraph
+    from .overlay import InteractionOverlay
+
+    base = open_bundle(base_path)
+    graph = KnowledgeGraph(0, "bundle", base, overlay=InteractionOverlay.from_file(overlay_path))
+    # Grade with the rule the base was compiled with, so its severities are reused as-is
+    graph._severity_rule = SeverityRule.from_meta(base.meta["severity_rule"])
+
+    adjacency, slot_map = graph.adjacency().to_csr()
+    merged = graph.descriptions()
+    descriptions = DescriptionIndex(merged.codes[slot_map], merged.templates)
+    meta = dict(base.meta)
+    meta.update({
+        "num_edges":       int(adjacency.num_edges),
+        "base_num_edges":  int(base.meta.get("base_num_edges", base.meta["num_edges"])),
+        "described_edges": int(len(descriptions)) // 2,
+        "description_templates": int(len(descriptions.templates)),
+        "overlay":         dict(graph.overlay_stats(), path=os.path.abspath(overlay_path)),
+        "built_at":        time.strftime("%Y-%m-%dT%H:%M:%S"),
+    })
+    write_bundle(out_path, _bundle_arrays(adjacency, base.degrees(),
+                                          graph.edge_severity()[slot_map], base.names(),
+                                          base.db_ids(), descriptions), meta)
+    return meta
+
+
+def stamp_artifacts() -> dict:
+    """
+    Record the OGB source files the data/ artifacts match, for data_loader's
+    freshness check, and write the DrugBank IDs into drug_names.csv so the
+    artifacts can be served without the OGB node mapping.
+    """
+    from .data_loader import _ARTIFACT_SOURCES_PATH, _NAMES_PATH, _source_stamp
+
+    mapping_path = os.path.join(_DATASET_DIR, "mapping", "nodeidx2drugid.csv.gz")
+    if os.path.exists(mapping_path):
+        names = pd.read_csv(_NAMES_PATH, usecols=["node_idx", "drug_name"])
+        node2drug = pd.read_csv(mapping_path)
+        node2drug.columns = ["node_idx", "drug_id"]
+        names = names.merge(node2drug, on="node_idx", how="left")
+        names.to_csv(_NAMES_PATH + ".tmp", index=False)
+        os.replace(_NAMES_PATH + ".tmp", _NAMES_PATH)
+
+    stamp = _source_stamp()
+    tmp_path = _ARTIFACT_SOURCES_PATH + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(stamp, f, indent=2)
+        f.write("\n")
+    os.replace(tmp_path, _ARTIFACT_SOURCES_PATH)
+    return stamp
+
+
+def _bundle_arrays(adjacency, degrees, edge_severity, names, db_ids, descriptions) -> dict:
+    return {
+        "indptr":            adjacency.indptr,
+        "indices":           adjacency.indices,
+        "degrees":           degrees,
+        "edge_severity":     edge_severity,
+        "names_offsets":     names.offsets,
+        "names_blob":        names.blob,
+        "db_ids_offsets":    db_ids.offsets,
+        "db_ids_blob":       db_ids.blob,
+        "desc_codes":            descriptions.codes,
+        "desc_template_offsets": descriptions.templates.offsets,
+        "desc_template_blob":    descriptions.templates.blob,
+    }
+
+
+# ── Reading ──────────────────────────────────────────────────────────────────── #
+
+class KnowledgeGraphBundle:
+    """
+    Read-only view of a bundle file. Every array is an np.frombuffer view on
+    one shared mmap, so opening costs a header parse and nothing is copied.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, header_len = _PREAMBLE.unpack_from(self._mmap, 0)
+            if magic != BUNDLE_MAGIC:
+                raise BundleError(f"{path} is not a knowledge-graph bundle")
+            if version != BUNDLE_VERSION:
+                raise BundleError(f"{path} has bundle version {version}, expected {BUNDLE_VERSION}")
+            header = json.loads(self._mmap[_PREAMBLE.size:_PREAMBLE.size + header_len])
+        except Exception:
+            self._mmap.close()
+            raise
+        self.version   = version
+        self.meta      = header["meta"]
+        self._sections = header["sections"]
+        self._data_start = -(-(_PREAMBLE.size + header_len) // _ALIGN) * _ALIGN
+
+    def array(self, name: str) -> np.ndarray:
+        spec = self._sections[name]
+        return np.frombuffer(self._mmap, dtype=np.dtype(spec["dtype"]), count=spec["count"],
+                             offset=self._data_start + spec["offset"])
+
+    @property
+    def num_nodes(self) -> int:
+        return self.meta["num_nodes"]
+
+    def adjacency(self) -> CSRAdjacency:
+        return CSRAdjacency(self.array("indptr"), self.array("indices"))
+
+    def degrees(self) -> np.ndarray:
+        return self.array("degrees")
+
+    def edge_severity(self) -> np.ndarray:
+        return self.array("edge_severity")
+
+    def names(self) -> StringTable:
+        return StringTable(self.array("names_offsets"), self.array("names_blob"))
+
+    def db_ids(self) -> StringTable:
+        return StringTable(self.array("db_ids_offsets"), self.array("db_ids_blob"))
+
+    def descriptions(self) -> DescriptionIndex:
+        templates = StringTable(self.array("desc_template_offsets"),
+                                self.array("desc_template_blob"))
+        return DescriptionIndex(self.array("desc_codes"), templates)
+
+
+def open_bundle(path: str = DEFAULT_BUNDLE_PATH) -> KnowledgeGraphBundle:
+    return KnowledgeGraphBundle(path)
+
+
+# ── CLI ──────────────────────────────────────────────────────────────────────── #
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m engines.kg_bundle",
+                                     description="Compile or inspect the knowledge-graph bundle.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="compile dataset/ogbl_ddi into a bundle")
+    build.add_argument("--out", default=DEFAULT_BUNDLE_PATH)
+    build.add_argument("--severity-rules", default=None,
+                       help="JSON SeverityRule file (default: degree threshold 500)")
+    info = sub.add_parser("info", help="print a bundle's header")
+    info.add_argument("path", nargs="?", default=DEFAULT_BUNDLE_PATH)
+    compact = sub.add_parser("compact", help="fold the interaction overlay into a new bundle")
+    compact.add_argument("--base", default=DEFAULT_BUNDLE_PATH)
+    compact.add_argument("--overlay", default=DEFAULT_OVERLAY_PATH)
+    compact.add_argument("--out", default=None, help="default: replace the base bundle")
+    sub.add_parser("stamp", help="record the OGB files the data/ artifacts were built from")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.perf_counter()
+        rule = SeverityRule.from_file(args.severity_rules) if args.severity_rules else None
+        meta = compile_bundle(args.out, rule)
+        size_mb = os.path.getsize(args.out) / (1024 * 1024)
+        print(f"Wrote {args.out} ({size_mb:.1f} MB) in {time.perf_counter() - start:.1f}s")
+        print(json.dumps(meta, indent=2))
+    elif args.command == "compact":
+        start = time.perf_counter()
+        out = args.out or args.base
+        meta = compact_bundle(out, args.base, args.overlay)
+        print(f"Folded {args.overlay} into {out} in {time.perf_counter() - start:.1f}s; "
+              f"the overlay can now be emptied (re-applying it changes nothing)")
+        print(json.dumps(meta, indent=2))
+    elif args.command == "stamp":
+        print(json.dumps(stamp_artifacts(), indent=2))
+    else:
+        bundle = open_bundle(args.path)
+        print(json.dumps({"version": bundle.version, "meta": bundle.meta,
+                          "sections": bundle._sections}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
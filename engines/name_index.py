@@ -0,0 +1,183 @@
+"""
+name_index.py
+-------------
+Search index over drug names, aliases (e.g. brand names) and DrugBank IDs,
+for autocomplete and typo-tolerant lookup.
+
+  - prefix: bisect over the sorted normalized names, then over the sorted
+    words of every name ("glargine" finds "Insulin Glargine")
+  - typos: character-trigram postings; candidates are ranked by trigram
+    overlap and the best few re-ranked by edit distance; candidates less
+    than _MIN_SIMILARITY similar (1 - distance / longer length) are dropped
+  - DrugBank IDs: exact dict lookup ("db00682" -> node id)
+
+Names are normalized with casefold and punctuation folded to spaces, so
+"co-trimoxazole", "Co Trimoxazole" and "CO-TRIMOXAZOLE" are one key.
+
+    index = NameIndex(names, idx_to_db, aliases={"Coumadin": "Warfarin"})
+    index.search("warfrin", k=5)  -> [{"name", "node_id", "drugbank_id", "match", "score"}, ...]
+    index.resolve("DB00682")      -> node id, or -1
+"""
+
+import re
+from bisect import bisect_left
+
+import numpy as np
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+_DRUGBANK_ID = re.compile(r"^db\d+$")
+
+# Trigram candidates re-ranked by edit distance in the typo stage, and the
+# least edit similarity a typo match needs; below it the drug is unrelated
+# ("zzzz" -> "Zolazepam"), not a correction
+_RERANK = 24
+_MIN_SIMILARITY = 0.5
+
+
+def normalize(text: str) -> str:
+    return _NON_ALNUM.sub(" ", str(text).casefold()).strip()
+
+
+def _trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance, bit-parallel over `a` (Myers 1999 / Hyyrö 2001)."""
+    if not a:
+        return len(b)
+    peq = {}
+    for i, ch in enumerate(a):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+    full = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    pv, mv, score = full, 0, len(a)
+    for ch in b:
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+    return score
+
+
+class NameIndex:
+    """Immutable search index; build once per process (see data_loader.get_name_index)."""
+
+    def __init__(self, names: list, idx_to_db: dict = None, aliases: dict = None):
+        self.names = list(names)
+        self._db_ids = {node_id: str(db_id) for node_id, db_id in (idx_to_db or {}).items()}
+        self._by_db_id = {db_id.casefold(): node_id for node_id, db_id in self._db_ids.items()}
+
+        # Searchable keys: every canonical name, then every alias of a known name
+        name_to_id = {name: node_id for node_id, name in enumerate(self.names)}
+        entries = [(normalize(name), node_id, "name") for node_id, name in enumerate(self.names)]
+        for alias, target in (aliases or {}).items():
+            if target in name_to_id:
+                entries.append((normalize(alias), name_to_id[target], "alias"))
+        entries = [entry for entry in entries if entry[0]]
+
+        self._keys      = [key for key, _, _ in entries]
+        self._key_node  = np.array([node_id for _, node_id, _ in entries], dtype=np.int32)
+        self._key_kind  = [kind for _, _, kind in entries]
+        self._exact     = {}
+        for k, key in enumerate(self._keys):
+            self._exact.setdefault(key, k)
+
+        order = sorted(range(len(self._keys)), key=self._keys.__getitem__)
+        self._sorted_keys = [self._keys[k] for k in order]
+        self._sorted_ids  = order
+        words = sorted((word, k) for k, key in enumerate(self._keys) for word in key.split()[1:])
+        self._sorted_words    = [word for word, _ in words]
+        self._sorted_word_ids = [k for _, k in words]
+
+        postings = {}
+        for k, key in enumerate(self._keys):
+            for gram in _trigrams(key):
+                postings.setdefault(gram, []).append(k)
+        self._postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self._num_grams = np.array([len(_trigrams(key)) for key in self._keys], dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def resolve(self, query: str) -> int:
+        """Node id for an exact (normalized) name, alias or DrugBank ID; -1 otherwise."""
+        text = str(query).strip().casefold()
+        if _DRUGBANK_ID.match(text):
+            return self._by_db_id.get(text, -1)
+        k = self._exact.get(normalize(query))
+        return int(self._key_node[k]) if k is not None else -1
+
+    def search(self, query: str, k: int = 10) -> list:
+        """
+        Up to `k` matches, best first: DrugBank ID, exact name/alias, name
+        prefix, word prefix, then typo-tolerant matches. One result per drug.
+        """
+        key = normalize(query)
+        if not key or k <= 0:
+            return []
+        results, seen = [], set()
+
+        def add(node_id, match, score):
+            if node_id not in seen and len(results) < k:
+                seen.add(node_id)
+                results.append({
+                    "name":        self.names[node_id],
+                    "node_id":     node_id,
+                    "drugbank_id": self._db_ids.get(node_id),
+                    "match":       match,
+                    "score":       round(score, 3),
+                })
+
+        text = str(query).strip().casefold()
+        if _DRUGBANK_ID.match(text) and text in self._by_db_id:
+            add(self._by_db_id[text], "drugbank_id", 1.0)
+        if key in self._exact:
+            exact = self._exact[key]
+            add(int(self._key_node[exact]), self._key_kind[exact], 1.0)
+
+        # Prefix of the whole name, then of a later word; shorter names first
+        for sorted_keys, sorted_ids, match in ((self._sorted_keys, self._sorted_ids, "prefix"),
+                                               (self._sorted_words, self._sorted_word_ids, "word")):
+            if len(results) >= k:
+                break
+            lo = bisect_left(sorted_keys, key)
+            hi = bisect_left(sorted_keys, key + "\x7f", lo)
+            hits = sorted(sorted_ids[lo:min(hi, lo + 32 * k)],
+                          key=lambda i: (len(self._keys[i]), self._keys[i]))
+            for i in hits:
+                kind = "alias" if self._key_kind[i] == "alias" else match
+                add(int(self._key_node[i]), kind, len(key) / len(self._keys[i]))
+
+        if len(results) < k:
+            self._add_fuzzy(key, add)
+        return results
+
+    def _add_fuzzy(self, key: str, add):
+        grams = [self._postings[g] for g in _trigrams(key) if g in self._postings]
+        if not grams:
+            return
+        shared = np.bincount(np.concatenate(grams), minlength=len(self._keys))
+        dice = 2.0 * shared / (len(_trigrams(key)) + self._num_grams)
+        top = np.argpartition(-dice, min(_RERANK, len(dice) - 1))[:_RERANK]
+        top = top[dice[top] > 0]
+
+        ranked = []
+        for i in top.tolist():
+            candidate = self._keys[i]
+            distance = _edit_distance(key, candidate)
+            similarity = 1.0 - distance / max(len(key), len(candidate))
+            ranked.append((-similarity, -float(dice[i]), candidate, i))
+        for neg_similarity, _, _, i in sorted(ranked):
+            if -neg_similarity >= _MIN_SIMILARITY:
+                add(int(self._key_node[i]), "fuzzy", -neg_similarity)
@@ -0,0 +1,232 @@
+"""
+neighbor_engine.py
+------------------
+Indirect (two-hop) interaction risk: drugs in a regimen that share unusually
+many interaction partners, whether or not they interact directly.
+
+For two drugs a and b with partner sets N(a) and N(b):
+  - common neighbours  |N(a) & N(b)|
+  - Adamic-Adar        sum over w in N(a) & N(b) of 1 / log |N(w)|, so shared
+                       partners that interact with almost everything count little
+
+Every pair of a k-drug regimen is scored at once from the regimen's rows of
+the bit-packed adjacency, unpacked to a (k, n) float32 matrix X:
+common = X @ X.T and adamic_adar = (X * weights) @ X.T. At ~500 partners per
+drug the graph is ~12% dense, so these dense row products beat sparse ones.
+A pair is flagged when its Adamic-Adar score reaches the
+MEDIGRAPH_SHARED_PERCENTILE (default 99) percentile of random drug pairs.
+
+  - check_shared_partners(drugs)   -> flagged pairs, as dicts in input order
+  - shared_partner_scores(drugs)   -> {"drugs", "common", "adamic_adar", "direct"}
+  - get_neighbor_index(graph=None) -> NeighborIndex for a snapshot, built once per version
+  - NeighborIndex.common_matrix()  -> full n x n uint16 common-neighbour matrix,
+                                      memory-mapped from MEDIGRAPH_CN_CACHE (a
+                                      directory; built there on first use), else None
+"""
+
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+from .bit_adjacency import PackedAdjacency
+from .data_loader import get_knowledge_graph, on_swap
+
+SHARED_PERCENTILE = float(os.environ.get("MEDIGRAPH_SHARED_PERCENTILE", 99))
+_CACHE_DIR = os.environ.get("MEDIGRAPH_CN_CACHE")
+
+# Random drug pairs the flagging thresholds are estimated from, and the
+# rows per block when building the full common-neighbour matrix
+_SAMPLE_PAIRS = 20_000
+_BLOCK_ROWS   = 512
+
+
+class NeighborIndex:
+    """Shared-partner scores over one PackedAdjacency; see the module docstring."""
+
+    def __init__(self, packed: PackedAdjacency, cache_dir: str = _CACHE_DIR):
+        self.packed    = packed
+        self.num_nodes = packed.num_nodes
+        self.cache_dir = cache_dir
+        degrees = packed.degrees()
+        # A shared partner has at least two partners, so log(degree) > 0 there
+        self.weights = np.zeros(self.num_nodes, dtype=np.float32)
+        self.weights[degrees > 1] = 1.0 / np.log(degrees[degrees > 1])
+        self._lock       = threading.Lock()
+        self._common     = None      # np.memmap (n, n) uint16, once loaded
+        self._sample     = None      # sorted (common, adamic_adar) of random drug pairs
+        self._thresholds = None      # their values at SHARED_PERCENTILE
+
+    def _rows(self, node_ids) -> np.ndarray:
+        ids = np.asarray(node_ids, dtype=np.int64)
+        bits = self.packed.bits[ids]
+        return np.unpackbits(bits, axis=1, count=self.num_nodes).astype(np.float32)
+
+    def scores(self, node_ids) -> tuple:
+        """
+        (common int32 (k, k), adamic_adar float32 (k, k)) for every pair of
+        `node_ids`, with 0 on the diagonal. Common counts come from the cached
+        matrix when it is loaded.
+        """
+        ids = np.asarray(node_ids, dtype=np.int64)
+        rows = self._rows(ids)
+        # Contiguous copy: X @ X.T on one buffer takes NumPy's slower syrk path
+        cols = np.ascontiguousarray(rows.T)
+        adamic_adar = (rows * self.weights) @ cols
+        if self._common is not None:
+            common = self._common[ids[:, None], ids[None, :]].astype(np.int32)
+        else:
+            common = np.rint(rows @ cols).astype(np.int32)
+        np.fill_diagonal(common, 0)
+        np.fill_diagonal(adamic_adar, 0)
+        return common, adamic_adar
+
+    def pair_scores(self, node_ids_a, node_ids_b, chunk: int = 4096) -> tuple:
+        """Scores of arbitrary (a[i], b[i]) pairs: (common int32, adamic_adar float32)."""
+        a = np.asarray(node_ids_a, dtype=np.int64)
+        b = np.asarray(node_ids_b, dtype=np.int64)
+        common = np.zeros(len(a), dtype=np.int32)
+        adamic_adar = np.zeros(len(a), dtype=np.float32)
+        for start in range(0, len(a), chunk):
+            bits_a = self.packed.bits[a[start:start + chunk]]
+            bits_b = self.packed.bits[b[start:start + chunk]]
+            shared = np.unpackbits(bits_a & bits_b, axis=1, count=self.num_nodes)
+            common[start:start + chunk] = shared.sum(axis=1, dtype=np.int32)
+            adamic_adar[start:start + chunk] = shared @ self.weights
+        return common, adamic_adar
+
+    def _sample_scores(self) -> tuple:
+        if self._sample is None:
+            with self._lock:
+                if self._sample is None:
+                    rng = np.random.default_rng(0)
+                    a = rng.integers(0, self.num_nodes, _SAMPLE_PAIRS)
+                    b = (a + rng.integers(1, self.num_nodes, _SAMPLE_PAIRS)) % self.num_nodes
+                    common, adamic_adar = self.pair_scores(a, b)
+                    self._thresholds = (float(np.percentile(common, SHARED_PERCENTILE)),
+                                        float(np.percentile(adamic_adar, SHARED_PERCENTILE)))
+                    self._sample = (np.sort(common), np.sort(adamic_adar))
+        return self._sample
+
+    def thresholds(self) -> tuple:
+        """(common, adamic_adar) scores at SHARED_PERCENTILE of random distinct drug pairs."""
+        self._sample_scores()
+        return self._thresholds
+
+    def percentile(self, adamic_adar: float) -> float:
+        """Percentage of random drug pairs with a lower Adamic-Adar score."""
+        sample = self._sample_scores()[1]
+        return 100.0 * int(np.searchsorted(sample, adamic_adar)) / len(sample)
+
+    def fingerprint(self) -> str:
+        """Hash of the adjacency bits; names the cache file, so a changed graph gets a new one."""
+        return hashlib.blake2b(self.packed.bits.tobytes(), digest_size=8).hexdigest()
+
+    def common_matrix(self):
+        """
+        Full (n, n) uint16 common-neighbour matrix, memory-mapped read-only from
+        cache_dir (computed and written there on first use), so every process
+        shares one page-cache copy. None when no cache directory is configured.
+        """
+        if self._common is None and self.cache_dir:
+            with self._lock:
+                if self._common is None:
+                    path = os.path.join(self.cache_dir,
+                                        f"common_neighbors-{self.fingerprint()}.npy")
+                    if not os.path.exists(path):
+                        self._write_common_matrix(path)
+                    self._common = np.load(path, mmap_mode="r")
+        return self._common
+
+    def _write_common_matrix(self, path: str):
+        n = self.num_nodes
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        out = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.uint16, shape=(n, n))
+        cols = np.ascontiguousarray(self._rows(np.arange(n)).T)
+        for start in range(0, n, _BLOCK_ROWS):
+            block = self._rows(np.arange(start, min(start + _BLOCK_ROWS, n)))
+            out[start:start + len(block)] = np.rint(block @ cols)
+        np.fill_diagonal(out, 0)
+        out.flush()
+        del out
+        os.replace(tmp_path, path)
+
+
+_neighbor_index = None          # (graph version, NeighborIndex) of the last snapshot asked for
+_neighbor_lock = threading.Lock()
+
+
+def get_neighbor_index(graph=None) -> NeighborIndex:
+    """NeighborIndex for `graph` (default: the current snapshot), built once per version."""
+    global _neighbor_index
+    graph = graph or get_knowledge_graph()
+    cached = _neighbor_index
+    if cached is None or cached[0] != graph.version:
+        with _neighbor_lock:
+            cached = _neighbor_index
+            if cached is None or cached[0] != graph.version:
+                index = NeighborIndex(graph.packed_adjacency())
+                index.common_matrix()
+                cached = _neighbor_index = (graph.version, index)
+    return cached[1]
+
+
+def _rebuild_on_swap(old, new):
+    # Once the feature is in use, build the new snapshot's index (and cache
+    # file) on the reload thread instead of in the first request after it
+    if _neighbor_index is not None:
+        get_neighbor_index(new).thresholds()
+
+
+on_swap(_rebuild_on_swap)
+
+
+def shared_partner_scores(drugs: list, graph=None) -> dict:
+    """
+    Scores for every pair of the known, distinct `drugs` (input order):
+    {"drugs": names, "common": int32 (k, k), "adamic_adar": float32 (k, k),
+     "direct": bool (k, k) -- the pair interacts itself}.
+    """
+    graph = graph or get_knowledge_graph()
+    name_to_id = graph.name_to_id()
+    known = list(dict.fromkeys(name for name in drugs if name in name_to_id))
+    ids = np.array([name_to_id[name] for name in known], dtype=np.int64)
+    common, adamic_adar = get_neighbor_index(graph).scores(ids)
+    return {
+        "drugs":       known,
+        "common":      common,
+        "adamic_adar": adamic_adar,
+        "direct":      graph.packed_adjacency().submatrix(ids),
+    }
+
+
+def check_shared_partners(drugs: list, include_direct: bool = False) -> list:
+    """
+    Pairs of `drugs` whose Adamic-Adar score reaches the SHARED_PERCENTILE
+    threshold, in input order. Pairs that interact directly are left out
+    (check_interactions() reports them) unless include_direct is set.
+
+    Returns:
+        List of dicts: {drug1, drug2, common_partners, adamic_adar, percentile, direct}
+        where percentile is the share of random drug pairs scoring lower.
+    """
+    graph = get_knowledge_graph()
+    index = get_neighbor_index(graph)
+    scores = shared_partner_scores(drugs, graph)
+    _, threshold = index.thresholds()
+    i, j = np.triu_indices(len(scores["drugs"]), 1)
+    adamic_adar = scores["adamic_adar"][i, j]
+    direct = scores["direct"][i, j]
+    hit = (adamic_adar >= threshold) & (include_direct | ~direct)
+    i, j = i[hit], j[hit]
+    names = scores["drugs"]
+    return [{
+        "drug1":           names[a],
+        "drug2":           names[b],
+        "common_partners": int(scores["common"][a, b]),
+        "adamic_adar":     round(float(scores["adamic_adar"][a, b]), 2),
+        "percentile":      round(index.percentile(float(scores["adamic_adar"][a, b])), 2),
+        "direct":          bool(scores["direct"][a, b]),
+    } for a, b in zip(i.tolist(), j.tolist())]
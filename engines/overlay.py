@@ -0,0 +1,307 @@
+"""
+overlay.py
+----------
+Local interaction overlay: interactions added, removed or re-graded by the
+pharmacists on top of the OGB base graph, applied without rebuilding it.
+
+The overlay file (MEDIGRAPH_OVERLAY, default data/interaction_overlay.csv)
+holds one change per row; drugs are names or DrugBank IDs:
+
+    action,drug1,drug2,severity,description
+    add,Warfarin,Fluconazole,Severe,Fluconazole may increase the anticoagulant activities of Warfarin.
+    remove,Lepirudin,Cetuximab,,
+    severity,Aspirin,Ibuprofen,Moderate,
+
+  - add       the pair interacts; severity defaults to the degree rule and the
+              description to a generic overlay sentence. On a pair already in
+              the base it only overrides the severity/description given.
+  - remove    the pair does not interact (nothing to do if it never did)
+  - severity  override the severity (and description, if given) of a pair
+              that interacts in the base or through an earlier add
+
+The last row for a pair wins. Applying is idempotent, so the file can stay
+in place after it was compacted into a new bundle
+(`python -m engines.kg_bundle compact`).
+
+The base CSR keeps its edge slots. Added edges get slots after the base's
+in a small delta CSR, removed base slots are masked out, and the per-slot
+severity and description arrays are the base arrays plus the delta's slots
+(one copy per snapshot, with the overrides written in):
+  - InteractionOverlay.from_file(path)  -> parsed rows
+  - InteractionOverlay.apply(...)       -> (OverlayAdjacency, severity, DescriptionIndex, stats)
+  - OverlayAdjacency                    -> CSRAdjacency's lookups over base + delta
+  - OverlayAdjacency.to_csr()           -> (merged CSRAdjacency, old slot per new slot)
+"""
+
+import numpy as np
+import pandas as pd
+
+from .adjacency import CSRAdjacency
+from .descriptions import DescriptionIndex, FIRST_SLOT, SECOND_SLOT, _to_template
+from .severity import SEVERITY_LEVELS
+from .string_table import StringTable
+
+OVERLAY_ACTIONS = ("add", "remove", "severity")
+OVERLAY_COLUMNS = ("action", "drug1", "drug2", "severity", "description")
+
+# Description of an added edge that came without one
+DEFAULT_OVERLAY_TEMPLATE = (f"An interaction between {FIRST_SLOT} and {SECOND_SLOT} "
+                            f"is recorded in the local interaction list.")
+
+
+class OverlayError(ValueError):
+    """The overlay file is malformed or refers to a drug or pair the graph does not have."""
+
+
+class InteractionOverlay:
+    """Parsed overlay rows (action, drug1, drug2, severity, description), in file order."""
+
+    def __init__(self, rows, path: str = None):
+        self.rows = [tuple(row) for row in rows]
+        self.path = path
+        for line, (action, drug1, drug2, severity, _) in enumerate(self.rows, start=2):
+            if action not in OVERLAY_ACTIONS:
+                raise OverlayError(f"{self._where(line)}: unknown action {action!r}; "
+                                   f"expected one of {OVERLAY_ACTIONS}")
+            if not drug1 or not drug2:
+                raise OverlayError(f"{self._where(line)}: drug1 and drug2 are required")
+            if severity and severity not in SEVERITY_LEVELS:
+                raise OverlayError(f"{self._where(line)}: unknown severity {severity!r}; "
+                                   f"expected one of {SEVERITY_LEVELS}")
+            if action == "severity" and not severity:
+                raise OverlayError(f"{self._where(line)}: a severity row needs a severity")
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, path: str = None) -> "InteractionOverlay":
+        missing = [col for col in ("action", "drug1", "drug2") if col not in frame.columns]
+        if missing:
+            raise OverlayError(f"{path or 'overlay'}: missing columns {missing}")
+        frame = frame.reindex(columns=list(OVERLAY_COLUMNS), fill_value="")
+        frame = frame.fillna("").astype(str).apply(lambda col: col.str.strip())
+        frame["action"] = frame["action"].str.lower()
+        return cls(frame.itertuples(index=False, name=None), path)
+
+    @classmethod
+    def from_file(cls, path: str) -> "InteractionOverlay":
+        try:
+            frame = pd.read_csv(path, dtype=str, keep_default_na=False, comment="#")
+        except (pd.errors.ParserError, UnicodeDecodeError) as exc:
+            raise OverlayError(f"{path}: {exc}") from exc
+        return cls.from_frame(frame, path)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _where(self, line: int) -> str:
+        return f"{self.path or 'overlay'} line {line}"
+
+    def _resolve(self, lookup) -> dict:
+        """
+        {(lo, hi): [present, severity code or -1, (text, first id, second id) or None]}
+        with the last row per pair applied; present is None for severity-only rows.
+        `lookup(drug)` returns a node id or -1.
+        """
+        pairs, unknown = {}, []
+        for line, (action, drug1, drug2, severity, text) in enumerate(self.rows, start=2):
+            a, b = lookup(drug1), lookup(drug2)
+            unknown.extend(drug for drug, node_id in ((drug1, a), (drug2, b)) if node_id < 0)
+            if a < 0 or b < 0:
+                continue
+            if a == b:
+                raise OverlayError(f"{self._where(line)}: {drug1} cannot interact with itself")
+            state = pairs.setdefault((min(a, b), max(a, b)), [None, -1, None])
+            if action == "remove":
+                state[:] = [False, -1, None]
+                continue
+            if action == "add":
+                state[0] = True
+            elif state[0] is False:
+                raise OverlayError(f"{self._where(line)}: {drug1} and {drug2} were removed "
+                                   f"above; add the pair instead")
+            if severity:
+                state[1] = SEVERITY_LEVELS.index(severity)
+            if text:
+                state[2] = (text, a, b)
+        if unknown:
+            shown = ", ".join(sorted(set(unknown))[:10])
+            raise OverlayError(f"{self.path or 'overlay'}: unknown drugs: {shown}")
+        return pairs
+
+    def apply(self, adjacency: CSRAdjacency, edge_severity: np.ndarray,
+              descriptions: DescriptionIndex, lookup, names: list,
+              degrees: np.ndarray, rule) -> tuple:
+        """
+        Layer the overlay over a base snapshot. `lookup(drug)` resolves a name or
+        DrugBank ID to a node id (-1 if unknown), `names` are the node names the
+        descriptions are templated with, and `rule.degree_codes()` grades added
+        edges without a severity. Returns (OverlayAdjacency, edge severity,
+        DescriptionIndex, stats) where the arrays cover base + delta slots.
+        """
+        pairs = self._resolve(lookup)
+        stats = {"rows": len(self.rows), "added": 0, "removed": 0, "overridden": 0}
+        keys = sorted(pairs)
+        lo = np.array([key[0] for key in keys], dtype=np.int64)
+        hi = np.array([key[1] for key in keys], dtype=np.int64)
+        fwd, bwd = adjacency.find_many(lo, hi), adjacency.find_many(hi, lo)
+
+        removed = np.zeros(len(adjacency.indices), dtype=bool)
+        overrides, added = [], []           # (lo, hi, lo->hi slot, hi->lo slot, state); (lo, hi, state)
+        for (id_lo, id_hi), s_fwd, s_bwd in zip(keys, fwd.tolist(), bwd.tolist()):
+            present, severity, text = state = pairs[(id_lo, id_hi)]
+            if present is False:
+                if s_fwd >= 0:
+                    removed[[s_fwd, s_bwd]] = True
+                    stats["removed"] += 1
+            elif s_fwd >= 0:
+                if severity >= 0 or text is not None:
+                    overrides.append((id_lo, id_hi, s_fwd, s_bwd, state))
+                    stats["overridden"] += 1
+            elif present:
+                added.append((id_lo, id_hi, state))
+                stats["added"] += 1
+            else:
+                raise OverlayError(f"{self.path or 'overlay'}: {names[id_lo]} and "
+                                   f"{names[id_hi]} do not interact; add the pair instead")
+
+        # Delta CSR over the added pairs; its slots follow the base's
+        base_slots = len(adjacency.indices)
+        add_lo = np.array([pair[0] for pair in added], dtype=np.int64)
+        add_hi = np.array([pair[1] for pair in added], dtype=np.int64)
+        delta = CSRAdjacency.from_edge_index(np.stack([add_lo, add_hi]), adjacency.num_nodes)
+        add_fwd = delta.find_many(add_lo, add_hi) + base_slots
+        add_bwd = delta.find_many(add_hi, add_lo) + base_slots
+
+        severity = np.concatenate([edge_severity, np.zeros(len(delta.indices), dtype=np.uint8)])
+        default = rule.degree_codes(add_lo, add_hi, degrees)
+        codes = np.concatenate([descriptions.codes,
+                                np.full(len(delta.indices), -1, dtype=np.int32)])
+        templates = descriptions.templates.tolist() if overrides or added else []
+        template_ids = {}
+
+        def template_code(state, row, col) -> int:
+            # Code for the row -> col slot; flipped when the text names col first
+            text = state[2]
+            if text is None:
+                # Same sentence from both slots: the lower node id is named first
+                template, first = DEFAULT_OVERLAY_TEMPLATE, min(row, col)
+            else:
+                text, first, second = text
+                template = _to_template(text, names[first], names[second])
+            if template not in template_ids:
+                template_ids[template] = len(templates)
+                templates.append(template)
+            return template_ids[template] * 2 + (first != row)
+
+        for (id_lo, id_hi, state), s_fwd, s_bwd, grade in zip(added, add_fwd.tolist(),
+                                                              add_bwd.tolist(), default.tolist()):
+            severity[[s_fwd, s_bwd]] = state[1] if state[1] >= 0 else grade
+            codes[s_fwd] = template_code(state, id_lo, id_hi)
+            codes[s_bwd] = template_code(state, id_hi, id_lo)
+        for id_lo, id_hi, s_fwd, s_bwd, state in overrides:
+            if state[1] >= 0:
+                severity[[s_fwd, s_bwd]] = state[1]
+            if state[2] is not None:
+                codes[s_fwd] = template_code(state, id_lo, id_hi)
+                codes[s_bwd] = template_code(state, id_hi, id_lo)
+
+        if template_ids:
+            descriptions = DescriptionIndex(codes, StringTable.from_strings(templates))
+        else:
+            descriptions = DescriptionIndex(codes, descriptions.templates)
+        overlaid = OverlayAdjacency(adjacency, delta, removed if stats["removed"] else None)
+        return overlaid, severity, descriptions, stats
+
+
+class OverlayAdjacency:
+    """
+    CSRAdjacency lookups over a base CSR plus a delta CSR of added edges.
+    Slots below len(base.indices) are base slots (never the `removed` ones);
+    delta slot s is numbered len(base.indices) + s.
+    """
+
+    def __init__(self, base: CSRAdjacency, delta: CSRAdjacency, removed: np.ndarray = None):
+        self.base    = base
+        self.delta   = delta
+        self.removed = removed          # bool per base slot, None when nothing is removed
+        self.num_nodes  = base.num_nodes
+        self.base_slots = len(base.indices)
+
+    @property
+    def num_slots(self) -> int:
+        """Length of the per-slot arrays (base + delta slots, removed ones included)."""
+        return self.base_slots + len(self.delta.indices)
+
+    @property
+    def num_edges(self) -> int:
+        removed = int(self.removed.sum()) // 2 if self.removed is not None else 0
+        return self.base.num_edges - removed + self.delta.num_edges
+
+    @property
+    def nbytes(self) -> int:
+        removed = self.removed.nbytes if self.removed is not None else 0
+        return self.base.nbytes + self.delta.nbytes + removed
+
+    def neighbors(self, node_id: int) -> np.ndarray:
+        start, end = int(self.base.indptr[node_id]), int(self.base.indptr[node_id + 1])
+        base = self.base.indices[start:end]
+        if self.removed is not None:
+            base = base[~self.removed[start:end]]
+        added = self.delta.neighbors(node_id)
+        return np.union1d(base, added).astype(np.int32) if len(added) else base
+
+    def find(self, node_id_a: int, node_id_b: int) -> int:
+        slot = self.base.find(node_id_a, node_id_b)
+        if slot >= 0:
+            return -1 if self.removed is not None and self.removed[slot] else slot
+        slot = self.delta.find(node_id_a, node_id_b)
+        return self.base_slots + slot if slot >= 0 else -1
+
+    def has_interaction(self, node_id_a: int, node_id_b: int) -> bool:
+        return self.find(node_id_a, node_id_b) >= 0
+
+    def find_many(self, node_ids_a, node_ids_b) -> np.ndarray:
+        slots = self.base.find_many(node_ids_a, node_ids_b)
+        if self.removed is not None:
+            hit = slots >= 0
+            slots[hit] = np.where(self.removed[slots[hit]], -1, slots[hit])
+        if len(self.delta.indices):
+            extra = self.delta.find_many(node_ids_a, node_ids_b)
+            slots = np.where(extra >= 0, extra + self.base_slots, slots)
+        return slots
+
+    def edges_within(self, node_ids, strategy: str = "auto") -> tuple:
+        """CSRAdjacency.edges_within() over base + delta; `strategy` applies to the base."""
+        rows, cols, slots = self.base.edges_within(node_ids, strategy)
+        if self.removed is not None and len(slots):
+            keep = ~self.removed[slots]
+            rows, cols, slots = rows[keep], cols[keep], slots[keep]
+        if len(self.delta.indices) == 0:
+            return rows, cols, slots
+        d_rows, d_cols, d_slots = self.delta.edges_within(node_ids, "pairs")
+        if len(d_slots) == 0:
+            return rows, cols, slots
+        rows = np.concatenate([rows, d_rows])
+        cols = np.concatenate([cols, d_cols])
+        slots = np.concatenate([slots, d_slots + self.base_slots])
+        order = np.lexsort((cols, rows))
+        return rows[order], cols[order], slots[order]
+
+    def to_csr(self) -> tuple:
+        """
+        (CSRAdjacency of the merged edges, int64 overlay slot of each of its
+        slots); index any per-slot array with the second to re-slot it.
+        """
+        num_nodes = self.num_nodes
+        base_rows = np.repeat(np.arange(num_nodes, dtype=np.int64), np.diff(self.base.indptr))
+        delta_rows = np.repeat(np.arange(num_nodes, dtype=np.int64), np.diff(self.delta.indptr))
+        rows = np.concatenate([base_rows, delta_rows])
+        cols = np.concatenate([self.base.indices, self.delta.indices]).astype(np.int64)
+        slots = np.arange(self.num_slots, dtype=np.int64)
+        if self.removed is not None:
+            keep = np.concatenate([~self.removed, np.ones(len(self.delta.indices), dtype=bool)])
+            rows, cols, slots = rows[keep], cols[keep], slots[keep]
+
+        order = np.argsort(rows * num_nodes + cols, kind="stable")
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=num_nodes), out=indptr[1:])
+        return CSRAdjacency(indptr, cols[order].astype(np.int32)), slots[order]
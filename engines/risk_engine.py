@@ -1,3 +1,41 @@
+import numpy as np
+
+SEVERITY_WEIGHTS = {
+    "Mild": 1,
+    "Moderate": 2,
+    "Severe": 3,
+    "Contraindicated": 5
+}
+
+AGE_WARNING_POINTS = 15
+GENDER_WARNING_POINTS = 20
+
+RISK_LEVELS = ("Low", "Moderate", "High")
+# Upper bound (inclusive) of the Low and Moderate score bands
+_LEVEL_BOUNDS = np.array([20, 50])
+
+
+def conflict_points(conflict):
+    """Points one conflict adds to the raw (uncapped) risk score."""
+    severity = conflict.get("severity", "Mild")
+    return SEVERITY_WEIGHTS.get(severity, 1) * 10
+
+
+def risk_from_points(points):
+    """Cap a raw point total and map it to (risk_score, risk_level)."""
+    # Cap between 0 and 100
+    risk_score = max(0, min(100, points))
+
+    if risk_score > 50:
+        risk_level = "High"
+    elif risk_score > 20:
+        risk_level = "Moderate"
+    else:
+        risk_level = "Low"
+
+    return risk_score, risk_level
+
+
 def calculate_risk(conflicts, age_warnings, gender_warnings):
     """
     Calculates numerical risk score and returns a risk level.
@@ -6,34 +44,42 @@ def calculate_risk(conflicts, age_warnings, gender_warnings):
     Moderate -> 2
     Severe -> 3
     Contraindicated -> 5
-    
+
     Each warning adds 3 points.
     Max score is capped at 100.
     """
-    weights = {
-        "Mild": 1,
-        "Moderate": 2,
-        "Severe": 3,
-        "Contraindicated": 5
-    }
-    
     score = 0
-    
+
     for conflict in conflicts:
-        severity = conflict.get("severity", "Mild")
-        score += weights.get(severity, 1) * 10
-        
-    score += len(age_warnings) * 15
-    score += len(gender_warnings) * 20
-    
-    # Cap between 0 and 100
-    risk_score = max(0, min(100, score))
-    
-    if risk_score > 50:
-        risk_level = "High"
-    elif risk_score > 20:
-        risk_level = "Moderate"
-    else:
-        risk_level = "Low"
-        
-    return risk_score, risk_level
+        score += conflict_points(conflict)
+
+    score += len(age_warnings) * AGE_WARNING_POINTS
+    score += len(gender_warnings) * GENDER_WARNING_POINTS
+
+    return risk_from_points(score)
+
+
+def calculate_risk_batch(severity_counts, age_warning_counts, gender_warning_counts):
+    """
+    calculate_risk() for many regimens at once, from counts instead of lists.
+
+    Args:
+        severity_counts:       (N, 4) conflicts per regimen and severity tier,
+                               columns in SEVERITY_WEIGHTS order (Mild, Moderate,
+                               Severe, Contraindicated), e.g. from
+                               interaction_engine.severity_counts().
+        age_warning_counts:    (N,) age warnings per regimen.
+        gender_warning_counts: (N,) gender warnings per regimen.
+
+    Returns:
+        (risk_scores, risk_levels): int64 array and object array of
+        "Low"/"Moderate"/"High", identical to calling calculate_risk() per regimen.
+    """
+    weights = np.array([w * 10 for w in SEVERITY_WEIGHTS.values()], dtype=np.int64)
+    points = np.asarray(severity_counts, dtype=np.int64).reshape(-1, len(weights)) @ weights
+    points += np.asarray(age_warning_counts, dtype=np.int64) * AGE_WARNING_POINTS
+    points += np.asarray(gender_warning_counts, dtype=np.int64) * GENDER_WARNING_POINTS
+
+    risk_scores = np.clip(points, 0, 100)
+    levels = np.searchsorted(_LEVEL_BOUNDS, risk_scores, side="left")
+    return risk_scores, np.array(RISK_LEVELS, dtype=object)[levels]
@@ -0,0 +1,188 @@
+"""
+screener.py
+-----------
+Streaming command-line screener for large regimen files.
+
+Reads patient regimens from CSV or Parquet in fixed-size chunks, runs the
+interaction, patient-validation and risk engines on every row and streams
+the results to CSV or Parquet as each chunk finishes, so memory stays flat
+however large the input is.
+
+Input columns:  patient_id, age, sex, drugs  (drugs = names joined by --sep)
+Output columns: patient_id, num_drugs, num_conflicts, conflicts,
+                age_warnings, gender_warnings, risk_score, risk_level
+
+    python -m engines.screener regimens.csv results.parquet --chunk-size 50000
+    python -m engines.screener regimens.csv results.csv --start-chunk 12   # resume
+    python -m engines.screener regimens.csv results.parquet --workers 4
+
+Progress (chunk index, rows, rows/sec) goes to stderr; rerun with
+--start-chunk N to resume after the last completed chunk. CSV output is
+appended to on resume. A Parquet file cannot be appended to, so resuming
+into an existing one is refused (ScreenerError); resume into a new file and
+read both.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+from .data_loader import get_knowledge_graph
+from .interaction_engine import (
+    check_interactions_batch, conflicts_from_batch, screening_pool, severity_counts,
+)
+from .risk_engine import calculate_risk_batch
+from .validation_engine import DEFAULT_RULES_PATH, RuleIndex
+
+OUTPUT_COLUMNS = ["patient_id", "num_drugs", "num_conflicts", "conflicts",
+                  "age_warnings", "gender_warnings", "risk_score", "risk_level"]
+
+
+class ScreenerError(ValueError):
+    """The requested run would lose results (e.g. resuming into an existing Parquet file)."""
+
+
+def _is_parquet(path: str) -> bool:
+    return path.lower().endswith((".parquet", ".pq"))
+
+
+def iter_chunks(path: str, chunk_size: int, start_chunk: int = 0):
+    """Yield (chunk_index, DataFrame) pairs, skipping the first `start_chunk` chunks."""
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+        batches = pq.ParquetFile(path).iter_batches(batch_size=chunk_size)
+        for index, batch in enumerate(batches):
+            if index >= start_chunk:
+                yield index, batch.to_pandas()
+    else:
+        skip = range(1, start_chunk * chunk_size + 1) if start_chunk else None
+        reader = pd.read_csv(path, chunksize=chunk_size, skiprows=skip,
+                             dtype={"patient_id": str, "sex": str, "drugs": str})
+        for index, frame in enumerate(reader, start=start_chunk):
+            yield index, frame
+
+
+def screen_frame(frame: pd.DataFrame, rules: RuleIndex, sep: str = ";", workers: int = 1,
+                 pool=None) -> pd.DataFrame:
+    """
+    Screen one chunk of patient rows and return one result row per patient.
+    With workers > 1 the interaction check runs in `pool` (a
+    screening_pool(workers)), or in a pool started for this chunk.
+    """
+    regimens = [
+        [d.strip() for d in str(cell).split(sep) if d.strip()] if pd.notna(cell) else []
+        for cell in frame["drugs"]
+    ]
+    graph = get_knowledge_graph()
+    batch = check_interactions_batch(regimens, workers, graph=graph, pool=pool)
+    per_patient = conflicts_from_batch(batch, len(regimens), descriptions=False, graph=graph)
+
+    patients = [
+        {"age": int(age) if pd.notna(age) else None, "gender": str(sex) if pd.notna(sex) else None}
+        for age, sex in zip(frame["age"], frame["sex"])
+    ]
+    warnings = rules.validate_batch(patients, regimens)
+
+    risk_scores, risk_levels = calculate_risk_batch(
+        severity_counts(batch, len(regimens)),
+        [len(age) for age, _ in warnings], [len(gender) for _, gender in warnings])
+
+    rows = []
+    for patient_id, drugs, conflicts, (age_warnings, gender_warnings), risk_score, risk_level in zip(
+            frame["patient_id"], regimens, per_patient, warnings,
+            risk_scores.tolist(), risk_levels.tolist()):
+        rows.append((
+            patient_id, len(drugs), len(conflicts),
+            "; ".join(f"{c['drug1']} + {c['drug2']} ({c['severity']})" for c in conflicts),
+            " | ".join(age_warnings), " | ".join(gender_warnings),
+            risk_score, risk_level,
+        ))
+    return pd.DataFrame(rows, columns=OUTPUT_COLUMNS)
+
+
+class _ResultWriter:
+    """Appends result chunks to a CSV file or a single Parquet file."""
+
+    def __init__(self, path: str, resume: bool):
+        if resume and _is_parquet(path) and os.path.exists(path):
+            # ParquetWriter truncates: the chunks already written would be lost
+            raise ScreenerError(
+                f"{path} already exists and Parquet output cannot be appended to; "
+                "resume into a new file (e.g. results-part2.parquet) and read both"
+            )
+        self.path = path
+        self._parquet = None
+        self._csv_header = not (resume and os.path.exists(path))
+        if not _is_parquet(path) and self._csv_header and os.path.exists(path):
+            os.remove(path)
+
+    def write(self, frame: pd.DataFrame):
+        if _is_parquet(self.path):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        else:
+            frame.to_csv(self.path, mode="a", header=self._csv_header, index=False)
+            self._csv_header = False
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def run(input_path: str, output_path: str, chunk_size: int = 50_000, start_chunk: int = 0,
+        rules_path: str = DEFAULT_RULES_PATH, sep: str = ";", workers: int = 1,
+        log=sys.stderr) -> int:
+    """
+    Screen `input_path` into `output_path`; returns the number of rows written.
+    With workers > 1 one process pool screens the interactions of every chunk.
+    """
+    rules = RuleIndex.from_file(rules_path)
+
+    writer = _ResultWriter(output_path, resume=start_chunk > 0)
+    pool = screening_pool(workers) if workers > 1 else None
+    total, started = 0, time.perf_counter()
+    try:
+        for index, frame in iter_chunks(input_path, chunk_size, start_chunk):
+            writer.write(screen_frame(frame, rules, sep, workers, pool))
+            total += len(frame)
+            elapsed = time.perf_counter() - started
+            print(f"chunk {index} done: {total:,} rows, {total / elapsed:,.0f} rows/s "
+                  f"(resume with --start-chunk {index + 1})", file=log, flush=True)
+    finally:
+        writer.close()
+        if pool is not None:
+            pool.shutdown()
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m engines.screener",
+                                     description="Stream-screen a regimen file for interactions.")
+    parser.add_argument("input", help="CSV or Parquet with patient_id, age, sex, drugs")
+    parser.add_argument("output", help="results file (.csv or .parquet)")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--start-chunk", type=int, default=0,
+                        help="skip this many chunks (resume a previous run)")
+    parser.add_argument("--rules", default=DEFAULT_RULES_PATH,
+                        help="drug restriction rules JSON (default: data/drugs.json)")
+    parser.add_argument("--sep", default=";", help="separator between drug names")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes for the interaction check (default: 1)")
+    args = parser.parse_args(argv)
+
+    try:
+        run(args.input, args.output, args.chunk_size, args.start_chunk, args.rules, args.sep,
+            args.workers)
+    except ScreenerError as exc:
+        parser.error(str(exc))
+
+
+if __name__ == "__main__":
+    main()
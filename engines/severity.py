@@ -0,0 +1,97 @@
+"""
+severity.py
+-----------
+Index-time severity classification of ogbl-ddi edges.
+
+Severity is computed once per edge slot into a uint8 array aligned with the
+CSR adjacency (values index SEVERITY_LEVELS), so a lookup that finds a slot
+gets its severity from the same position. The rule that produced the array
+is a small JSON-able SeverityRule, recorded in the bundle metadata:
+
+  1. degree rule — "Severe" when either drug's degree (as returned by
+     get_node_degrees()) exceeds `high_degree_threshold`, else "Moderate";
+  2. keyword tiers — optional (level, [keywords]) pairs checked in order
+     against each edge's description template (case-insensitive); the first
+     tier with a matching keyword overrides the degree rule.
+
+Keyword tiers are resolved per template, not per edge; if the two slots of
+an edge end up with different levels, both get the higher one.
+
+A rule file (MEDIGRAPH_SEVERITY_RULES) looks like:
+    {"high_degree_threshold": 500,
+     "keyword_tiers": [["Contraindicated", ["contraindicated"]],
+                       ["Mild", ["may decrease the absorption"]]]}
+"""
+
+import json
+
+import numpy as np
+
+SEVERITY_LEVELS = ("Mild", "Moderate", "Severe", "Contraindicated")
+
+DEFAULT_HIGH_DEGREE_THRESHOLD = 500
+
+
+class SeverityRule:
+    """Degree threshold plus ordered keyword tiers; see the module docstring."""
+
+    def __init__(self, high_degree_threshold: int = DEFAULT_HIGH_DEGREE_THRESHOLD,
+                 keyword_tiers=()):
+        self.high_degree_threshold = int(high_degree_threshold)
+        self.keyword_tiers = tuple((str(level), tuple(str(k).lower() for k in keywords))
+                                   for level, keywords in keyword_tiers)
+        for level, _ in self.keyword_tiers:
+            if level not in SEVERITY_LEVELS:
+                raise ValueError(f"unknown severity level {level!r}; expected one of {SEVERITY_LEVELS}")
+
+    @classmethod
+    def from_meta(cls, meta: dict) -> "SeverityRule":
+        return cls(meta.get("high_degree_threshold", DEFAULT_HIGH_DEGREE_THRESHOLD),
+                   meta.get("keyword_tiers", ()))
+
+    @classmethod
+    def from_file(cls, path: str) -> "SeverityRule":
+        with open(path) as f:
+            return cls.from_meta(json.load(f))
+
+    def to_meta(self) -> dict:
+        return {"high_degree_threshold": self.high_degree_threshold,
+                "keyword_tiers": [[level, list(keywords)] for level, keywords in self.keyword_tiers]}
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, SeverityRule) and self.to_meta() == other.to_meta()
+
+    def degree_codes(self, node_ids_a, node_ids_b, degrees: np.ndarray) -> np.ndarray:
+        """Degree rule only, for any node pairs: uint8 indexes into SEVERITY_LEVELS."""
+        threshold = self.high_degree_threshold
+        high = (degrees[node_ids_a] > threshold) | (degrees[node_ids_b] > threshold)
+        return np.where(high, SEVERITY_LEVELS.index("Severe"),
+                        SEVERITY_LEVELS.index("Moderate")).astype(np.uint8)
+
+    def classify(self, adjacency, degrees: np.ndarray, descriptions=None) -> np.ndarray:
+        """uint8 severity for every edge slot of `adjacency`."""
+        rows = np.repeat(np.arange(adjacency.num_nodes, dtype=np.int64), np.diff(adjacency.indptr))
+        severity = self.degree_codes(rows, adjacency.indices, degrees)
+        if not self.keyword_tiers or descriptions is None or len(descriptions.templates) == 0:
+            return severity
+
+        # Resolve the tiers once per template (-1 = no tier matched)
+        template_tier = np.full(len(descriptions.templates), -1, dtype=np.int16)
+        for t, text in enumerate(descriptions.templates.tolist()):
+            text = text.lower()
+            for level, keywords in self.keyword_tiers:
+                if any(k in text for k in keywords):
+                    template_tier[t] = SEVERITY_LEVELS.index(level)
+                    break
+
+        codes = descriptions.codes
+        described = codes >= 0
+        tier = np.full(len(codes), -1, dtype=np.int16)
+        tier[described] = template_tier[codes[described] >> 1]
+        matched = tier >= 0
+        severity[matched] = tier[matched]
+
+        # The two slots of an edge can carry different templates; keep the
+        # edge symmetric by giving both slots the higher of the two levels.
+        reverse = adjacency.find_many(adjacency.indices, rows)
+        return np.maximum(severity, severity[reverse])
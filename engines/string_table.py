@@ -0,0 +1,41 @@
+"""
+string_table.py
+---------------
+Immutable table of UTF-8 strings packed into one byte blob plus an offsets
+array, so it can live inside a memory-mapped bundle without per-string
+Python objects. Strings are decoded only when accessed.
+"""
+
+import numpy as np
+
+
+class StringTable:
+    """`offsets` (int64, n+1) into `blob` (uint8); item i is blob[offsets[i]:offsets[i+1]]."""
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray):
+        self.offsets = offsets
+        self.blob    = blob
+
+    @classmethod
+    def from_strings(cls, strings) -> "StringTable":
+        encoded = [str(s).encode("utf-8") for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(offsets, blob)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return self.blob[start:end].tobytes().decode("utf-8")
+
+    def tolist(self) -> list:
+        data = self.blob.tobytes()
+        bounds = self.offsets.tolist()
+        return [data[bounds[i]:bounds[i + 1]].decode("utf-8") for i in range(len(self))]
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.blob.nbytes
@@ -1,3 +1,14 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_RULES_PATH = os.path.join(_BASE_DIR, "data", "drugs.json")
+
+
 def validate_patient(patient_data, drugs, drugs_db):
     """
     Validates patient data against drug restrictions.
@@ -30,3 +41,205 @@ def validate_patient(patient_data, drugs, drugs_db):
                     gender_warnings.append(f"{drug_name} is restricted to {restriction} patients.")
                     
     return age_warnings, gender_warnings
+
+
+class RuleIndex:
+    """
+    Restriction rules compiled once into arrays, one row per distinct drug
+    name (lower-cased; a later rule for the same name wins, as in
+    validate_patient). validate() and validate_batch() return what
+    validate_patient() would, without rebuilding a lookup per call, and also
+    apply a rule to the drug its name resolves to (see drug_rows()).
+
+    Arrays per row: min_age / max_age (float64; 0 / 200 when absent),
+    restriction (int16 index into `restrictions`, -1 = unrestricted) and
+    category (int16 index into `categories`, -1 = none). node_rows() maps
+    node ids of a knowledge-graph snapshot to rows for id-keyed callers.
+    """
+
+    def __init__(self, drugs_db: list):
+        by_name = {d['name'].lower(): d for d in drugs_db}
+        self._row_by_name = {name: row for row, name in enumerate(by_name)}
+        rules = list(by_name.values())
+
+        restricted = [r.get('gender_restriction', 'None') != 'None' for r in rules]
+        self.restrictions = sorted({str(r['gender_restriction']).lower()
+                                    for r, flag in zip(rules, restricted) if flag})
+        restriction_code = {value: code for code, value in enumerate(self.restrictions)}
+
+        self.min_age = np.array([r.get('min_age', 0) for r in rules], dtype=np.float64)
+        self.max_age = np.array([r.get('max_age', 200) for r in rules], dtype=np.float64)
+        self.restriction = np.array(
+            [restriction_code[str(r['gender_restriction']).lower()] if flag else -1
+             for r, flag in zip(rules, restricted)], dtype=np.int16)
+        self.categories = sorted({str(r['category']) for r in rules if r.get('category')})
+        self.category = np.array(
+            [self.categories.index(str(r['category'])) if r.get('category') else -1
+             for r in rules], dtype=np.int16)
+
+        # Warning text pieces, formatted only for the rows that fire
+        self._names = [r['name'] for r in rules]
+        self._ranges = [f"(Valid range: {r.get('min_age')}-{r.get('max_age')})" for r in rules]
+        self._gender_text = [f"{r['name']} is restricted to {r.get('gender_restriction')} patients."
+                             for r in rules]
+        self._node_rows = None
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_RULES_PATH) -> "RuleIndex":
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def row(self, drug: str) -> int:
+        """Rule row for a drug name (case-insensitive), -1 when it has no rule."""
+        return self._row_by_name.get(drug.lower(), -1)
+
+    def category_of(self, drug: str):
+        """Category of a drug name (case-insensitive), None when it has none."""
+        return self.row_category(self.row(drug))
+
+    def row_category(self, row: int):
+        """Category of a rule row, None for -1 or a rule without one."""
+        return self.categories[self.category[row]] if row >= 0 and self.category[row] >= 0 else None
+
+    def node_rows(self, graph=None) -> np.ndarray:
+        """
+        int32 rule row per node id of `graph` (default: the current snapshot;
+        -1 = no rule), built once per graph version. A rule named by an alias
+        or DrugBank ID (e.g. "Aspirin") applies to the drug the snapshot's
+        name index resolves it to, unless a rule names that drug directly.
+        """
+        from .data_loader import get_knowledge_graph
+        graph = graph or get_knowledge_graph()
+        if self._node_rows is None or self._node_rows[0] != graph.version:
+            rows = np.array([self.row(name) for name in graph.drug_names()], dtype=np.int32)
+            name_index = graph.name_index()
+            for name, row in self._row_by_name.items():
+                node_id = name_index.resolve(name)
+                if node_id >= 0 and rows[node_id] < 0:
+                    rows[node_id] = row
+            self._node_rows = (graph.version, rows)
+        return self._node_rows[1]
+
+    def drug_rows(self, drugs) -> np.ndarray:
+        """
+        int64 rule row per drug name: the rule naming it (case-insensitive),
+        else the node_rows() rule of the drug the current snapshot's name index
+        resolves it to (so "Acetylsalicylic acid" gets the "Aspirin" rule);
+        -1 when neither applies.
+        """
+        rows = np.array([self._row_by_name.get(drug.lower(), -1) for drug in drugs], dtype=np.int64)
+        missing = np.flatnonzero(rows < 0)
+        if len(missing):
+            from .data_loader import get_knowledge_graph
+            graph = get_knowledge_graph()
+            name_index, node_rows = graph.name_index(), self.node_rows(graph)
+            for i in missing.tolist():
+                node_id = name_index.resolve(drugs[i])
+                if node_id >= 0:
+                    rows[i] = node_rows[node_id]
+        return rows
+
+    def _age_warning(self, row: int, patient_age) -> str:
+        return (f"{self._names[row]} is typically not recommended for age {patient_age}. "
+                f"{self._ranges[row]}")
+
+    def _gender_code(self, patient_gender) -> int:
+        # -1: no gender given; -2: a gender no rule is restricted to
+        if patient_gender is None:
+            return -1
+        value = patient_gender.lower()
+        return self.restrictions.index(value) if value in self.restrictions else -2
+
+    def permitted(self, patient_data: dict) -> np.ndarray:
+        """
+        bool per rule row: True when validate() would raise no age or gender
+        warning for that drug and this patient.
+        """
+        patient_age = patient_data.get('age')
+        gender = self._gender_code(patient_data.get('gender'))
+        allowed = np.ones(len(self), dtype=bool)
+        if patient_age is not None:
+            allowed &= (patient_age >= self.min_age) & (patient_age <= self.max_age)
+        if gender != -1:
+            allowed &= (self.restriction < 0) | (self.restriction == gender)
+        return allowed
+
+    def validate(self, patient_data: dict, drugs: list) -> tuple:
+        """
+        validate_patient(patient_data, drugs, drugs_db), with each drug's rule
+        found by drug_rows(), so rules also reach drugs named by alias.
+        """
+        age_warnings, gender_warnings = [], []
+        patient_age = patient_data.get('age')
+        gender = self._gender_code(patient_data.get('gender'))
+        for row in self.drug_rows(drugs).tolist():
+            if row < 0:
+                continue
+            if patient_age is not None and (patient_age < self.min_age[row]
+                                            or patient_age > self.max_age[row]):
+                age_warnings.append(self._age_warning(row, patient_age))
+            restriction = self.restriction[row]
+            if restriction >= 0 and gender != -1 and gender != restriction:
+                gender_warnings.append(self._gender_text[row])
+        return age_warnings, gender_warnings
+
+    def validate_batch(self, patients: list, regimens: list) -> list:
+        """
+        validate() for many patients at once: one (age_warnings, gender_warnings)
+        tuple per patient. Rule rows, age ranges and restrictions are compared
+        as arrays; text is formatted only for warnings that fire.
+        """
+        lengths = np.fromiter((len(r) for r in regimens), dtype=np.int64, count=len(regimens))
+        flat = [drug for regimen in regimens for drug in regimen]
+        results = [([], []) for _ in regimens]
+        if not flat:
+            return results
+
+        codes, uniques = pd.factorize(pd.Series(flat, dtype=object))
+        unique_rows = self.drug_rows(list(uniques))
+        rows = unique_rows[codes]
+        owner = np.repeat(np.arange(len(regimens), dtype=np.int64), lengths)
+        has_rule = rows >= 0
+        rows, owner = rows[has_rule], owner[has_rule]
+
+        ages_raw = [p.get('age') for p in patients]
+        ages = np.array([np.nan if a is None else a for a in ages_raw], dtype=np.float64)
+        genders = np.array([self._gender_code(p.get('gender')) for p in patients], dtype=np.int16)
+
+        age = ages[owner]
+        age_bad = ~np.isnan(age) & ((age < self.min_age[rows]) | (age > self.max_age[rows]))
+        restriction = self.restriction[rows]
+        gender = genders[owner]
+        gender_bad = (restriction >= 0) & (gender != -1) & (gender != restriction)
+
+        # np.flatnonzero keeps drug order within each patient
+        for i in np.flatnonzero(age_bad).tolist():
+            patient = int(owner[i])
+            results[patient][0].append(self._age_warning(int(rows[i]), ages_raw[patient]))
+        for i in np.flatnonzero(gender_bad).tolist():
+            results[int(owner[i])][1].append(self._gender_text[int(rows[i])])
+        return results
+
+
+_rule_indexes = {}      # path -> (mtime_ns, RuleIndex)
+_rule_lock = threading.Lock()
+
+
+def get_rule_index(path: str = DEFAULT_RULES_PATH) -> RuleIndex:
+    """
+    RuleIndex for a rules file, built once and cached; rebuilt automatically
+    when the file's modification time changes.
+    """
+    mtime = os.stat(path).st_mtime_ns
+    cached = _rule_indexes.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with _rule_lock:
+        cached = _rule_indexes.get(path)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, RuleIndex.from_file(path))
+            _rule_indexes[path] = cached
+    return cached[1]
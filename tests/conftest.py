@@ -0,0 +1,33 @@
+"""
+Shared fixtures for the test suite. Run from the repository root:
+
+    python -m pytest -q
+"""
+
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import pytest
+
+
+@pytest.fixture
+def reload_with_overlay(monkeypatch):
+    """
+    reload_with_overlay(rows) swaps in a snapshot with `rows` as the local
+    overlay (InteractionOverlay rows); the plain graph is swapped back after.
+    """
+    import engines.data_loader as dl
+    from engines.overlay import InteractionOverlay
+
+    def swap(rows):
+        overlay = InteractionOverlay(rows) if rows else None
+        monkeypatch.setattr(dl, "_read_overlay", lambda path=None: overlay)
+        return dl.reload()
+
+    yield swap
+    monkeypatch.undo()
+    dl.reload()
@@ -0,0 +1,76 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from engines.adjacency import CSRAdjacency
+from engines.bit_adjacency import PackedAdjacency
+
+NUM_NODES = 60
+
+
+@pytest.fixture(scope="module")
+def graph():
+    rng = np.random.default_rng(0)
+    pairs = rng.integers(0, NUM_NODES, size=(2, 500))
+    pairs = pairs[:, pairs[0] != pairs[1]]
+    edges = {(min(a, b), max(a, b)) for a, b in pairs.T.tolist()}
+    # Both directions and a duplicate in the input, as OGB serves it
+    edge_index = np.concatenate([pairs, pairs[::-1], pairs[:, :10]], axis=1)
+    return CSRAdjacency.from_edge_index(edge_index, NUM_NODES), edges
+
+
+def test_symmetrised_deduplicated_and_sorted(graph):
+    adjacency, edges = graph
+    assert adjacency.num_edges == len(edges)
+    for node in range(NUM_NODES):
+        row = adjacency.neighbors(node).tolist()
+        assert row == sorted({b for a, b in edges if a == node} | {a for a, b in edges if b == node})
+
+
+def test_find_returns_the_slot_holding_the_partner(graph):
+    adjacency, edges = graph
+    for a, b in itertools.product(range(NUM_NODES), repeat=2):
+        slot = adjacency.find(a, b)
+        if (min(a, b), max(a, b)) in edges:
+            assert adjacency.indptr[a] <= slot < adjacency.indptr[a + 1]
+            assert adjacency.indices[slot] == b
+        else:
+            assert slot == -1
+    assert adjacency.find(-1, 0) == adjacency.find(0, NUM_NODES) == -1
+
+
+def test_find_many_matches_find(graph):
+    adjacency, _ = graph
+    a, b = np.meshgrid(np.arange(-1, NUM_NODES + 1), np.arange(-1, NUM_NODES + 1))
+    slots = adjacency.find_many(a.ravel(), b.ravel())
+    assert slots.tolist() == [adjacency.find(x, y) for x, y in zip(a.ravel().tolist(),
+                                                                    b.ravel().tolist())]
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 5, 12, 40])
+def test_edges_within_strategies_agree(graph, size):
+    adjacency, edges = graph
+    ids = np.random.default_rng(size).choice(NUM_NODES, size=size, replace=False)
+    members = set(ids.tolist())
+    want = sorted((a, b) for a, b in edges if a in members and b in members)
+    for strategy in ("auto", "loop", "pairs", "intersect"):
+        rows, cols, slots = adjacency.edges_within(np.concatenate([ids, ids[:2], [-3]]), strategy)
+        assert list(zip(rows.tolist(), cols.tolist())) == want
+        assert slots.tolist() == [adjacency.find(a, b) for a, b in want]
+    with pytest.raises(ValueError):
+        adjacency.edges_within(ids, "nope")
+
+
+def test_packed_adjacency_matches_csr(graph):
+    adjacency, edges = graph
+    packed = PackedAdjacency.from_csr(adjacency)
+    dense = np.zeros((NUM_NODES, NUM_NODES), dtype=bool)
+    for a, b in edges:
+        dense[a, b] = dense[b, a] = True
+    ids = np.arange(NUM_NODES)
+    assert np.array_equal(packed.submatrix(ids), dense)
+    assert np.array_equal(packed.degrees(), np.diff(adjacency.indptr))
+    subset = ids[::3]
+    assert np.array_equal(packed.counts_within(subset), dense[np.ix_(subset, subset)].sum(axis=1))
+    assert not packed.has_many([-1, 0], [0, NUM_NODES]).any()
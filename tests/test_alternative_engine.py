@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from engines.alternative_engine import suggest_alternatives
+from engines.data_loader import get_knowledge_graph
+from engines.validation_engine import RuleIndex
+
+RULES = RuleIndex([
+    {"name": "Aspirin",     "min_age": 16, "category": "NSAID", "gender_restriction": "None"},
+    {"name": "Ibuprofen",   "min_age": 12, "category": "NSAID", "gender_restriction": "None"},
+    {"name": "DB00682",     "min_age": 18, "category": "Anticoagulant",
+     "gender_restriction": "None"},
+    {"name": "Sildenafil",  "min_age": 18, "category": "PDE5 inhibitor",
+     "gender_restriction": "Male"},
+])
+REGIMEN = ["Lepirudin", "Cetuximab", "Fluconazole"]
+
+
+@pytest.fixture(scope="module")
+def graph():
+    return get_knowledge_graph()
+
+
+def test_node_rows_resolve_aliases_and_drugbank_ids(graph):
+    rows = RULES.node_rows(graph)
+    name_to_id = graph.name_to_id()
+    assert rows[name_to_id["Acetylsalicylic acid"]] == RULES.row("Aspirin")
+    assert rows[name_to_id["Warfarin"]] == RULES.row("DB00682")
+    assert rows[name_to_id["Ibuprofen"]] == RULES.row("Ibuprofen")
+    assert np.count_nonzero(rows >= 0) == 4
+
+
+def test_category_filter_uses_the_resolved_rules():
+    got = suggest_alternatives(REGIMEN, "Fluconazole", top_k=10, category="nsaid", rules=RULES)
+    assert {s["drug"] for s in got} == {"Acetylsalicylic acid", "Ibuprofen"}
+    assert all(s["category"] == "NSAID" for s in got)
+    got = suggest_alternatives(REGIMEN, "Fluconazole", category="Anticoagulant", rules=RULES)
+    assert [s["drug"] for s in got] == ["Warfarin"]
+
+
+def test_patient_filter_drops_restricted_drugs_only():
+    everyone = suggest_alternatives(REGIMEN, "Fluconazole", top_k=5000, rules=RULES)
+    child = suggest_alternatives(REGIMEN, "Fluconazole", top_k=5000, rules=RULES,
+                                 patient={"age": 14, "gender": "Female"})
+    dropped = {s["drug"] for s in everyone} - {s["drug"] for s in child}
+    assert dropped == {"Acetylsalicylic acid", "Warfarin", "Sildenafil"}
+    assert [s["drug"] for s in child] == [s["drug"] for s in everyone if s["drug"] not in dropped]
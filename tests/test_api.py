@@ -0,0 +1,84 @@
+import pytest
+
+import api
+from engines.interaction_engine import check_interactions, warmup_status
+from engines.risk_engine import calculate_risk
+from engines.validation_engine import get_rule_index
+
+
+@pytest.fixture(scope="module")
+def client():
+    api.WATCH_INTERVAL = 0          # no watcher thread from the tests
+    app = api.create_app()
+    assert warmup_status(timeout=120)["ready"]
+    return app.test_client()
+
+
+def test_ready_reports_the_graph(client):
+    response = client.get("/ready")
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["ready"] and body["error"] is None
+    assert body["graph"]["version"] >= 1
+
+
+def test_drugs_and_search(client):
+    drugs = client.get("/drugs").get_json()["drugs"]
+    assert len(drugs) == 4267 and "Warfarin" in drugs
+    matches = client.get("/drugs/search", query_string={"q": "warfrin", "k": 3}).get_json()
+    assert matches["matches"][0]["name"] == "Warfarin" and len(matches["matches"]) <= 3
+    capped = client.get("/drugs/search", query_string={"q": "a", "k": 500}).get_json()
+    assert 0 < len(capped["matches"]) <= api.MAX_SEARCH_RESULTS
+    assert client.get("/drugs/search", query_string={"q": "a", "k": "x"}).status_code == 400
+
+
+def test_check_resolves_names_and_matches_the_engines(client):
+    body = client.post("/check", json={"drugs": ["warfarin", "Advil", "DB00945", "Nope"],
+                                       "patient": {"age": 70, "gender": "Female"}}).get_json()
+    drugs = ["Warfarin", "Ibuprofen", "Acetylsalicylic acid", "Nope"]
+    conflicts = check_interactions(drugs)
+    age, gender = get_rule_index().validate({"age": 70, "gender": "Female"}, drugs)
+    assert body["conflicts"] == conflicts
+    assert (body["age_warnings"], body["gender_warnings"]) == (age, gender)
+    assert (body["risk_score"], body["risk_level"]) == calculate_risk(conflicts, age, gender)
+    assert body["unknown_drugs"] == ["Nope"]
+    assert isinstance(body["shared_partners"], list)
+
+
+def test_aliased_drug_keeps_its_patient_rule(client):
+    body = client.post("/check", json={"drugs": ["Aspirin", "Warfarin"],
+                                       "patient": {"age": 10}}).get_json()
+    assert [w.split()[0] for w in body["age_warnings"]] == ["Aspirin", "Warfarin"]
+
+
+def test_batch_matches_single_checks(client):
+    regimens = [{"drugs": ["Warfarin", "Ibuprofen"], "patient": {"age": 10}},
+                {"drugs": ["Aspirin", "Sildenafil", "Lisinopril"],
+                 "patient": {"age": 40, "gender": "Female"}},
+                {"drugs": []}]
+    results = client.post("/check/batch", json={"regimens": regimens}).get_json()["results"]
+    for regimen, result in zip(regimens, results):
+        single = client.post("/check", json=regimen).get_json()
+        single.pop("shared_partners")
+        assert result == single
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/check", None),
+    ("/check", {"drugs": "Warfarin"}),
+    ("/check", {"drugs": ["Warfarin"], "patient": {"age": "old"}}),
+    ("/check", {"drugs": ["Warfarin"], "patient": {"age": True}}),
+    ("/check", {"drugs": ["Warfarin"], "patient": {"gender": 1}}),
+    ("/check/batch", {"regimens": {}}),
+    ("/check/batch", {"regimens": [{"drugs": ["Warfarin"]}, "Ibuprofen"]}),
+    ("/check/batch", {"regimens": [{"drugs": []}] * (api.MAX_BATCH_SIZE + 1)}),
+])
+def test_bad_requests_are_rejected(client, path, body):
+    response = client.post(path, json=body)
+    assert response.status_code == 400 and "error" in response.get_json()
+
+
+def test_batch_at_the_size_limit_is_accepted(client):
+    body = {"regimens": [{"drugs": ["Warfarin", "Ibuprofen"]}] * api.MAX_BATCH_SIZE}
+    response = client.post("/check/batch", json=body)
+    assert response.status_code == 200 and len(response.get_json()["results"]) == api.MAX_BATCH_SIZE
@@ -0,0 +1,46 @@
+import asyncio
+import threading
+
+import engines.async_service as async_service
+from engines.async_service import InteractionService
+from engines.interaction_engine import check_interactions
+from engines.validation_engine import get_rule_index
+
+REQUESTS = [
+    (["Warfarin", "Ibuprofen"], {"age": 80, "gender": "Male"}),
+    (["Warfarin", "Ibuprofen"], {"age": 30, "gender": "Female"}),      # same regimen, other patient
+    (["Sildenafil", "Levonorgestrel", "Lisinopril"], {"age": 12, "gender": "Male"}),
+    (["Ibuprofen"], None),
+    ([], {"age": 40}),
+]
+
+
+def test_check_matches_sync_engines_and_validates_off_the_loop(monkeypatch):
+    loop_threads, rule_threads = set(), []
+    real_get_rule_index = async_service.get_rule_index
+
+    def recording_get_rule_index(path):
+        rule_threads.append(threading.current_thread())
+        return real_get_rule_index(path)
+
+    monkeypatch.setattr(async_service, "get_rule_index", recording_get_rule_index)
+
+    async def run():
+        loop_threads.add(threading.current_thread())
+        service = InteractionService(window=0.01)
+        try:
+            return await asyncio.gather(*(service.check(d, p) for d, p in REQUESTS)), service.stats
+        finally:
+            service.close()
+
+    results, stats = asyncio.run(run())
+
+    rules = get_rule_index()
+    for (drugs, patient), result in zip(REQUESTS, results):
+        assert result["conflicts"] == check_interactions(drugs)
+        age_warnings, gender_warnings = rules.validate(patient or {}, drugs)
+        assert result["age_warnings"] == age_warnings
+        assert result["gender_warnings"] == gender_warnings
+    assert results[0]["age_warnings"] and not results[1]["age_warnings"]
+    assert stats["deduplicated"] == 1
+    assert rule_threads and not loop_threads & set(rule_threads)
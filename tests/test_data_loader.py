@@ -0,0 +1,102 @@
+import pandas as pd
+import pytest
+
+import engines.data_loader as dl
+
+
+@pytest.fixture
+def data_only(tmp_path, monkeypatch):
+    """A deployment that ships data/ but not dataset/ogbl_ddi."""
+    missing = tmp_path / "dataset"
+    monkeypatch.setattr(dl, "_BASE_DIR", str(tmp_path))
+    monkeypatch.setattr(dl, "_DATASET_DIR", str(missing / "ogbl_ddi"))
+    monkeypatch.setattr(dl, "_get_mapping_dir", lambda: str(missing / "ogbl_ddi" / "mapping"))
+    return tmp_path
+
+
+def test_artifacts_serve_without_the_ogb_dataset(data_only):
+    assert dl._artifacts_fresh()
+    graph = dl.KnowledgeGraph(1, "artifacts").warm()
+    current = dl.get_knowledge_graph()
+    assert graph.drug_names() == current.drug_names()
+    assert graph.idx_to_db() == current.idx_to_db()
+    assert graph.name_index().resolve("DB00682") == graph.name_to_id()["Warfarin"]
+    assert graph.adjacency().num_edges == current.base_adjacency().num_edges
+
+
+def test_old_artifacts_without_drug_ids_need_the_mapping(data_only, monkeypatch):
+    names = data_only / "drug_names.csv"
+    pd.read_csv(dl._NAMES_PATH).drop(columns="drug_id").to_csv(names, index=False)
+    monkeypatch.setattr(dl, "_NAMES_PATH", str(names))
+    assert not dl._artifacts_fresh()
+
+
+@pytest.fixture
+def swaps(monkeypatch):
+    """(old, new) of every snapshot swap during the test."""
+    seen = []
+    monkeypatch.setattr(dl, "_listeners", dl._listeners + [lambda old, new: seen.append((old, new))])
+    return seen
+
+
+def test_reload_swaps_in_a_new_version_and_notifies(swaps, reload_with_overlay):
+    old = dl.get_knowledge_graph()
+    held = old.name_to_id()
+    a, b = held["Warfarin"], int(old.adjacency().neighbors(held["Warfarin"])[0])
+    names = old.drug_names()
+
+    new = reload_with_overlay([("remove", names[a], names[b], "", "")])
+    assert dl.get_knowledge_graph() is new and new.version > old.version
+    assert swaps == [(old, new)]
+    # Only the overlay changed: the base structures are shared, not reloaded
+    assert new.base_adjacency() is old.base_adjacency()
+    assert new.drug_names() is old.drug_names()
+    assert not new.adjacency().has_interaction(a, b)
+    # A caller holding the old snapshot keeps seeing the old graph
+    assert old.adjacency().has_interaction(a, b)
+    assert dl.reload_status()["version"] == new.version
+
+
+def test_failed_reload_keeps_the_current_snapshot(swaps, monkeypatch):
+    current = dl.get_knowledge_graph()
+
+    def broken(path=None):
+        raise OSError("overlay unreadable")
+
+    monkeypatch.setattr(dl, "_read_overlay", broken)
+    with pytest.raises(OSError):
+        dl.reload()
+    assert dl.get_knowledge_graph() is current and swaps == []
+    assert current.adjacency().num_edges > 0
+
+
+BAD_OVERLAYS = [
+    "action,drug1,drug2,severity,description\nadd,Warfarin,Not A Drug,,\n",
+    "action,drug1,drug2,severity,description\nmerge,Warfarin,Ibuprofen,,\n",
+    "action,drug1,drug2,severity,description\nadd,Warfarin,Ibuprofen,,,,extra\n",
+]
+
+
+@pytest.mark.parametrize("text", BAD_OVERLAYS)
+def test_bad_overlay_is_left_out_of_a_fresh_snapshot(tmp_path, text):
+    path = tmp_path / "overlay.csv"
+    path.write_text(text)
+    graph = dl.KnowledgeGraph.open(1000, overlay_path=str(path))
+    base = dl.get_knowledge_graph().base_adjacency()
+    assert graph.adjacency().num_edges == base.num_edges
+    assert graph.overlay is None and graph.overlay_error
+    assert graph.overlay_stats() is None
+    with pytest.raises(dl.OverlayError):
+        dl.KnowledgeGraph.open(1000, overlay_path=str(path), strict=True).validate_overlay()
+
+
+@pytest.mark.parametrize("text", BAD_OVERLAYS)
+def test_reload_refuses_a_bad_overlay(swaps, monkeypatch, tmp_path, text):
+    current = dl.get_knowledge_graph()
+    path = tmp_path / "overlay.csv"
+    path.write_text(text)
+    monkeypatch.setattr(dl, "_OVERLAY_PATH", str(path))
+    with pytest.raises(dl.OverlayError):
+        dl.reload()
+    assert dl.get_knowledge_graph() is current and swaps == []
+    assert current.adjacency().num_edges > 0
@@ -0,0 +1,63 @@
+import pandas as pd
+
+from engines.adjacency import CSRAdjacency
+from engines.descriptions import DescriptionIndex
+
+NAMES = ["Alpha", "Beta", "Gamma"]
+DB_TO_IDX = {"DB1": 0, "DB2": 1, "DB3": 2}
+
+
+def frame(rows):
+    db = {name: f"DB{i + 1}" for i, name in enumerate(NAMES)}
+    return pd.DataFrame(
+        [(db[a], a, db[b], b, text) for a, b, text in rows],
+        columns=["first drug id", "first drug name", "second drug id", "second drug name",
+                 "description"],
+    )
+
+
+def render(index, adjacency, a, b):
+    slot = adjacency.find(a, b)
+    return index.render(slot, NAMES[a], NAMES[b])
+
+
+def build(rows, edges=((0, 1), (1, 2))):
+    adjacency = CSRAdjacency.from_edge_index(list(zip(*edges)), len(NAMES))
+    return DescriptionIndex.from_frame(frame(rows), DB_TO_IDX, adjacency), adjacency
+
+
+def test_renders_both_directions_with_names_in_place():
+    index, adjacency = build([("Alpha", "Beta", "Alpha may increase the effect of Beta.")])
+    assert render(index, adjacency, 0, 1) == "Alpha may increase the effect of Beta."
+    assert render(index, adjacency, 1, 0) == "Alpha may increase the effect of Beta."
+    assert len(index) == 2 and len(index.templates) == 1
+
+
+def test_last_row_wins_across_both_directions():
+    index, adjacency = build([
+        ("Alpha", "Beta", "OLD: Alpha and Beta."),
+        ("Beta", "Alpha", "MIDDLE: Beta and Alpha."),
+        ("Alpha", "Beta", "LAST: Alpha and Beta."),
+    ])
+    assert render(index, adjacency, 0, 1) == "LAST: Alpha and Beta."
+    assert render(index, adjacency, 1, 0) == "LAST: Alpha and Beta."
+
+
+def test_reverse_row_last_wins_for_both_slots():
+    index, adjacency = build([
+        ("Alpha", "Beta", "FIRST: Alpha and Beta."),
+        ("Beta", "Alpha", "SECOND: Beta and Alpha."),
+    ])
+    assert render(index, adjacency, 0, 1) == "SECOND: Beta and Alpha."
+    assert render(index, adjacency, 1, 0) == "SECOND: Beta and Alpha."
+
+
+def test_rows_off_the_graph_or_unknown_are_dropped():
+    index, adjacency = build([
+        ("Alpha", "Gamma", "Alpha and Gamma."),          # not an edge
+        ("Beta", "Gamma", "Beta and Gamma."),
+    ])
+    assert render(index, adjacency, 1, 2) == "Beta and Gamma."
+    assert render(index, adjacency, 0, 1) is None
+    assert index.render(-1, "x", "y", "fallback") == "fallback"
+    assert len(index) == 2
@@ -0,0 +1,171 @@
+import json
+
+import numpy as np
+import pytest
+
+import engines.data_loader as dl
+from engines.data_loader import get_drug_names
+from engines.interaction_engine import (
+    RegimenSession, cache_stats, check_interactions, check_interactions_batch, clear_cache,
+    configure_cache, screening_pool,
+)
+from engines.lru_cache import LRUCache
+from engines.risk_engine import calculate_risk
+from engines.validation_engine import DEFAULT_RULES_PATH, validate_patient
+
+
+def random_regimens(count, low=2, high=12, seed=0):
+    names = get_drug_names()
+    rng = np.random.default_rng(seed)
+    return [[names[i] for i in rng.choice(len(names), rng.integers(low, high), replace=False)]
+            + (["Unknown drug"] if k % 7 == 0 else [])
+            for k in range(count)]
+
+
+def assert_same_batch(got, want):
+    assert got.keys() == want.keys()
+    for col in want:
+        assert got[col].dtype == want[col].dtype
+        assert np.array_equal(got[col], want[col]), col
+
+
+@pytest.fixture(scope="module")
+def regimens():
+    return random_regimens(3000)
+
+
+def test_pool_matches_one_process(regimens):
+    want = check_interactions_batch(regimens)
+    assert len(want["regimen_id"]) > 0
+    assert_same_batch(check_interactions_batch(regimens, workers=2), want)
+    # An iterator is consumed chunk by chunk; the regimen ids stay global
+    assert_same_batch(check_interactions_batch(iter(regimens), workers=2, chunk_size=128), want)
+
+
+def test_reused_pool_and_empty_input(regimens):
+    with screening_pool(2) as pool:
+        assert_same_batch(check_interactions_batch(regimens[:500], 2, pool=pool),
+                          check_interactions_batch(regimens[:500]))
+        assert_same_batch(check_interactions_batch([], 2, pool=pool),
+                          check_interactions_batch([]))
+
+
+# ── Result caches ─────────────────────────────────────────────────────────────── #
+
+@pytest.fixture
+def caches():
+    sizes = {name: stats["maxsize"] for name, stats in cache_stats().items()}
+    clear_cache()
+    yield
+    configure_cache(sizes["regimens"], sizes["pairs"])
+    clear_cache()
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1              # "b" is now the oldest
+    cache.put("c", 3)
+    assert cache.get("b") is None and cache.get("c") == 3
+    cache.resize(1)
+    assert len(cache) == 1 and cache.get("c") == 3
+    assert cache.stats() == {"size": 1, "maxsize": 1, "hits": 3, "misses": 1, "evictions": 2}
+    cache.resize(0)
+    cache.put("d", 4)
+    assert len(cache) == 0
+
+
+def test_cached_results_equal_uncached(caches, regimens):
+    # Reordered, duplicated and overlapping variants right after each regimen hit both caches
+    sample = [variant for r in regimens[:300]
+              for variant in (r, list(reversed(r)), r[:1] + r, r[1:])]
+    configure_cache(regimens=0, pairs=0)
+    want = [check_interactions(r) for r in sample]
+    configure_cache(regimens=64, pairs=256)
+    assert [check_interactions(r) for r in sample] == want
+    assert [check_interactions(r) for r in sample] == want
+    stats = cache_stats()
+    assert stats["regimens"]["hits"] > 0 and stats["regimens"]["evictions"] > 0
+    assert stats["pairs"]["hits"] > 0 and stats["pairs"]["evictions"] > 0
+
+
+def test_reload_never_serves_stale_entries(caches, reload_with_overlay):
+    regimen = next(r for r in random_regimens(200, 6, 12, seed=3) if check_interactions(r))
+    clear_cache()
+    before = check_interactions(regimen)
+    assert check_interactions(regimen) == before and cache_stats()["regimens"]["hits"] == 1
+
+    gone = before[0]
+    graph = reload_with_overlay([("remove", gone["drug1"], gone["drug2"], "", "")])
+    after = check_interactions(regimen)
+    assert after == [c for c in before if c is not gone]
+    assert cache_stats()["regimens"]["hits"] == 0        # the swap dropped the old entries
+
+    # Keys carry the version, so even entries that survive a swap are never hit
+    reload_with_overlay(None)
+    assert check_interactions(regimen) == before
+    assert graph.version < dl.get_knowledge_graph().version
+
+
+# ── RegimenSession ────────────────────────────────────────────────────────────── #
+
+@pytest.fixture(scope="module")
+def drugs_db():
+    with open(DEFAULT_RULES_PATH) as f:
+        return json.load(f)
+
+
+def from_scratch(drugs, patient, drugs_db):
+    conflicts = check_interactions(drugs)
+    # validate_patient() matches rules by name only; the session also follows aliases
+    index, names = dl.get_name_index(), dl.get_drug_names()
+    spelled = {names[index.resolve(r["name"])]: r["name"] for r in drugs_db
+               if index.resolve(r["name"]) >= 0}
+    age, gender = validate_patient(patient, [spelled.get(d, d) for d in drugs], drugs_db)
+    return conflicts, age, gender, calculate_risk(conflicts, age, gender)
+
+
+def assert_session_state(session, drugs_db):
+    conflicts, age, gender, risk = from_scratch(session.drugs, session.patient, drugs_db)
+    assert session.conflicts == conflicts
+    assert (session.age_warnings, session.gender_warnings) == (age, gender)
+    assert session.risk() == risk
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_session_matches_recomputing_after_every_edit(drugs_db, seed):
+    rng = np.random.default_rng(seed)
+    names = dl.get_drug_names()
+    # Ruled and well-connected drugs, random ones and names the graph does not know
+    pool = (["Warfarin", "Ibuprofen", "Sildenafil", "Acetylsalicylic acid", "Aspirin",
+             "Unknown drug", "warfarin"]
+            + [names[i] for i in rng.choice(len(names), 40, replace=False)])
+    patients = [{"age": 10, "gender": "Female"}, {"age": 70, "gender": "Male"}, {}]
+    session = RegimenSession(drugs_db, patients[0])
+    for step in range(150):
+        name = pool[rng.integers(len(pool))]
+        if step % 40 == 39:
+            session.set_patient(patients[rng.integers(len(patients))])
+        elif name in session and rng.random() < 0.5:
+            gone = session.remove(name)
+            assert all(name in (c["drug1"], c["drug2"]) for c in gone)
+            assert session.remove(name) == []
+        else:
+            present = name in session
+            added = session.add(name)
+            if present:
+                assert added == []
+            assert all(c["drug2"] == name for c in added)
+        assert len(set(session.drugs)) == len(session)
+        assert_session_state(session, drugs_db)
+
+
+def test_session_rebuilds_after_a_swap(drugs_db, reload_with_overlay):
+    regimen = next(r for r in random_regimens(200, 6, 12, seed=5) if check_interactions(r))
+    session = RegimenSession(drugs_db, {"age": 10}).sync(regimen)
+    gone = check_interactions(regimen)[0]
+    reload_with_overlay([("remove", gone["drug1"], gone["drug2"], "", "")])
+    session.add("Warfarin")
+    assert gone not in session.conflicts
+    assert_session_state(session, drugs_db)
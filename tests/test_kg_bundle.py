@@ -0,0 +1,96 @@
+import os
+import struct
+
+import numpy as np
+import pytest
+
+import engines.data_loader as dl
+from engines.adjacency import CSRAdjacency
+from engines.descriptions import DescriptionIndex
+from engines.kg_bundle import (BUNDLE_MAGIC, BUNDLE_VERSION, BundleError, _bundle_arrays,
+                               open_bundle, write_bundle)
+from engines.string_table import StringTable
+
+
+def test_arrays_and_meta_round_trip_aligned(tmp_path):
+    path = str(tmp_path / "kg.bundle")
+    arrays = {
+        "empty":  np.zeros(0, dtype=np.int32),
+        "bytes":  np.arange(3, dtype=np.uint8),
+        "ints":   np.arange(-5, 100, dtype=np.int64),
+        "floats": np.linspace(0, 1, 17, dtype=np.float32),
+    }
+    write_bundle(path, arrays, {"num_nodes": 7, "note": "héllo"})
+    assert not os.path.exists(path + ".tmp")
+
+    bundle = open_bundle(path)
+    assert bundle.version == BUNDLE_VERSION
+    assert bundle.meta == {"num_nodes": 7, "note": "héllo"} and bundle.num_nodes == 7
+    for name, want in arrays.items():
+        got = bundle.array(name)
+        assert got.dtype == want.dtype and np.array_equal(got, want)
+        assert not got.flags.writeable
+        assert (bundle._data_start + bundle._sections[name]["offset"]) % 64 == 0
+
+
+def test_graph_sections_round_trip(tmp_path):
+    path = str(tmp_path / "kg.bundle")
+    adjacency = CSRAdjacency.from_edge_index([[0, 1, 2], [1, 2, 3]], 4)
+    names = StringTable.from_strings(["Ibuprofen", "Warfarin", "Naïve", ""])
+    db_ids = StringTable.from_strings(["DB1", "DB2", "DB3", "DB4"])
+    descriptions = DescriptionIndex(np.arange(len(adjacency.indices), dtype=np.int32) % 3 - 1,
+                                    StringTable.from_strings(["{0} and {1}."]))
+    degrees = np.diff(adjacency.indptr).astype(np.int32)
+    severity = np.arange(len(adjacency.indices), dtype=np.uint8) % 4
+    write_bundle(path, _bundle_arrays(adjacency, degrees, severity, names, db_ids, descriptions),
+                 {"num_nodes": 4})
+
+    bundle = open_bundle(path)
+    assert np.array_equal(bundle.adjacency().indptr, adjacency.indptr)
+    assert np.array_equal(bundle.adjacency().indices, adjacency.indices)
+    assert np.array_equal(bundle.degrees(), degrees)
+    assert np.array_equal(bundle.edge_severity(), severity)
+    assert bundle.names().tolist() == names.tolist()
+    assert bundle.db_ids()[3] == "DB4"
+    assert np.array_equal(bundle.descriptions().codes, descriptions.codes)
+    assert bundle.descriptions().templates.tolist() == ["{0} and {1}."]
+
+
+@pytest.mark.parametrize("magic, version", [(b"NOPE", BUNDLE_VERSION),
+                                            (BUNDLE_MAGIC, BUNDLE_VERSION - 1)])
+def test_foreign_files_raise_bundle_error(tmp_path, magic, version):
+    path = str(tmp_path / "kg.bundle")
+    with open(path, "wb") as f:
+        f.write(struct.pack("<4sIQ", magic, version, 2) + b"{}")
+    with pytest.raises(BundleError):
+        open_bundle(path)
+
+
+@pytest.fixture
+def sources(tmp_path, monkeypatch):
+    (tmp_path / "raw").mkdir()
+    (tmp_path / "raw" / "edge.csv.gz").write_bytes(b"edges v1")
+    monkeypatch.setattr(dl, "_DATASET_DIR", str(tmp_path))
+    return tmp_path / "raw" / "edge.csv.gz"
+
+
+def test_sources_match_tracks_content_not_mtime(sources):
+    stamp = dl._source_stamp()
+    assert set(stamp) == {"raw/edge.csv.gz"}
+    assert dl._sources_match(stamp)
+
+    # Same bytes, new mtime (a fresh checkout): still fresh
+    os.utime(sources, ns=(0, stamp["raw/edge.csv.gz"]["mtime_ns"] + 10**9))
+    assert dl._sources_match(stamp)
+
+    # Same size, different bytes: stale
+    sources.write_bytes(b"edges v2")
+    assert not dl._sources_match(stamp)
+
+
+def test_sources_match_needs_a_record_for_every_present_file(sources):
+    assert not dl._sources_match(None)
+    assert not dl._sources_match({})
+    sources.unlink()
+    # Nothing present to check, e.g. a deployment shipping only data/
+    assert dl._sources_match({})
@@ -0,0 +1,35 @@
+from engines.name_index import _MIN_SIMILARITY, NameIndex
+
+NAMES = ["Warfarin", "Ibuprofen", "Zolazepam", "Didox", "Insulin Glargine", "Co-trimoxazole"]
+IDX_TO_DB = {i: f"DB{i + 1:05d}" for i in range(len(NAMES))}
+
+
+def index():
+    return NameIndex(NAMES, IDX_TO_DB, aliases={"Coumadin": "Warfarin"})
+
+
+def test_exact_alias_prefix_word_and_drugbank_id():
+    search = index().search
+    assert search("warfarin")[0]["match"] == "name"
+    assert search("COUMADIN")[0] == {"name": "Warfarin", "node_id": 0, "drugbank_id": "DB00001",
+                                     "match": "alias", "score": 1.0}
+    assert search("ibu")[0]["name"] == "Ibuprofen"
+    assert search("glargine")[0]["match"] == "word"
+    assert search("co trimoxazole")[0]["name"] == "Co-trimoxazole"
+    assert index().resolve("db00002") == 1
+    assert index().resolve("nothing") == -1
+
+
+def test_typos_resolve_to_the_intended_drug():
+    assert index().search("warfrin")[0]["name"] == "Warfarin"
+    assert index().search("ibuprofn")[0]["name"] == "Ibuprofen"
+
+
+def test_unrelated_queries_get_no_fuzzy_padding():
+    assert index().search("zzzz") == []
+    # An unknown DrugBank ID is not a typo of a drug name
+    assert index().search("db00682") == []
+    for query in ("warfrin", "zolazepan", "didx", "qqqq glargine"):
+        for result in index().search(query):
+            if result["match"] == "fuzzy":
+                assert result["score"] >= _MIN_SIMILARITY
@@ -0,0 +1,144 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from engines.adjacency import CSRAdjacency
+from engines.descriptions import DescriptionIndex
+from engines.overlay import InteractionOverlay, OverlayError
+from engines.severity import SEVERITY_LEVELS, SeverityRule
+
+NAMES = ["Alpha", "Beta", "Gamma", "Delta", "Epsilon", "Zeta"]
+BASE_EDGES = {(0, 1): "Mild", (1, 2): "Moderate", (2, 3): "Moderate", (3, 4): "Severe"}
+RULE = SeverityRule(high_degree_threshold=2)
+
+ROWS = [
+    ("add",      "Alpha",   "Gamma",   "Severe",   "Alpha blocks Gamma."),
+    ("add",      "Zeta",    "Epsilon", "",         ""),
+    ("remove",   "Beta",    "Gamma",   "",         ""),
+    ("severity", "Delta",   "Epsilon", "Contraindicated", ""),
+    ("add",      "Beta",    "Alpha",   "",         "Beta raises Alpha."),
+    ("severity", "Gamma",   "Delta",   "Mild",     ""),
+    ("severity", "Delta",   "Gamma",   "Severe",   ""),
+]
+EXPECTED = {(0, 1): "Mild", (0, 2): "Severe", (2, 3): "Severe", (3, 4): "Contraindicated",
+            (4, 5): "Moderate"}
+
+
+def lookup(drug):
+    return NAMES.index(drug) if drug in NAMES else -1
+
+
+def base_graph(edges=BASE_EDGES):
+    adjacency = CSRAdjacency.from_edge_index(np.array(list(edges)).T, len(NAMES))
+    severity = np.zeros(len(adjacency.indices), dtype=np.uint8)
+    for (a, b), level in edges.items():
+        severity[[adjacency.find(a, b), adjacency.find(b, a)]] = SEVERITY_LEVELS.index(level)
+    return adjacency, severity
+
+
+def apply(rows=ROWS, adjacency=None, severity=None, descriptions=None):
+    if adjacency is None:
+        adjacency, severity = base_graph()
+    descriptions = descriptions or DescriptionIndex.empty(len(adjacency.indices))
+    degrees = np.diff(adjacency.indptr).astype(np.int32)
+    return InteractionOverlay(rows).apply(adjacency, severity, descriptions, lookup, NAMES,
+                                          degrees, RULE)
+
+
+def test_merged_lookups_match_a_rebuilt_csr():
+    overlaid, severity, _, stats = apply()
+    assert stats == {"rows": 7, "added": 2, "removed": 1, "overridden": 3}
+    want, _ = base_graph(EXPECTED)
+    assert overlaid.num_edges == want.num_edges
+    for node in range(len(NAMES)):
+        assert overlaid.neighbors(node).tolist() == want.neighbors(node).tolist()
+
+    a, b = (np.array(x) for x in zip(*itertools.product(range(len(NAMES)), repeat=2)))
+    slots = overlaid.find_many(a, b)
+    assert np.array_equal(slots >= 0, want.find_many(a, b) >= 0)
+    assert slots.tolist() == [overlaid.find(x, y) for x, y in zip(a.tolist(), b.tolist())]
+    assert {(x, y): SEVERITY_LEVELS[severity[s]] for x, y, s in zip(a, b, slots) if s >= 0 and x < y} \
+        == EXPECTED
+
+    ids = np.arange(len(NAMES))
+    rows, cols, slots = overlaid.edges_within(ids)
+    want_rows, want_cols, _ = want.edges_within(ids)
+    assert np.array_equal(rows, want_rows) and np.array_equal(cols, want_cols)
+    assert slots.tolist() == [overlaid.find(x, y) for x, y in zip(rows.tolist(), cols.tolist())]
+
+
+def test_descriptions_render_in_both_directions():
+    overlaid, _, descriptions, _ = apply()
+
+    def render(a, b):
+        return descriptions.render(overlaid.find(a, b), NAMES[a], NAMES[b])
+
+    assert render(0, 2) == render(2, 0) == "Alpha blocks Gamma."
+    assert render(1, 0) == render(0, 1) == "Beta raises Alpha."
+    assert render(5, 4) == render(4, 5) == ("An interaction between Epsilon and Zeta "
+                                            "is recorded in the local interaction list.")
+    assert render(2, 3) is None
+
+
+def test_to_csr_reslots_per_slot_arrays():
+    overlaid, severity, descriptions, _ = apply()
+    csr, slot_map = overlaid.to_csr()
+    want, want_severity = base_graph(EXPECTED)
+    assert np.array_equal(csr.indptr, want.indptr) and np.array_equal(csr.indices, want.indices)
+    assert np.array_equal(severity[slot_map], want_severity)
+    codes = descriptions.codes[slot_map]
+    assert descriptions.render(overlaid.find(0, 2), "Alpha", "Gamma") == \
+        DescriptionIndex(codes, descriptions.templates).render(csr.find(0, 2), "Alpha", "Gamma")
+
+
+def test_applying_over_its_own_compaction_changes_nothing():
+    overlaid, severity, descriptions, _ = apply()
+    csr, slot_map = overlaid.to_csr()
+    compacted = DescriptionIndex(descriptions.codes[slot_map], descriptions.templates)
+    again, again_severity, again_descriptions, stats = apply(
+        adjacency=csr, severity=severity[slot_map], descriptions=compacted)
+    assert stats["added"] == stats["removed"] == 0
+    assert np.array_equal(again.to_csr()[0].indices, csr.indices)
+    assert np.array_equal(again_severity, severity[slot_map])
+    for a, b in itertools.permutations(range(len(NAMES)), 2):
+        slot = csr.find(a, b)
+        assert again_descriptions.render(slot, NAMES[a], NAMES[b]) == \
+            compacted.render(slot, NAMES[a], NAMES[b])
+
+
+def test_remove_then_add_restores_the_pair():
+    overlaid, severity, _, stats = apply([("remove", "Alpha", "Beta", "", ""),
+                                          ("add", "Beta", "Alpha", "Contraindicated", "")])
+    assert stats["removed"] == 0 and stats["overridden"] == 1
+    assert SEVERITY_LEVELS[severity[overlaid.find(0, 1)]] == "Contraindicated"
+
+
+@pytest.mark.parametrize("rows", [
+    [("merge", "Alpha", "Beta", "", "")],
+    [("add", "Alpha", "", "", "")],
+    [("add", "Alpha", "Beta", "Fatal", "")],
+    [("severity", "Alpha", "Beta", "", "")],
+])
+def test_malformed_rows_raise(rows):
+    with pytest.raises(OverlayError):
+        InteractionOverlay(rows)
+
+
+@pytest.mark.parametrize("rows", [
+    [("add", "Alpha", "Alpha", "", "")],
+    [("add", "Alpha", "Omega", "", "")],
+    [("remove", "Alpha", "Beta", "", ""), ("severity", "Alpha", "Beta", "Mild", "")],
+    [("severity", "Alpha", "Zeta", "Mild", "")],
+])
+def test_rows_the_graph_cannot_take_raise(rows):
+    with pytest.raises(OverlayError):
+        apply(rows)
+
+
+def test_from_frame_normalises_and_requires_columns():
+    frame = pd.DataFrame({"action": [" ADD "], "drug1": ["Alpha"], "drug2": ["Zeta "]})
+    assert InteractionOverlay.from_frame(frame).rows == [("add", "Alpha", "Zeta", "", "")]
+    with pytest.raises(OverlayError):
+        InteractionOverlay.from_frame(frame.drop(columns="drug2"))
@@ -0,0 +1,81 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from engines.data_loader import SEVERITY_LEVELS, get_drug_names
+from engines.interaction_engine import check_interactions_batch, conflicts_from_batch, severity_counts
+from engines.risk_engine import calculate_risk, calculate_risk_batch, risk_from_points
+from engines.validation_engine import get_rule_index
+
+
+def as_lists(counts, ages, genders):
+    """The list-of-dicts / list-of-strings inputs calculate_risk() takes."""
+    conflicts = [{"severity": level} for level, n in zip(SEVERITY_LEVELS, counts) for _ in range(n)]
+    return conflicts, ["age"] * ages, ["gender"] * genders
+
+
+def scalar(counts, ages, genders):
+    return [calculate_risk(*as_lists(c, a, g))
+            for c, a, g in zip(np.asarray(counts).tolist(), np.asarray(ages).tolist(),
+                               np.asarray(genders).tolist())]
+
+
+def batched(counts, ages, genders):
+    scores, levels = calculate_risk_batch(counts, ages, genders)
+    return list(zip(scores.tolist(), levels.tolist()))
+
+
+@pytest.mark.parametrize("points, expected", [
+    (-5, (0, "Low")), (0, (0, "Low")), (20, (20, "Low")), (21, (21, "Moderate")),
+    (50, (50, "Moderate")), (51, (51, "High")), (100, (100, "High")), (250, (100, "High")),
+])
+def test_band_edges(points, expected):
+    assert risk_from_points(points) == expected
+
+
+def test_batch_band_edges():
+    # Raw points 20 (2 Mild), 25 (1 Mild + 1 age), 50 (5 Mild), 55 (4 Mild + 1 age)
+    counts = np.array([[2, 0, 0, 0], [1, 0, 0, 0], [5, 0, 0, 0], [4, 0, 0, 0]])
+    assert batched(counts, [0, 1, 0, 1], [0, 0, 0, 0]) == [
+        (20, "Low"), (25, "Moderate"), (50, "Moderate"), (55, "High")]
+
+
+def test_batch_matches_scalar_on_every_small_count():
+    grid = np.array(list(itertools.product(range(4), range(4), range(4), range(4), range(3), range(3))))
+    counts, ages, genders = grid[:, :4], grid[:, 4], grid[:, 5]
+    assert batched(counts, ages, genders) == scalar(counts, ages, genders)
+
+
+def test_batch_matches_scalar_on_random_counts():
+    rng = np.random.default_rng(0)
+    n = 20_000
+    counts = rng.poisson(0.6, size=(n, len(SEVERITY_LEVELS)))
+    ages, genders = rng.poisson(0.3, size=n), rng.poisson(0.2, size=n)
+    assert batched(counts, ages, genders) == scalar(counts, ages, genders)
+
+
+def test_empty_batch():
+    scores, levels = calculate_risk_batch(np.zeros((0, len(SEVERITY_LEVELS)), dtype=np.int64),
+                                          np.zeros(0), np.zeros(0))
+    assert scores.shape == (0,) and levels.shape == (0,)
+
+
+def test_batch_matches_calculate_risk_over_screened_regimens():
+    rng = np.random.default_rng(1)
+    names = get_drug_names()
+    regimens = [[names[i] for i in rng.choice(len(names), size=size, replace=False)]
+                for size in rng.integers(2, 21, size=1_000)]
+    # A few regimens with rule drugs, so age/gender warnings fire too
+    regimens += [["Warfarin", "Ibuprofen", "Sildenafil"], ["Levonorgestrel", "Lisinopril"]] * 5
+    patients = [{"age": int(rng.integers(5, 95)), "gender": ("Male", "Female")[i % 2]}
+                for i in range(len(regimens))]
+
+    batch = check_interactions_batch(regimens)
+    per_regimen = conflicts_from_batch(batch, len(regimens), descriptions=False)
+    warnings = get_rule_index().validate_batch(patients, regimens)
+    got = batched(severity_counts(batch, len(regimens)),
+                  [len(age) for age, _ in warnings], [len(gender) for _, gender in warnings])
+    assert got == [calculate_risk(conflicts, age, gender)
+                   for conflicts, (age, gender) in zip(per_regimen, warnings)]
+    assert any(age or gender for age, gender in warnings)
@@ -0,0 +1,59 @@
+import io
+
+import pandas as pd
+import pytest
+
+from engines.screener import ScreenerError, main, run
+
+ROWS = [
+    ("p1", 30, "Male", "Warfarin;Ibuprofen"),
+    ("p2", 12, "Female", "Sildenafil;Levonorgestrel;Lisinopril"),
+    ("p3", None, None, ""),
+    ("p4", 70, "Female", "Warfarin;Unknown drug"),
+    ("p5", 45, "Male", "Ibuprofen;Potassium;Lisinopril"),
+]
+
+
+@pytest.fixture
+def regimens(tmp_path):
+    path = tmp_path / "regimens.csv"
+    pd.DataFrame(ROWS, columns=["patient_id", "age", "sex", "drugs"]).to_csv(path, index=False)
+    return str(path)
+
+
+def test_resume_into_existing_parquet_is_refused(regimens, tmp_path):
+    out = str(tmp_path / "results.parquet")
+    assert run(regimens, out, chunk_size=2, log=io.StringIO()) == len(ROWS)
+    before = pd.read_parquet(out)
+
+    with pytest.raises(ScreenerError):
+        run(regimens, out, chunk_size=2, start_chunk=1, log=io.StringIO())
+    pd.testing.assert_frame_equal(pd.read_parquet(out), before)
+
+    with pytest.raises(SystemExit):
+        main([regimens, out, "--chunk-size", "2", "--start-chunk", "1"])
+    pd.testing.assert_frame_equal(pd.read_parquet(out), before)
+
+
+def test_resume_into_new_parquet_and_csv_append(regimens, tmp_path):
+    full = str(tmp_path / "full.csv")
+    run(regimens, full, chunk_size=2, log=io.StringIO())
+
+    part = str(tmp_path / "part.csv")
+    run(regimens, part, chunk_size=2, log=io.StringIO())
+    run(regimens, part, chunk_size=2, start_chunk=1, log=io.StringIO())
+    appended = pd.read_csv(part, dtype={"patient_id": str})
+    assert appended["patient_id"].tolist() == ["p1", "p2", "p3", "p4", "p5", "p3", "p4", "p5"]
+
+    rest = str(tmp_path / "rest.parquet")
+    assert run(regimens, rest, chunk_size=2, start_chunk=1, log=io.StringIO()) == 3
+    assert pd.read_parquet(rest)["patient_id"].tolist() == ["p3", "p4", "p5"]
+    assert pd.read_csv(full, dtype={"patient_id": str})["patient_id"].tolist() == \
+        ["p1", "p2", "p3", "p4", "p5"]
+
+
+def test_workers_write_the_same_results(regimens, tmp_path):
+    one, two = str(tmp_path / "one.csv"), str(tmp_path / "two.csv")
+    run(regimens, one, chunk_size=2, log=io.StringIO())
+    main([regimens, two, "--chunk-size", "2", "--workers", "2"])
+    assert pd.read_csv(one).equals(pd.read_csv(two))
@@ -0,0 +1,76 @@
+import json
+import os
+
+import numpy as np
+
+from engines.data_loader import get_knowledge_graph
+from engines.validation_engine import RuleIndex, get_rule_index, validate_patient
+
+CHILD = {"age": 10, "gender": "Female"}
+
+
+def test_rules_follow_aliases_to_the_canonical_drug():
+    rules = get_rule_index()
+    want = rules.validate(CHILD, ["Aspirin", "Warfarin"])
+    assert len(want[0]) == 2
+    # /check renames "Aspirin" to the graph's drug before validating
+    assert rules.validate(CHILD, ["Acetylsalicylic acid", "Warfarin"]) == want
+    assert rules.validate_batch([CHILD], [["acetylsalicylic acid", "DB00682"]]) == [want]
+
+
+def test_a_rule_naming_the_drug_directly_wins():
+    rules = RuleIndex([
+        {"name": "Acetylsalicylic acid", "min_age": 2, "gender_restriction": "None"},
+        {"name": "Aspirin", "min_age": 16, "gender_restriction": "None"},
+    ])
+    graph = get_knowledge_graph()
+    assert rules.node_rows(graph)[graph.name_to_id()["Acetylsalicylic acid"]] == 0
+    assert rules.validate({"age": 10}, ["Acetylsalicylic acid"]) == ([], [])
+    assert len(rules.validate({"age": 10}, ["Aspirin"])[0]) == 1
+
+
+def random_case(rng, count, names, drugs_db):
+    """Regimens of graph drugs in mixed case plus unruled names, and assorted patients."""
+    genders = [None, "Male", "Female", "male", "Other"]
+    ruled = [rule["name"] for rule in drugs_db]
+    regimens = []
+    for _ in range(count):
+        picks = [names[i] for i in rng.choice(len(names), rng.integers(0, 8), replace=False)]
+        picks += [ruled[i] for i in rng.choice(len(ruled), rng.integers(0, 3), replace=False)]
+        regimens.append([d.upper() if rng.random() < 0.2 else d for d in picks] + ["Unlisted"])
+    patients = [{"age": None if rng.random() < 0.1 else int(rng.integers(0, 100)),
+                 "gender": genders[rng.integers(len(genders))]} for _ in range(count)]
+    return patients, regimens
+
+
+def test_validate_matches_validate_patient():
+    rng = np.random.default_rng(0)
+    names = get_knowledge_graph().drug_names()
+    restrictions = ["None", "None", "Male", "Female", "female"]
+    drugs_db = [{"name": names[i], "min_age": int(low), "max_age": int(low) + 40,
+                 "gender_restriction": restrictions[rng.integers(len(restrictions))]}
+                for i, low in zip(rng.choice(len(names), 800, replace=False),
+                                  rng.integers(0, 40, 800))]
+    drugs_db += [dict(drugs_db[0], min_age=0, max_age=1)]       # a later rule wins
+    rules = RuleIndex(drugs_db)
+    patients, regimens = random_case(rng, 500, names, drugs_db)
+    want = [validate_patient(p, r, drugs_db) for p, r in zip(patients, regimens)]
+    assert sum(len(a) + len(g) for a, g in want) > 0
+    assert [rules.validate(p, r) for p, r in zip(patients, regimens)] == want
+    assert rules.validate_batch(patients, regimens) == want
+    assert rules.validate_batch([], []) == []
+
+
+def test_get_rule_index_reloads_when_the_file_changes(tmp_path):
+    path = tmp_path / "drugs.json"
+    path.write_text(json.dumps([{"name": "Warfarin", "min_age": 18, "max_age": 75}]))
+    first = get_rule_index(str(path))
+    assert get_rule_index(str(path)) is first
+    assert len(first.validate({"age": 80}, ["Warfarin"])[0]) == 1
+
+    path.write_text(json.dumps([{"name": "Warfarin", "min_age": 18, "max_age": 90}]))
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    second = get_rule_index(str(path))
+    assert second is not first
+    assert second.validate({"age": 80}, ["Warfarin"]) == ([], [])